@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Blueprint, Response, request, send_file, session
+
+from config import API_PAGE_SIZE, API_PAGE_MAX
+from services.product_service import list_products_page
+from services.supplier_service import list_suppliers_page
+from services.sales_service import list_sales_page, parse_sales_filters, sale_info
+from services.version_service import table_versions
+from services.ledger_service import parse_point_in_time, stock_at
+from services.job_service import (
+    available_job_types,
+    submit_job,
+    job_status,
+    recent_jobs,
+    cancel_job,
+)
+
+# ----------------------------------------------------
+# JSON API v1
+#   GET /api/v1/products?after=&limit=&supplier_id=&q=&low_stock=1   (managers only)
+#   GET /api/v1/suppliers?after=&limit=                             (managers only)
+#   GET /api/v1/sales?after=&limit=&start=&end=&cashier=
+#   GET /api/v1/sales/<sale_id>
+#   GET /api/v1/stock?at=&after=&limit=&product_id=
+#   GET/POST /api/v1/jobs, GET /api/v1/jobs/<job_id>[/result],
+#   POST /api/v1/jobs/<job_id>/cancel          (managers only)
+#
+# Every response carries an ETag derived from the change versions of
+# the tables it reads plus the query string. A matching If-None-Match
+# is answered with 304 after a single table_versions lookup, without
+# running the collection query.
+# ----------------------------------------------------
+api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+@api.before_request
+def require_login():
+    if 'user_id' not in session:
+        return _json({"error": "Login required."}, 401)
+
+
+def _manager_only():
+    # Same rule as the HTML pages' manager_only()
+    if session.get('role') != 'manager':
+        return _json({"error": "Managers only."}, 403)
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _json(payload, status=200):
+    body = json.dumps(payload, default=_plain, separators=(",", ":"))
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _page_args():
+    after_id = request.args.get('after', type=int)
+    limit = request.args.get('limit', API_PAGE_SIZE, type=int)
+    return after_id, max(1, min(limit, API_PAGE_MAX))
+
+
+def _conditional(tables, build):
+    """Serve build() with an ETag, or 304 if the client's copy is current."""
+    versions = table_versions(*tables)
+    if len(versions) != len(tables):
+        # No version rows (schema not upgraded): always send the body
+        return _json(build())
+
+    key = request.full_path + "|" + ",".join(f"{t}:{versions[t]}" for t in sorted(tables))
+    etag = hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = _json(build())
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+def _page(rows, next_cursor):
+    return {"data": rows, "next": next_cursor}
+
+
+@api.route('/products')
+def products():
+    denied = _manager_only()
+    if denied:
+        return denied
+
+    after_id, limit = _page_args()
+    supplier_id = request.args.get('supplier_id', type=int)
+    name_prefix = request.args.get('q', '').strip()
+    low_stock = request.args.get('low_stock') == '1'
+
+    return _conditional(
+        ('products',),
+        lambda: _page(*list_products_page(after_id, limit, supplier_id,
+                                          name_prefix, low_stock))
+    )
+
+
+@api.route('/suppliers')
+def suppliers():
+    denied = _manager_only()
+    if denied:
+        return denied
+
+    after_id, limit = _page_args()
+    return _conditional(
+        ('suppliers',),
+        lambda: _page(*list_suppliers_page(after_id, limit))
+    )
+
+
+@api.route('/sales')
+def sales():
+    after_id, limit = _page_args()
+    try:
+        start, end = parse_sales_filters(request.args.get('start'), request.args.get('end'))
+    except ValueError as e:
+        return _json({"error": str(e)}, 400)
+    cashier = request.args.get('cashier', '').strip()
+
+    return _conditional(
+        ('sales',),
+        lambda: _page(*list_sales_page(after_id, limit, start, end, cashier))
+    )
+
+
+@api.route('/sales/<int:sale_id>')
+def sale(sale_id):
+    def build():
+        header, items = sale_info(sale_id)
+        return {"sale": header, "items": items}
+
+    # Line items show product names/SKUs, so product edits change the ETag too
+    return _conditional(('sales', 'products'), build)
+
+
+@api.route('/stock')
+def stock():
+    """Stock levels as of ?at= (stock ledger); not cached, the ledger has no version."""
+    try:
+        at = parse_point_in_time(request.args.get('at'))
+    except ValueError as e:
+        return _json({"error": str(e)}, 400)
+
+    after_id, limit = _page_args()
+    product_id = request.args.get('product_id', type=int)
+    rows, next_cursor = stock_at(at, after_id, limit, product_id)
+    return _json(dict(_page(rows, next_cursor), at=at))
+
+
+# ----------------------------------------------------
+# Background jobs (see jobs.py)
+#   POST {"type": "export-sales", "params": {...}} -> 202 + job
+#   Poll GET /jobs/<id> until status is succeeded / failed / cancelled.
+# ----------------------------------------------------
+@api.route('/jobs', methods=['GET', 'POST'])
+def jobs():
+    denied = _manager_only()
+    if denied:
+        return denied
+
+    if request.method == 'GET':
+        return _json({"data": recent_jobs(), "types": available_job_types()})
+
+    body = request.get_json(silent=True) or {}
+    try:
+        job_id = submit_job(body.get('type'), body.get('params'), session.get('user_id'))
+    except ValueError as e:
+        return _json({"error": str(e)}, 400)
+
+    resp = _json(job_status(job_id), 202)
+    resp.headers['Location'] = f"{api.url_prefix}/jobs/{job_id}"
+    return resp
+
+
+@api.route('/jobs/<int:job_id>')
+def job(job_id):
+    denied = _manager_only()
+    if denied:
+        return denied
+
+    found = job_status(job_id)
+    if found is None:
+        return _json({"error": "Job not found."}, 404)
+    return _json(found)
+
+
+@api.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def job_cancel(job_id):
+    denied = _manager_only()
+    if denied:
+        return denied
+
+    if not cancel_job(job_id):
+        return _json({"error": "Job not found or already finished."}, 409)
+    return _json(job_status(job_id))
+
+
+@api.route('/jobs/<int:job_id>/result')
+def job_result(job_id):
+    denied = _manager_only()
+    if denied:
+        return denied
+
+    found = job_status(job_id)
+    if found is None:
+        return _json({"error": "Job not found."}, 404)
+    if found["status"] != "succeeded":
+        return _json({"error": f"Job is {found['status']}."}, 409)
+
+    path = found["result_path"]
+    if not path:
+        return _json(found["result"])
+    if not os.path.exists(path):
+        return _json({"error": "Result file is gone."}, 410)
+
+    return send_file(os.path.abspath(path), as_attachment=True,
+                     download_name=os.path.basename(path).split("_", 1)[1])
@@ -1,9 +1,34 @@
-from flask import Flask, render_template, request, redirect, session
-from db import get_db_connection,initialize_database
-from config import SECRET_KEY
+import io
+import logging
+import time
+from functools import wraps
+
+import click
+from flask import (
+    Flask, Response, g, render_template, request, redirect, session, url_for,
+    stream_with_context,
+)
+from db import (
+    get_db_connection, pool_stats,
+    start_request_stats, end_request_stats,
+    start_request_routing, pin_reads_to_primary, committed_this_request,
+)
+from api import api
+import migrations
+import metrics
+from cache import cache_stats
+from config import (
+    SECRET_KEY, PRODUCTS_PAGE_SIZE, SEARCH_RESULT_LIMIT, SEARCH_RESULT_MAX,
+    DB_READ_YOUR_WRITES, SALES_PAGE_SIZE,
+)
 
 from services.product_service import (
     list_products,
+    find_products,
+    product_by_sku,
+    validate_product_fields,
+    validate_reorder_fields,
+    list_products_page,
     product_details,
     create_product,
     edit_product,
@@ -17,13 +42,107 @@ from services.supplier_service import (
     remove_supplier,
 )
 from services.sales_service import (
-    list_sales,
+    list_sales_page,
+    parse_sales_filters,
+    check_sale_totals,
     sale_info,
+    sale_items,
+    start_sale,
+    add_item,
+    increase_item_qty,
+    decrease_item_qty,
+    remove_item_line,
+    checkout,
+    CheckoutError,
+    OutOfStock,
 )
+from services.export_service import (
+    EXPORT_FORMATS,
+    export_sales,
+    export_filename,
+    parse_date_range,
+)
+from services.reorder_service import open_alerts, suggested_orders, run_reorder_job
+from services.forecast_service import run_forecast, supplier_suggestions
+from services.archive_service import archive_sales, prepare_partitions
+from services.ledger_service import snapshot_stock
+from services.import_service import import_products_csv, import_suppliers_csv
+from services.report_service import (
+    sales_summary,
+    dashboard_totals,
+    top_products as top_selling_products,
+    rebuild_sales_rollups,
+    reconcile_sales_totals,
+)
+from repositories.maintenance_repo import explain_index_usage
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
 
+app.register_blueprint(api)
+
+log = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------
+# Read routing (see db.py)
+#   Read-only repository calls go to a replica unless the session
+#   committed within the last DB_READ_YOUR_WRITES seconds, so users
+#   always see their own changes. Screens that read to decide what to
+#   write next (the sale screen) use @reads_from_primary.
+# ----------------------------------------------------
+@app.before_request
+def start_read_routing():
+    start_request_routing(primary=session.get('primary_until', 0) > time.time())
+
+
+@app.after_request
+def pin_session_after_write(response):
+    if committed_this_request():
+        session['primary_until'] = time.time() + DB_READ_YOUR_WRITES
+    return response
+
+
+def reads_from_primary(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        pin_reads_to_primary()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# ----------------------------------------------------
+# Per-request SQL instrumentation
+#   query count, DB time and the slowest statement are collected by
+#   db.py's cursor wrapper and fed to /metrics after each request.
+# ----------------------------------------------------
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    start_request_stats()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    stats = end_request_stats()
+    if started is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe_request(route, request.method, response.status_code, elapsed, stats)
+
+    if stats is not None and stats['queries']:
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats["db_seconds"] * 1000:.1f};desc="{stats["queries"]} queries"'
+        )
+        log.debug("%s %s: %d queries, %d connections, %.1f ms in DB, slowest %.1f ms: %s",
+                  request.method, route, stats['queries'], stats['connections'],
+                  stats['db_seconds'] * 1000, stats['slowest_seconds'] * 1000,
+                  " ".join(str(stats['slowest_sql'] or '').split()))
+    return response
+
 
 # -----------------------------------
 # Login Page
@@ -77,63 +196,29 @@ def dashboard():
 
     role = session['role']
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # 1. LOW STOCK (manager only)
+    # 1. LOW STOCK (manager only, open alerts + suggested orders)
     low_stock = []
+    orders = []
+    forecast_orders = []
     if role == 'manager':
-        cursor.execute("""
-            SELECT product_name, sku, quantity
-            FROM products
-            WHERE quantity < 10
-            ORDER BY quantity ASC
-        """)
-        low_stock = cursor.fetchall()
-
-    # 2. TODAY'S SALES SUMMARY
-    cursor.execute("""
-        SELECT 
-            COUNT(*) AS total_sales,
-            SUM(total_amount) AS total_amount
-        FROM sales
-        WHERE DATE(sale_date) = CURDATE()
-    """)
-    today_sales = cursor.fetchone()
-
-    # 3. MONTHLY SALES SUMMARY
-    cursor.execute("""
-        SELECT 
-            COUNT(*) AS monthly_sales,
-            SUM(total_amount) AS monthly_amount
-        FROM sales
-        WHERE MONTH(sale_date) = MONTH(CURDATE())
-          AND YEAR(sale_date) = YEAR(CURDATE())
-    """)
-    month_sales = cursor.fetchone()
-
-    # 4. TOP SELLING PRODUCTS (manager only)
+        low_stock = open_alerts()
+        orders = suggested_orders()
+        forecast_orders = supplier_suggestions()
+
+    # 2 + 3. TODAY'S / MONTHLY SALES SUMMARY (daily rollup)
+    today_sales, month_sales = dashboard_totals()
+
+    # 4. TOP SELLING PRODUCTS (manager only, daily rollup)
     top_products = []
     if role == 'manager':
-        cursor.execute("""
-            SELECT 
-                p.product_name,
-                SUM(si.quantity_sold) AS total_sold
-            FROM sale_items si
-            JOIN products p ON si.product_id = p.product_id
-            GROUP BY si.product_id
-            ORDER BY total_sold DESC
-            LIMIT 5
-        """)
-        top_products = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+        top_products = top_selling_products(5)
 
     return render_template(
         'dashboard.html',
         role=role,
         low_stock=low_stock,
+        orders=orders,
+        forecast_orders=forecast_orders,
         today_sales=today_sales,
         month_sales=month_sales,
         top_products=top_products
@@ -148,8 +233,77 @@ def products():
     if not manager_only():
         return redirect('/dashboard')
 
-    products = list_products()
-    return render_template('products.html', products=products)
+    return _products_page()
+
+
+def _products_page(error=None):
+    """The product list for the current query string, with an optional error."""
+    after_id = request.args.get('after', type=int)
+    supplier_id = request.args.get('supplier_id', type=int)
+    name_prefix = request.args.get('q', '').strip()
+    low_stock = request.args.get('low_stock') == '1'
+
+    products, next_cursor = list_products_page(
+        after_id=after_id,
+        limit=PRODUCTS_PAGE_SIZE,
+        supplier_id=supplier_id,
+        name_prefix=name_prefix,
+        low_stock=low_stock,
+    )
+
+    # Keep the active filters on the paging links
+    filters = {}
+    if supplier_id is not None:
+        filters['supplier_id'] = supplier_id
+    if name_prefix:
+        filters['q'] = name_prefix
+    if low_stock:
+        filters['low_stock'] = '1'
+
+    next_url = None
+    if next_cursor is not None:
+        next_url = url_for('products', after=next_cursor, **filters)
+    first_url = url_for('products', **filters) if after_id is not None else None
+
+    return render_template(
+        'products.html',
+        products=products,
+        suppliers=list_suppliers(),
+        supplier_id=supplier_id,
+        q=name_prefix,
+        low_stock=low_stock,
+        next_url=next_url,
+        first_url=first_url,
+        error=error
+    )
+
+
+# Typeahead for the sale screen (cashiers + managers)
+#   GET /products/search?q=MILK&limit=10
+@app.route('/products/search')
+def search_products_route():
+    if 'user_id' not in session:
+        return {"error": "Login required."}, 401
+
+    term = request.args.get('q', '').strip()
+    limit = request.args.get('limit', SEARCH_RESULT_LIMIT, type=int)
+    limit = max(1, min(limit, SEARCH_RESULT_MAX))
+
+    if not term:
+        return {"results": []}
+
+    results = [
+        {
+            "product_id": p['product_id'],
+            "product_name": p['product_name'],
+            "sku": p['sku'],
+            "price": str(p['price']),
+            "quantity": p['quantity'],
+            "exact": p['match_rank'] == 0,
+        }
+        for p in find_products(term, limit)
+    ]
+    return {"results": results}
 
 
 @app.route('/products/add', methods=['GET', 'POST'])
@@ -160,30 +314,27 @@ def add_product():
     suppliers = list_suppliers()
 
     if request.method == 'POST':
-        name = request.form['product_name'].strip()
-        sku = request.form['sku'].strip()
-        price = request.form['price']
-        qty = request.form['quantity']
         supplier_id = request.form['supplier_id']
 
         # SERVER SIDE VALIDATION
-        if not name or not sku or not price or not qty:
-            return render_template('add_product.html', suppliers=suppliers,
-                                error="All fields are required.")
-
         try:
-            price = float(price)
-            qty = int(qty)
-        except ValueError:
-            return render_template('add_product.html', suppliers=suppliers,
-                                error="Invalid price or quantity.")
-
-        if price <= 0 or qty < 0:
+            name, sku, price, qty = validate_product_fields(
+                request.form['product_name'],
+                request.form['sku'],
+                request.form['price'],
+                request.form['quantity'],
+            )
+            reorder_point, reorder_qty = validate_reorder_fields(
+                request.form.get('reorder_point'),
+                request.form.get('reorder_qty'),
+            )
+        except ValueError as e:
             return render_template('add_product.html', suppliers=suppliers,
-                                error="Price must be > 0 and Quantity ≥ 0.")
+                                error=str(e))
 
         try:
-            create_product(name, sku, price, qty, supplier_id)
+            create_product(name, sku, price, qty, supplier_id,
+                           reorder_point, reorder_qty)
         except Exception as e:
             return render_template('add_product.html', suppliers=suppliers,
                                 error="Database error: " + str(e))
@@ -194,6 +345,39 @@ def add_product():
     return render_template('add_product.html', suppliers=suppliers)
 
 
+# ----------------------------------------------------
+# BULK CSV IMPORT (products or suppliers)
+# ----------------------------------------------------
+IMPORTERS = {
+    'products': import_products_csv,
+    'suppliers': import_suppliers_csv,
+}
+
+
+@app.route('/import', methods=['GET', 'POST'])
+def import_csv():
+    if not manager_only():
+        return redirect('/dashboard')
+
+    if request.method == 'POST':
+        kind = request.form.get('kind')
+        upload = request.files.get('file')
+
+        if kind not in IMPORTERS or not upload or not upload.filename:
+            return render_template('import.html', error="Choose a type and a CSV file.")
+
+        # Stream the upload straight through the CSV reader
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        try:
+            result = IMPORTERS[kind](stream)
+        except ValueError as e:
+            return render_template('import.html', error=str(e))
+
+        return render_template('import.html', kind=kind, result=result.as_dict())
+
+    return render_template('import.html')
+
+
 @app.route('/products/edit/<int:product_id>', methods=['GET', 'POST'])
 def edit_product_route(product_id):
     if not manager_only():
@@ -203,13 +387,25 @@ def edit_product_route(product_id):
     suppliers = list_suppliers()
 
     if request.method == 'POST':
-        name = request.form['product_name']
-        sku = request.form['sku']
-        price = request.form['price']
-        qty = request.form['quantity']
         supplier_id = request.form['supplier_id']
 
-        edit_product(product_id, name, sku, price, qty, supplier_id)
+        try:
+            name, sku, price, qty = validate_product_fields(
+                request.form['product_name'],
+                request.form['sku'],
+                request.form['price'],
+                request.form['quantity'],
+            )
+            reorder_point, reorder_qty = validate_reorder_fields(
+                request.form.get('reorder_point'),
+                request.form.get('reorder_qty'),
+            )
+        except ValueError as e:
+            return render_template('edit_product.html', product=product,
+                                   suppliers=suppliers, error=str(e))
+
+        edit_product(product_id, name, sku, price, qty, supplier_id,
+                     reorder_point, reorder_qty)
         return redirect('/products')
 
     return render_template('edit_product.html', product=product, suppliers=suppliers)
@@ -220,7 +416,8 @@ def delete_product(product_id):
     if not manager_only():
         return redirect('/dashboard')
 
-    remove_product(product_id)
+    if not remove_product(product_id):
+        return _products_page(error="Product has sales and can't be deleted.")
     return redirect('/products')
 
 
@@ -291,34 +488,57 @@ def sales():
     if 'user_id' not in session:
         return redirect('/login')
 
-    sales_rows = list_sales()
-    return render_template('sales.html', sales=sales_rows)
+    after_id = request.args.get('after', type=int)
+    start = request.args.get('start', '').strip()
+    end = request.args.get('end', '').strip()
+    cashier = request.args.get('cashier', '').strip()
+
+    error = None
+    try:
+        start_dt, end_dt = parse_sales_filters(start, end)
+    except ValueError as e:
+        error = str(e)
+        start = end = ''
+        start_dt = end_dt = None
+
+    sales_rows, next_cursor = list_sales_page(
+        after_id=after_id,
+        limit=SALES_PAGE_SIZE,
+        start=start_dt,
+        end=end_dt,
+        cashier=cashier,
+    )
+
+    # Keep the active filters on the paging links
+    filters = {k: v for k, v in (('start', start), ('end', end), ('cashier', cashier)) if v}
+
+    next_url = None
+    if next_cursor is not None:
+        next_url = url_for('sales', after=next_cursor, **filters)
+    first_url = url_for('sales', **filters) if after_id is not None else None
+
+    return render_template(
+        'sales.html',
+        sales=sales_rows,
+        start=start,
+        end=end,
+        cashier=cashier,
+        error=error,
+        next_url=next_url,
+        first_url=first_url
+    )
 
 
 # ----------------------------------------------------
 # NEW SALE (creates base sale row)
 # ----------------------------------------------------
 @app.route('/sales/new')
+@reads_from_primary
 def new_sale():
     if 'user_id' not in session:
         return redirect('/login')
 
-    user_id = session['user_id']
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO sales (user_id, total_amount)
-        VALUES (%s, 0)
-    """, (user_id,))
-
-    conn.commit()
-    sale_id = cursor.lastrowid
-
-    cursor.close()
-    conn.close()
-
+    sale_id = start_sale(session['user_id'])
     return redirect(f'/sales/add-item/{sale_id}')
 
 
@@ -326,116 +546,93 @@ def new_sale():
 # ADD ITEM TO A SALE (with list + add)
 # ----------------------------------------------------
 @app.route('/sales/add-item/<int:sale_id>', methods=['GET', 'POST'])
+@reads_from_primary
 def add_sale_item(sale_id):
     if 'user_id' not in session:
         return redirect('/login')
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Load product list
-    cursor.execute("SELECT * FROM products ORDER BY product_name")
-    products = cursor.fetchall()
-
-    # Load existing items in this sale
-    cursor.execute("""
-        SELECT 
-            si.product_id,
-            si.quantity_sold,
-            si.item_price,
-            p.product_name,
-            p.sku
-        FROM sale_items si
-        JOIN products p ON si.product_id = p.product_id
-        WHERE si.sale_id = %s
-    """, (sale_id,))
-    added_items = cursor.fetchall()
-
-    # Add new item
+    error = None
+
+    # Add new item (product picked from search, or a scanned SKU)
     if request.method == 'POST':
-        product_id = int(request.form['product_id'])
-        qty = int(request.form['quantity'])
+        product_id = request.form.get('product_id', type=int)
+        sku = request.form.get('sku', '').strip()
+        qty = request.form.get('quantity', type=int) or 0
+
+        if product_id is None and sku:
+            product = product_by_sku(sku)
+            if product:
+                product_id = product['product_id']
+
+        if product_id is None:
+            error = "Select a product or scan a valid SKU."
+        elif qty <= 0:
+            error = "Quantity must be at least 1."
+        else:
+            try:
+                if add_item(sale_id, product_id, qty):
+                    return redirect(f"/sales/add-item/{sale_id}")
+                error = "Sale or product not found."
+            except OutOfStock as e:
+                error = str(e)
 
-        # Get product details
-        cursor.execute("SELECT * FROM products WHERE product_id = %s", (product_id,))
-        product = cursor.fetchone()
+    return render_template(
+        'add_sale_item.html',
+        sale_id=sale_id,
+        added_items=sale_items(sale_id),
+        error=error
+    )
 
-        if qty <= 0:
-            return render_template(
-                'add_sale_item.html',
-                sale_id=sale_id,
-                products=products,
-                added_items=added_items,
-                error="Quantity must be at least 1."
-            )
 
-        if product['quantity'] < qty:
-            cursor.close()
-            conn.close()
-            return render_template(
-                'add_sale_item.html',
-                sale_id=sale_id,
-                products=products,
-                added_items=added_items,
-                error=f"Not enough stock. Available: {product['quantity']}"
-            )
+# ----------------------------------------------------
+# CHECKOUT A WHOLE CART IN ONE TRANSACTION (JSON)
+#   POST {"items": [{"product_id": 1, "qty": 2}, {"sku": "MILK1L", "qty": 1}]}
+# ----------------------------------------------------
+@app.route('/sales/checkout', methods=['POST'])
+@reads_from_primary
+def checkout_cart():
+    if 'user_id' not in session:
+        return {"error": "Login required."}, 401
 
-        item_price = product['price']
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('items')
+    if not isinstance(items, list) or not items:
+        return {"error": "items must be a non-empty list."}, 400
 
-        # Check if already exists in this sale
-        cursor.execute("""
-            SELECT quantity_sold FROM sale_items
-            WHERE sale_id=%s AND product_id=%s
-        """, (sale_id, product_id))
-        existing = cursor.fetchone()
-
-        cursor2 = conn.cursor()
-
-        if existing:
-            cursor2.execute("""
-                UPDATE sale_items
-                SET quantity_sold = quantity_sold + %s
-                WHERE sale_id=%s AND product_id=%s
-            """, (qty, sale_id, product_id))
+    lines = []
+    for n, item in enumerate(items, start=1):
+        if not isinstance(item, dict):
+            return {"error": f"Line {n}: expected an object."}, 400
+        try:
+            qty = int(item.get('qty', 0))
+        except (TypeError, ValueError):
+            return {"error": f"Line {n}: invalid qty."}, 400
+        if qty <= 0:
+            return {"error": f"Line {n}: qty must be at least 1."}, 400
+
+        if item.get('product_id') is not None:
+            try:
+                lines.append({"product_id": int(item['product_id']), "qty": qty})
+            except (TypeError, ValueError):
+                return {"error": f"Line {n}: invalid product_id."}, 400
+        elif item.get('sku'):
+            lines.append({"sku": str(item['sku']).strip(), "qty": qty})
         else:
-            cursor2.execute("""
-                INSERT INTO sale_items (sale_id, product_id, quantity_sold, item_price)
-                VALUES (%s, %s, %s, %s)
-            """, (sale_id, product_id, qty, item_price))
-
-        # Update stock
-        cursor2.execute("""
-            UPDATE products
-            SET quantity = quantity - %s
-            WHERE product_id = %s
-        """, (qty, product_id))
-
-        # Update sale total
-        cursor2.execute("""
-            UPDATE sales
-            SET total_amount = total_amount + (%s * %s)
-            WHERE sale_id = %s
-        """, (item_price, qty, sale_id))
-
-        conn.commit()
-        cursor2.close()
-
-        return redirect(f"/sales/add-item/{sale_id}")
-
-    cursor.close()
-    conn.close()
-    return render_template(
-        'add_sale_item.html',
-        sale_id=sale_id,
-        products=products,
-        added_items=added_items
-    )
+            return {"error": f"Line {n}: product_id or sku required."}, 400
+
+    try:
+        sale_id, total = checkout(session['user_id'], lines)
+    except CheckoutError as e:
+        return {"error": "Checkout rejected.", "problems": e.problems}, 409
+
+    return {"sale_id": sale_id, "total_amount": str(total)}, 201
 
 
 # ----------------------------------------------------
 # VIEW SALE DETAILS (uses Sales Service with sales_report view)
 # ----------------------------------------------------
 @app.route('/sales/view/<int:sale_id>')
+@reads_from_primary
 def view_sale(sale_id):
     if 'user_id' not in session:
         return redirect('/login')
@@ -448,208 +645,39 @@ def view_sale(sale_id):
 # INCREASE / DECREASE / REMOVE SALE ITEM
 # ----------------------------------------------------
 @app.route('/sales/item/increase/<int:sale_id>/<int:product_id>')
+@reads_from_primary
 def increase_item(sale_id, product_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("SELECT quantity, price FROM products WHERE product_id=%s", (product_id,))
-    product = cursor.fetchone()
-
-    if not product or product['quantity'] <= 0:
-        cursor.close()
-        conn.close()
-        return redirect(f"/sales/add-item/{sale_id}")
-
-    price = product['price']
-    cursor2 = conn.cursor()
-
-    # Increase quantity_sold
-    cursor2.execute("""
-        UPDATE sale_items
-        SET quantity_sold = quantity_sold + 1
-        WHERE sale_id=%s AND product_id=%s
-    """, (sale_id, product_id))
-
-    # Decrease stock
-    cursor2.execute("""
-        UPDATE products
-        SET quantity = quantity - 1
-        WHERE product_id=%s
-    """, (product_id,))
-
-    # Increase sale total
-    cursor2.execute("""
-        UPDATE sales
-        SET total_amount = total_amount + %s
-        WHERE sale_id=%s
-    """, (price, sale_id))
-
-    conn.commit()
-    cursor2.close()
-    cursor.close()
-    conn.close()
-
+    try:
+        increase_item_qty(sale_id, product_id)
+    except OutOfStock:
+        pass
     return redirect(f"/sales/add-item/{sale_id}")
 
 
 @app.route('/sales/item/decrease/<int:sale_id>/<int:product_id>')
+@reads_from_primary
 def decrease_item(sale_id, product_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT quantity_sold, item_price
-        FROM sale_items
-        WHERE sale_id=%s AND product_id=%s
-    """, (sale_id, product_id))
-    item = cursor.fetchone()
-
-    if not item:
-        cursor.close()
-        conn.close()
-        return redirect(f"/sales/add-item/{sale_id}")
-
-    qty = item['quantity_sold']
-    price = item['item_price']
-
-    # If would go to zero, remove instead
-    if qty == 1:
-        cursor.close()
-        conn.close()
-        return redirect(f"/sales/item/remove/{sale_id}/{product_id}")
-
-    cursor2 = conn.cursor()
-
-    # Decrease quantity
-    cursor2.execute("""
-        UPDATE sale_items
-        SET quantity_sold = quantity_sold - 1
-        WHERE sale_id=%s AND product_id=%s
-    """, (sale_id, product_id))
-
-    # Restore stock
-    cursor2.execute("""
-        UPDATE products
-        SET quantity = quantity + 1
-        WHERE product_id=%s
-    """, (product_id,))
-
-    # Reduce sale total
-    cursor2.execute("""
-        UPDATE sales
-        SET total_amount = total_amount - %s
-        WHERE sale_id=%s
-    """, (price, sale_id))
-
-    conn.commit()
-    cursor2.close()
-    cursor.close()
-    conn.close()
-
+    decrease_item_qty(sale_id, product_id)
     return redirect(f"/sales/add-item/{sale_id}")
 
 
 @app.route('/sales/item/remove/<int:sale_id>/<int:product_id>')
+@reads_from_primary
 def remove_item(sale_id, product_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-        SELECT quantity_sold, item_price
-        FROM sale_items
-        WHERE sale_id=%s AND product_id=%s
-    """, (sale_id, product_id))
-    item = cursor.fetchone()
-
-    if item:
-        qty = item['quantity_sold']
-        price = item['item_price']
-        cursor2 = conn.cursor()
-
-        # Delete the row
-        cursor2.execute("""
-            DELETE FROM sale_items
-            WHERE sale_id=%s AND product_id=%s
-        """, (sale_id, product_id))
-
-        # Restore stock
-        cursor2.execute("""
-            UPDATE products
-            SET quantity = quantity + %s
-            WHERE product_id=%s
-        """, (qty, product_id))
-
-        # Reduce sale total
-        cursor2.execute("""
-            UPDATE sales
-            SET total_amount = total_amount - (%s * %s)
-            WHERE sale_id=%s
-        """, (price, qty, sale_id))
-
-        conn.commit()
-        cursor2.close()
-
-    cursor.close()
-    conn.close()
+    remove_item_line(sale_id, product_id)
     return redirect(f"/sales/add-item/{sale_id}")
 
 
 # ----------------------------------------------------
-# SALES REPORTS PAGE (uses sales_report view directly)
+# SALES REPORTS PAGE (reads the daily sales rollups)
 # ----------------------------------------------------
 @app.route('/sales/reports')
 def sales_reports():
     if 'user_id' not in session:
         return redirect('/login')
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Total revenue + items
-    cursor.execute("""
-        SELECT 
-            SUM(line_total) AS total_revenue,
-            SUM(quantity_sold) AS total_items
-        FROM sales_report
-    """)
-    summary = cursor.fetchone()
-
-    # Top products
-    cursor.execute("""
-        SELECT 
-            product_name,
-            SUM(quantity_sold) AS total_qty,
-            SUM(line_total) AS total_amount
-        FROM sales_report
-        GROUP BY product_name
-        ORDER BY total_qty DESC
-        LIMIT 10
-    """)
-    top_products = cursor.fetchall()
-
-    # Today
-    cursor.execute("""
-        SELECT 
-            SUM(line_total) AS revenue_today,
-            SUM(quantity_sold) AS qty_today
-        FROM sales_report
-        WHERE DATE(sale_date) = CURDATE()
-    """)
-    today = cursor.fetchone()
-
-    # This month
-    cursor.execute("""
-        SELECT 
-            SUM(line_total) AS revenue_month,
-            SUM(quantity_sold) AS qty_month
-        FROM sales_report
-        WHERE MONTH(sale_date) = MONTH(CURDATE())
-          AND YEAR(sale_date) = YEAR(CURDATE())
-    """)
-    month = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
+    summary, today, month = sales_summary()
+    top_products = top_selling_products(10)
 
     return render_template(
         'sales_reports.html',
@@ -660,6 +688,271 @@ def sales_reports():
     )
 
 
+# ----------------------------------------------------
+# SALES EXPORT (streamed, line level)
+#   /sales/export?start=2024-01-01&end=2024-03-31&cashier=&format=csv&gzip=1
+# ----------------------------------------------------
+@app.route('/sales/export')
+def sales_export():
+    if not manager_only():
+        return redirect('/dashboard')
+
+    fmt = request.args.get('format', 'csv')
+    compress = request.args.get('gzip') == '1'
+    cashier = request.args.get('cashier', '').strip() or None
+
+    if fmt not in EXPORT_FORMATS:
+        return {"error": "format must be csv or jsonl."}, 400
+    try:
+        start, end = parse_date_range(request.args.get('start'), request.args.get('end'))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    body = export_sales(start, end, cashier, fmt, compress)
+    filename = export_filename(start, end, fmt, compress)
+
+    return Response(
+        stream_with_context(body),
+        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
+# -----------------------------------
+# CLI: rebuild rollups from history
+#   flask --app app rebuild-rollups
+# -----------------------------------
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    product_rows, cashier_rows, total_rows = rebuild_sales_rollups()
+    print(f"Rebuilt sales_daily_product ({product_rows} rows), "
+          f"sales_daily_cashier ({cashier_rows} rows) "
+          f"and product_sales_totals ({total_rows} rows).")
+
+
+# -----------------------------------
+# CLI: verify product_sales_totals against sale_items
+#   flask --app app reconcile-sales-totals [--repair]
+# -----------------------------------
+@app.cli.command('reconcile-sales-totals')
+@click.option('--repair', is_flag=True, help="Recompute mismatched products.")
+def reconcile_sales_totals_command(repair):
+    mismatches = reconcile_sales_totals(repair)
+    for m in mismatches:
+        print(f"  product {m['product_id']}: units {m['actual_units']} "
+              f"(expected {m['expected_units']}), revenue {m['actual_revenue']} "
+              f"(expected {m['expected_revenue']})")
+
+    if not mismatches:
+        print("product_sales_totals matches sale_items.")
+    elif repair:
+        print(f"Repaired {len(mismatches)} products.")
+    else:
+        print(f"{len(mismatches)} products out of step; rerun with --repair.")
+        raise SystemExit(1)
+
+
+# -----------------------------------
+# CLI: schema migrations (migrations/versions/)
+#   flask --app app migrate [--dry-run] [--allow-offline]
+#   flask --app app migrate-status
+# -----------------------------------
+@app.cli.command('migrate')
+@click.option('--dry-run', is_flag=True)
+@click.option('--allow-offline', is_flag=True)
+def migrate_command(dry_run, allow_offline):
+    applied, blocked = migrations.migrate(dry_run=dry_run, allow_offline=allow_offline)
+    verb = "Would apply" if dry_run else "Applied"
+    if applied:
+        print(f"{verb} migrations {', '.join(f'{v:04d}' for v in applied)}.")
+    if blocked:
+        print(f"Stopped at {blocked.version:04d} {blocked.name}: it blocks writes; "
+              f"rerun with --allow-offline in a maintenance window.")
+        raise SystemExit(1)
+    if not applied:
+        print("Schema is up to date.")
+
+
+@app.cli.command('migrate-status')
+def migrate_status_command():
+    for m, applied_at, duration_ms in migrations.status():
+        state = f"applied {applied_at} ({duration_ms} ms)" if applied_at else "pending"
+        print(f"  {m.version:04d} {m.name:<24} {state}  {m.summary}")
+
+
+# -----------------------------------
+# CLI: verify sales.total_amount against the sale lines
+#   flask --app app check-sale-totals [--repair]
+# -----------------------------------
+@app.cli.command('check-sale-totals')
+@click.option('--repair', is_flag=True, help="Recompute drifted totals from the lines.")
+def check_sale_totals_command(repair):
+    drift = check_sale_totals(repair)
+    for d in drift:
+        print(f"  sale {d['sale_id']}: total_amount {d['total_amount']} "
+              f"(lines sum to {d['line_total']})")
+
+    if not drift:
+        print("Every sale total matches its lines.")
+    elif repair:
+        print(f"Repaired {len(drift)} sales.")
+    else:
+        print(f"{len(drift)} sales out of step; rerun with --repair.")
+        raise SystemExit(1)
+
+
+# -----------------------------------
+# CLI: low-stock alerts -> suggested purchase orders (run from cron)
+#   flask --app app suggest-orders
+# -----------------------------------
+@app.cli.command('suggest-orders')
+def suggest_orders_command():
+    cleared, raised, orders = run_reorder_job()
+    print(f"{cleared} alerts cleared (restocked), {raised} raised by sweep.")
+    for o in orders:
+        print(f"  PO {o['po_id']}: supplier {o['supplier_id']}, "
+              f"{o['lines']} lines, {o['units']} units")
+    if not orders:
+        print("No new purchase orders suggested.")
+
+
+# -----------------------------------
+# CLI: demand forecast -> suggested order quantities (nightly)
+#   flask --app app forecast-demand
+# -----------------------------------
+@app.cli.command('forecast-demand')
+def forecast_demand_command():
+    products, suppliers, units = run_forecast()
+    print(f"Forecast {products} products; {units} units suggested "
+          f"across {suppliers} suppliers.")
+
+
+# -----------------------------------
+# CLI: monthly sales partitions / archive (monthly cron)
+#   flask --app app partition-sales
+#   flask --app app archive-sales --keep-months 24 [--dry-run]
+# -----------------------------------
+@app.cli.command('partition-sales')
+@click.option('--months-ahead', type=int, default=None)
+def partition_sales_command(months_ahead):
+    added = prepare_partitions() if months_ahead is None else prepare_partitions(months_ahead)
+    if added:
+        print(f"Added partitions {added[0]:%Y-%m} .. {added[-1]:%Y-%m} to sales and sale_items.")
+    else:
+        print("Partitions already in place.")
+
+
+@app.cli.command('archive-sales')
+@click.option('--keep-months', type=int, default=None)
+@click.option('--dir', 'directory', type=click.Path(file_okay=False), default=None)
+@click.option('--dry-run', is_flag=True)
+def archive_sales_command(keep_months, directory, dry_run):
+    options = {}
+    if keep_months is not None:
+        options['keep_months'] = keep_months
+    if directory is not None:
+        options['directory'] = directory
+
+    try:
+        results = archive_sales(dry_run=dry_run, **options)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    for r in results:
+        counts = f", {r['sales']} sales, {r['lines']} lines" if 'sales' in r else ""
+        print(f"  {r['period']} (< {r['end']:%Y-%m-%d}): {r['status']} -> {r['file']}{counts}")
+    if not results:
+        print("No closed periods to archive.")
+
+
+# -----------------------------------
+# CLI: stock ledger snapshots (nightly)
+#   flask --app app snapshot-stock
+# -----------------------------------
+@app.cli.command('snapshot-stock')
+def snapshot_stock_command():
+    print(f"{snapshot_stock()} stock snapshots written.")
+
+
+# -----------------------------------
+# CLI: sales export
+#   flask --app app export-sales 2024-01-01 2024-12-31 --gzip -o sales_2024.csv.gz
+# -----------------------------------
+@app.cli.command('export-sales')
+@click.argument('start')
+@click.argument('end')
+@click.option('--cashier', default=None)
+@click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv')
+@click.option('--gzip', 'compress', is_flag=True)
+@click.option('-o', '--output', type=click.Path(dir_okay=False), default='-')
+def export_sales_command(start, end, cashier, fmt, compress, output):
+    try:
+        start, end = parse_date_range(start, end)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    with click.open_file(output, 'wb') as out:
+        for part in export_sales(start, end, cashier, fmt, compress):
+            out.write(part)
+
+
+# -----------------------------------
+# CLI: bulk catalog import
+#   flask --app app import-csv products price_list.csv
+# -----------------------------------
+@app.cli.command('import-csv')
+@click.argument('kind', type=click.Choice(sorted(IMPORTERS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_csv_command(kind, path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        result = IMPORTERS[kind](f)
+
+    print(f"{result.rows} rows read, {result.imported} imported, "
+          f"{result.error_count} rejected.")
+    for line, message in result.errors:
+        print(f"  line {line}: {message}")
+
+
+# -----------------------------------
+# CLI: verify reporting queries use their indexes
+#   flask --app app check-indexes
+# -----------------------------------
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    results = explain_index_usage()
+    for r in results:
+        status = "OK  " if r['ok'] else "FAIL"
+        print(f"[{status}] {r['check']}: {r['table']} key={r['key']} "
+              f"(expected {r['expected']}), type={r['type']}, extra={r['extra']}")
+
+    if not all(r['ok'] for r in results):
+        raise SystemExit(1)
+
+
+# -----------------------------------
+# Connection pool counters (scraped by monitoring)
+# -----------------------------------
+@app.route('/health/pool')
+def health_pool():
+    return pool_stats()
+
+
+# -----------------------------------
+# Catalog cache hit/miss counters
+# -----------------------------------
+@app.route('/health/cache')
+def health_cache():
+    return cache_stats()
+
+
+# -----------------------------------
+# Prometheus scrape endpoint
+# -----------------------------------
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 # -----------------------------------
 # Logout
 # -----------------------------------
@@ -677,5 +970,5 @@ def internal_error(e):
     return render_template("500.html"), 500
 
 if __name__ == '__main__':
-    initialize_database()
+    migrations.migrate()
     app.run(debug=True)
\ No newline at end of file
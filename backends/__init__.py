@@ -0,0 +1,35 @@
+# ----------------------------------------------------
+# Storage backends
+#
+# Each backend module provides the same surface:
+#   Error, RowError, connect(), is_retryable(exc), prepared_cursor(conn), SCHEMA_FILE
+# what the migration runner needs (see migrations/):
+#   create_database(), is_unknown_database(exc), is_missing_table(exc),
+#   migration_lock(cursor, timeout), migration_unlock(cursor),
+#   table_exists / column_exists / index_exists(cursor, ...),
+#   add_index_sql(...), drop_index_sql(...), add_column_sql(...),
+#   execute_online(cursor, sql)
+# and the SQL dialect helpers the repositories use where MySQL and
+# SQLite differ:
+#   today_range(col), this_month_range(col), upsert(keys),
+#   excluded(col), target(table, col), for_update(),
+#   explain(cursor, sql, params, table)
+# and monthly sales periods (MySQL partitions; SQLite date ranges):
+#   PARTITIONED, month_partitions(cursor, table), add_month_partitions(cursor, table, months),
+#   closed_periods(cursor, cutoff), drop_period(cursor, table, name, start, end)
+#
+# Everything else in the repositories is written in the shared subset
+# (%s placeholders, dictionary=True cursors, standard SQL).
+# ----------------------------------------------------
+import importlib
+
+BACKENDS = {
+    "mysql": "backends.mysql_backend",
+    "sqlite": "backends.sqlite_backend",
+}
+
+
+def load_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DB_BACKEND {name!r}; expected one of {sorted(BACKENDS)}")
+    return importlib.import_module(BACKENDS[name])
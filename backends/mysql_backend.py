@@ -0,0 +1,223 @@
+from datetime import date
+
+import mysql.connector
+
+from config import DB_CONFIG
+
+Error = mysql.connector.Error
+# Rejected because of a row's values (duplicate key, value too long / out of range)
+RowError = (mysql.connector.IntegrityError, mysql.connector.DataError)
+
+# ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK: safe to retry the whole transaction
+RETRYABLE_ERRNOS = (1205, 1213)
+
+
+def connect(**overrides):
+    params = dict(
+        host=DB_CONFIG["host"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        database=DB_CONFIG["database"]
+    )
+    params.update(overrides)
+    return mysql.connector.connect(**params)
+
+
+def is_retryable(exc):
+    return getattr(exc, "errno", None) in RETRYABLE_ERRNOS
+
+
+def prepared_cursor(conn):
+    """A server-side prepared statement cursor (binary protocol)."""
+    return conn.cursor(prepared=True)
+
+
+SCHEMA_FILE = "schema.sql"
+
+ER_BAD_DB_ERROR = 1049
+ER_NO_SUCH_TABLE = 1146
+# ALGORITHM / LOCK clause not supported for this ALTER
+ER_ALTER_NOT_SUPPORTED = (1845, 1846)
+
+
+# ----------------------------------------------------
+# Schema migrations (see migrations/)
+# ----------------------------------------------------
+def create_database():
+    """CREATE DATABASE for DB_CONFIG; only called when connecting reported it missing."""
+    conn = mysql.connector.connect(
+        host=DB_CONFIG["host"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"]
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{DB_CONFIG['database']}`")
+    cursor.close()
+    conn.close()
+
+
+def is_unknown_database(exc):
+    return getattr(exc, "errno", None) == ER_BAD_DB_ERROR
+
+
+def is_missing_table(exc):
+    return getattr(exc, "errno", None) == ER_NO_SUCH_TABLE
+
+
+def migration_lock(cursor, timeout):
+    """Server-wide named lock so only one process migrates at a time."""
+    cursor.execute("SELECT GET_LOCK(CONCAT(DATABASE(), '.schema_migrations'), %s)", (timeout,))
+    return cursor.fetchone()[0] == 1
+
+
+def migration_unlock(cursor):
+    cursor.execute("SELECT RELEASE_LOCK(CONCAT(DATABASE(), '.schema_migrations'))")
+    cursor.fetchone()
+
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, name))
+    return cursor.fetchone()[0] > 0
+
+
+def add_index_sql(table, name, columns, unique=False):
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    return f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)})"
+
+
+def drop_index_sql(table, name):
+    return f"ALTER TABLE {table} DROP INDEX {name}"
+
+
+def add_column_sql(table, column, definition):
+    return f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+
+
+def execute_online(cursor, sql):
+    """Run an ALTER TABLE without blocking writes (INSTANT, else INPLACE
+    with LOCK=NONE). Returns False, without changing anything, if the
+    server can only do it by copying the table."""
+    for algorithm in ("ALGORITHM=INSTANT", "ALGORITHM=INPLACE, LOCK=NONE"):
+        try:
+            cursor.execute(f"{sql}, {algorithm}")
+            return True
+        except Error as e:
+            if e.errno not in ER_ALTER_NOT_SUPPORTED:
+                raise
+    return False
+
+
+# ----------------------------------------------------
+# Dialect helpers
+# ----------------------------------------------------
+TODAY_START = "CURDATE()"
+MONTH_START = "(CURDATE() - INTERVAL (DAYOFMONTH(CURDATE()) - 1) DAY)"
+
+
+def today_range(column):
+    return f"{column} >= {TODAY_START} AND {column} < {TODAY_START} + INTERVAL 1 DAY"
+
+
+def this_month_range(column):
+    return f"{column} >= {MONTH_START} AND {column} < {MONTH_START} + INTERVAL 1 MONTH"
+
+
+def upsert(keys):
+    """Clause introducing the update list of an insert-or-update."""
+    return "ON DUPLICATE KEY UPDATE"
+
+
+def excluded(column):
+    """The value the conflicting INSERT tried to write."""
+    return f"VALUES({column})"
+
+
+def target(table, column):
+    """A column of the row being updated, qualified so an INSERT ... SELECT can't make it ambiguous."""
+    return f"{table}.{column}"
+
+
+def for_update():
+    return "FOR UPDATE"
+
+
+def explain(cursor, sql, params, table):
+    """(index used, access type, extra) for `table` in the plan of sql."""
+    cursor.execute("EXPLAIN " + sql, params)
+    plan = cursor.fetchall()
+    row = next((r for r in plan if r["table"] == table), None) or {}
+    return row.get("key"), row.get("type"), row.get("Extra")
+
+
+# ----------------------------------------------------
+# Monthly partitions (sales, sale_items)
+#   pYYYYMM holds [first of month, first of next month); p_future
+#   (MAXVALUE) is the catch-all that new months are split from.
+# ----------------------------------------------------
+PARTITIONED = True
+
+
+def month_partitions(cursor, table):
+    """[(name, upper_bound)] of the bounded partitions of table, oldest first."""
+    cursor.execute("""
+        SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+          AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [
+        (r["name"], date.fromisoformat(r["bound"].strip("'")[:10]))
+        for r in cursor.fetchall()
+        if r["bound"] != "MAXVALUE"
+    ]
+
+
+def add_month_partitions(cursor, table, months):
+    """Split p_future into one partition per month start in months (ascending)."""
+    parts = [
+        f"PARTITION p{m:%Y%m} VALUES LESS THAN ('{_next_month(m):%Y-%m-%d}')"
+        for m in months
+    ]
+    parts.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    cursor.execute(
+        f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO ({', '.join(parts)})")
+
+
+def closed_periods(cursor, cutoff):
+    """[(name, start or None, end)] of sales partitions wholly before cutoff."""
+    periods = []
+    start = None
+    for name, bound in month_partitions(cursor, "sales"):
+        if bound > cutoff:
+            break
+        periods.append((name, start, bound))
+        start = bound
+    return periods
+
+
+def drop_period(cursor, table, name, start, end):
+    cursor.execute(f"ALTER TABLE {table} DROP PARTITION {name}")
+
+
+def _next_month(d):
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
@@ -0,0 +1,242 @@
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+from config import SQLITE_PATH, SQLITE_BUSY_TIMEOUT
+
+Error = sqlite3.Error
+RowError = (sqlite3.IntegrityError, sqlite3.DataError)
+
+SCHEMA_FILE = "schema_sqlite.sql"
+
+# Money comes back from the repositories as Decimal on MySQL; keep writes working here
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(sep=" ", timespec="seconds"))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+
+
+class SqliteCursor:
+    """Accepts the MySQL-style calls the repositories make (%s params,
+    dictionary=True rows) on top of a sqlite3 cursor."""
+
+    def __init__(self, raw, dictionary=False):
+        self._raw = raw
+        if dictionary:
+            raw.row_factory = _dict_row
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def execute(self, operation, params=None):
+        return self._raw.execute(operation.replace("%s", "?"), params or ())
+
+    def executemany(self, operation, seq_params):
+        return self._raw.executemany(operation.replace("%s", "?"), seq_params)
+
+
+def _dict_row(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+class SqliteConnection(sqlite3.Connection):
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        return SqliteCursor(super().cursor(), dictionary)
+
+    def is_connected(self):
+        return True
+
+
+def _sha2(value, bits):
+    if value is None or bits != 256:
+        return None
+    return hashlib.sha256(str(value).encode("utf-8")).hexdigest()
+
+
+def connect(**overrides):
+    path = overrides.get("path", SQLITE_PATH)
+    conn = sqlite3.connect(
+        path,
+        timeout=SQLITE_BUSY_TIMEOUT,
+        factory=SqliteConnection,
+        check_same_thread=False,    # pooled connections move between threads
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.create_function("SHA2", 2, _sha2, deterministic=True)
+    return conn
+
+
+def is_retryable(exc):
+    # Writer contention surfaces as SQLITE_BUSY once the busy timeout runs out
+    return isinstance(exc, sqlite3.OperationalError) and "locked" in str(exc)
+
+
+def prepared_cursor(conn):
+    # sqlite3 already keeps compiled statements per connection (cached_statements)
+    return conn.cursor()
+
+
+# ----------------------------------------------------
+# Schema migrations (see migrations/)
+#   The database file is created by connect(); SQLite DDL is
+#   transactional and takes the database write lock, so there is no
+#   separate migration lock and every ALTER counts as online.
+# ----------------------------------------------------
+def create_database():
+    directory = os.path.dirname(os.path.abspath(SQLITE_PATH))
+    os.makedirs(directory, exist_ok=True)
+
+
+def is_unknown_database(exc):
+    return isinstance(exc, sqlite3.OperationalError) and "unable to open database" in str(exc)
+
+
+def is_missing_table(exc):
+    return isinstance(exc, sqlite3.OperationalError) and "no such table" in str(exc)
+
+
+def migration_lock(cursor, timeout):
+    return True
+
+
+def migration_unlock(cursor):
+    pass
+
+
+def table_exists(cursor, table):
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=%s", (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in cursor.fetchall())
+
+
+def index_exists(cursor, table, name):
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND tbl_name=%s AND name=%s",
+        (table, name))
+    return cursor.fetchone()[0] > 0
+
+
+def add_index_sql(table, name, columns, unique=False):
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    return f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+
+
+def drop_index_sql(table, name):
+    return f"DROP INDEX IF EXISTS {name}"
+
+
+def add_column_sql(table, column, definition):
+    return f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+
+
+def execute_online(cursor, sql):
+    cursor.execute(sql)
+    return True
+
+
+# ----------------------------------------------------
+# Dialect helpers
+# ----------------------------------------------------
+TODAY_START = "date('now', 'localtime')"
+
+
+def today_range(column):
+    return (f"{column} >= {TODAY_START} AND "
+            f"{column} < date('now', 'localtime', '+1 day')")
+
+
+def this_month_range(column):
+    return (f"{column} >= date('now', 'localtime', 'start of month') AND "
+            f"{column} < date('now', 'localtime', 'start of month', '+1 month')")
+
+
+def upsert(keys):
+    return f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET"
+
+
+def excluded(column):
+    return f"excluded.{column}"
+
+
+def target(table, column):
+    # The SET list of an upsert only takes bare column names
+    return column
+
+
+def for_update():
+    # SQLite locks the whole database for writers; there are no row locks
+    return ""
+
+
+_INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def explain(cursor, sql, params, table):
+    """Map EXPLAIN QUERY PLAN onto MySQL-style (key, type, extra)."""
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    details = [r["detail"] if isinstance(r, dict) else r[3] for r in cursor.fetchall()]
+    detail = next((d for d in details if re.search(rf"\b{table}\b", d)), "")
+
+    match = _INDEX_RE.search(detail)
+    if match:
+        key = match.group(1)
+    elif "PRIMARY KEY" in detail:
+        key = "PRIMARY"
+    else:
+        key = None
+
+    if detail.startswith("SEARCH"):
+        access = "range"
+    elif key:
+        access = "index"
+    else:
+        access = "ALL"
+    return key, access, detail
+
+
+# ----------------------------------------------------
+# Monthly periods
+#   SQLite has no partitioning: periods are calendar months found in
+#   the data, and dropping one deletes its rows by sale_date range.
+# ----------------------------------------------------
+PARTITIONED = False
+
+
+def month_partitions(cursor, table):
+    return []
+
+
+def add_month_partitions(cursor, table, months):
+    pass
+
+
+def closed_periods(cursor, cutoff):
+    cursor.execute("SELECT MIN(sale_date) AS first FROM sales WHERE sale_date < %s", (cutoff,))
+    first = cursor.fetchone()["first"]
+    if first is None:
+        return []
+
+    periods = []
+    month = date.fromisoformat(str(first)[:10]).replace(day=1)
+    while month < cutoff:
+        end = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        periods.append((f"p{month:%Y%m}", month, end))
+        month = end
+    return periods
+
+
+def drop_period(cursor, table, name, start, end):
+    sql = f"DELETE FROM {table} WHERE sale_date < %s"
+    params = [end]
+    if start is not None:
+        sql += " AND sale_date >= %s"
+        params.append(start)
+    cursor.execute(sql, params)
@@ -0,0 +1,87 @@
+import argparse
+import json
+import sys
+
+# ----------------------------------------------------
+# Benchmark CLI (run from the project root)
+#
+#   python -m bench generate --products 50000 --sales 200000
+#   python -m bench run --workers 8 --requests 100 -o before.json
+#   python -m bench compare before.json after.json
+# ----------------------------------------------------
+
+
+def _print_report(report):
+    print(f"commit {report['commit']}  workers={report['workers']}  "
+          f"requests={report['requests']}  {report['throughput_rps']} req/s")
+    print(f"{'route':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>8}{'err':>6}")
+    for name, r in report["routes"].items():
+        print(f"{name:<24}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+              f"{r['queries_per_request']:>8}{r['errors']:>6}")
+    for e in report["worker_errors"]:
+        print("worker error:", e)
+
+
+def _compare(before, after):
+    print(f"{'route':<24}{'metric':<22}{'before':>10}{'after':>10}{'change':>9}")
+    for name, b in before["routes"].items():
+        a = after["routes"].get(name)
+        if a is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+            old, new = b[metric], a[metric]
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            print(f"{name:<24}{metric:<22}{old:>10}{new:>10}{change:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="bulk-load synthetic data")
+    gen.add_argument("--suppliers", type=int, default=50)
+    gen.add_argument("--products", type=int, default=10000)
+    gen.add_argument("--cashiers", type=int, default=10)
+    gen.add_argument("--sales", type=int, default=50000)
+    gen.add_argument("--max-lines", type=int, default=6)
+    gen.add_argument("--days", type=int, default=365)
+    gen.add_argument("--seed", type=int, default=42)
+
+    run = sub.add_parser("run", help="drive the hot routes and report latency")
+    run.add_argument("--workers", type=int, default=4)
+    run.add_argument("--requests", type=int, default=50, help="requests per worker")
+    run.add_argument("--username", default="manager")
+    run.add_argument("--password", default="manager123")
+    run.add_argument("-o", "--output", help="write the JSON report here")
+
+    cmp_ = sub.add_parser("compare", help="diff two JSON reports")
+    cmp_.add_argument("before")
+    cmp_.add_argument("after")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        from bench.datagen import generate
+        generate(args.suppliers, args.products, args.cashiers, args.sales,
+                 args.max_lines, args.days, args.seed)
+
+    elif args.command == "run":
+        from bench.driver import run as run_bench
+        report = run_bench(args.workers, args.requests, args.username, args.password)
+        _print_report(report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+
+    else:
+        with open(args.before) as f:
+            before = json.load(f)
+        with open(args.after) as f:
+            after = json.load(f)
+        _compare(before, after)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
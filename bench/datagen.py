@@ -0,0 +1,138 @@
+import random
+from datetime import datetime, timedelta
+
+from db import get_db_connection
+from repositories.archive_repo import ensure_sales_partitions
+from repositories.rollup_repo import rebuild_rollups
+from config import SALES_PARTITION_MONTHS_AHEAD
+
+# ----------------------------------------------------
+# Synthetic data for benchmarks
+#
+# Appends suppliers, products, cashiers, sales and sale_items to the
+# database configured in config.py (schema from schema.sql) using
+# multi-row executemany inserts, then rebuilds the rollups so the
+# reporting pages see the new history.
+# ----------------------------------------------------
+
+CHUNK = 5000
+
+
+def _chunks(rows, size=CHUNK):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _next_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def generate(suppliers=50, products=10000, cashiers=10, sales=50000,
+             max_lines=6, days=365, seed=42, log=print):
+    rng = random.Random(seed)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        # Suppliers
+        first_supplier = _next_id(cursor, "suppliers", "supplier_id")
+        supplier_rows = [
+            (first_supplier + i, f"Bench Supplier {first_supplier + i}", f"bench{first_supplier + i}@example.com")
+            for i in range(suppliers)
+        ]
+        for chunk in _chunks(supplier_rows):
+            cursor.executemany("""
+                INSERT INTO suppliers (supplier_id, supplier_name, contact_info)
+                VALUES (%s, %s, %s)
+            """, chunk)
+        conn.commit()
+        log(f"suppliers: +{suppliers}")
+
+        # Products
+        first_product = _next_id(cursor, "products", "product_id")
+        product_rows = []
+        prices = {}
+        for i in range(products):
+            product_id = first_product + i
+            price = round(rng.uniform(0.5, 150), 2)
+            prices[product_id] = price
+            product_rows.append((
+                product_id,
+                first_supplier + rng.randrange(suppliers) if suppliers else None,
+                f"Bench Product {product_id:07d}",
+                f"BENCH{product_id:07d}",
+                price,
+                rng.randint(0, 500),
+            ))
+        for chunk in _chunks(product_rows):
+            cursor.executemany("""
+                INSERT INTO products (product_id, supplier_id, product_name, sku, price, quantity)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, chunk)
+        conn.commit()
+        log(f"products: +{products}")
+
+        # Cashiers
+        first_user = _next_id(cursor, "users", "user_id")
+        user_ids = [first_user + i for i in range(cashiers)]
+        cursor.executemany("""
+            INSERT INTO users (user_id, username, password_hash, role)
+            VALUES (%s, %s, SHA2('bench123', 256), 'cashier')
+        """, [(uid, f"bench_cashier_{uid}") for uid in user_ids])
+        conn.commit()
+        log(f"cashiers: +{cashiers}")
+
+        # Sales + sale_items (monthly partitions first; this connection
+        # holds no open transaction here, so the ALTER isn't blocked)
+        start = datetime.now() - timedelta(days=days)
+        span = days * 86400
+        ensure_sales_partitions(SALES_PARTITION_MONTHS_AHEAD, first_month=start.date())
+
+        first_sale = _next_id(cursor, "sales", "sale_id")
+        product_ids = list(prices)
+
+        sale_rows, item_rows = [], []
+        for i in range(sales):
+            sale_id = first_sale + i
+            lines = rng.sample(product_ids, min(rng.randint(1, max_lines), len(product_ids)))
+            total = 0
+            sale_date = start + timedelta(seconds=rng.randrange(span))
+            for product_id in lines:
+                qty = rng.randint(1, 5)
+                total += qty * prices[product_id]
+                item_rows.append((sale_id, product_id, qty, prices[product_id], sale_date))
+            sale_rows.append((
+                sale_id,
+                rng.choice(user_ids),
+                sale_date,
+                round(total, 2),
+            ))
+
+            if len(sale_rows) >= CHUNK:
+                _flush_sales(cursor, sale_rows, item_rows)
+                conn.commit()
+                sale_rows, item_rows = [], []
+
+        _flush_sales(cursor, sale_rows, item_rows)
+        conn.commit()
+        log(f"sales: +{sales}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    rebuild_rollups()
+    log("rollups rebuilt")
+
+
+def _flush_sales(cursor, sale_rows, item_rows):
+    if sale_rows:
+        cursor.executemany("""
+            INSERT INTO sales (sale_id, user_id, sale_date, total_amount)
+            VALUES (%s, %s, %s, %s)
+        """, sale_rows)
+    for chunk in _chunks(item_rows):
+        cursor.executemany("""
+            INSERT INTO sale_items (sale_id, product_id, quantity_sold, item_price, sale_date)
+            VALUES (%s, %s, %s, %s, %s)
+        """, chunk)
@@ -0,0 +1,108 @@
+import math
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+from app import app
+from db import query_count
+
+# ----------------------------------------------------
+# Route driver: N worker threads, each with its own logged-in Flask
+# test client, hit the hot routes round-robin. Every request records
+# wall time and the number of SQL statements it issued.
+# ----------------------------------------------------
+
+def _routes(sale_id):
+    return [
+        ("/dashboard", "/dashboard"),
+        ("/products", "/products"),
+        ("/sales", "/sales"),
+        ("/sales/add-item/<id>", f"/sales/add-item/{sale_id}"),
+        ("/sales/reports", "/sales/reports"),
+    ]
+
+
+def _login(client, username, password):
+    resp = client.post("/login", data={"username": username, "password": password})
+    if resp.status_code != 302:
+        raise RuntimeError(f"Login failed for {username}")
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(workers=4, requests_per_worker=50, username="manager", password="manager123"):
+    samples = {}            # route -> [(ms, queries, ok)]
+    lock = threading.Lock()
+    errors = []
+
+    # One sale for the add-item screen
+    with app.test_client() as setup:
+        _login(setup, username, password)
+        sale_id = int(setup.get("/sales/new").headers["Location"].rsplit("/", 1)[1])
+
+    def worker():
+        try:
+            client = app.test_client()
+            _login(client, username, password)
+            routes = _routes(sale_id)
+            local = []
+            for n in range(requests_per_worker):
+                name, url = routes[n % len(routes)]
+                before = query_count()
+                started = time.perf_counter()
+                resp = client.get(url)
+                elapsed = (time.perf_counter() - started) * 1000
+                local.append((name, elapsed, query_count() - before, resp.status_code < 400))
+            with lock:
+                for name, ms, queries, ok in local:
+                    samples.setdefault(name, []).append((ms, queries, ok))
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    routes = {}
+    for name, rows in sorted(samples.items()):
+        times = sorted(ms for ms, _, _ in rows)
+        routes[name] = {
+            "requests": len(rows),
+            "errors": sum(1 for _, _, ok in rows if not ok),
+            "p50_ms": round(_percentile(times, 50), 2),
+            "p95_ms": round(_percentile(times, 95), 2),
+            "p99_ms": round(_percentile(times, 99), 2),
+            "queries_per_request": round(sum(q for _, q, _ in rows) / len(rows), 2),
+        }
+
+    total = sum(r["requests"] for r in routes.values())
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "requests": total,
+        "throughput_rps": round(total / wall, 1) if wall else None,
+        "routes": routes,
+        "worker_errors": errors,
+    }
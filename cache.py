@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ----------------------------------------------------
+# In-process read-through caches for catalog data.
+#
+# Every entry is tagged with the catalog version it was loaded under;
+# bump_catalog_version() (called by the product/supplier services on
+# writes) makes all older entries misses. Entries also expire after a
+# TTL, which bounds staleness for rows carrying stock quantities and
+# for changes made by other worker processes.
+# ----------------------------------------------------
+
+_version = 0
+_version_lock = threading.Lock()
+_registry = []
+
+
+def catalog_version():
+    return _version
+
+
+def bump_catalog_version():
+    global _version
+    with _version_lock:
+        _version += 1
+        return _version
+
+
+class LRUCache:
+    def __init__(self, name, max_size, ttl=None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._data = OrderedDict()      # key -> (value, version, expires_at)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        _registry.append(self)
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss.
+
+        None results are not cached, so missing rows are re-checked.
+        """
+        version = catalog_version()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, entry_version, expires_at = entry
+                if entry_version == version and (expires_at is None or expires_at > now):
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+            self._misses += 1
+
+        # Load outside the lock; tagging with the version read *before*
+        # loading means a bump during the load leaves this entry stale.
+        value = loader()
+        if value is not None:
+            self.put(key, value, version)
+        return value
+
+    def put(self, key, value, version=None):
+        if version is None:
+            version = catalog_version()
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            self._data[key] = (value, version, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def cache_stats():
+    return {
+        "catalog_version": catalog_version(),
+        "caches": {c.name: c.stats() for c in _registry},
+    }
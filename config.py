@@ -1,3 +1,6 @@
+# Storage backend: "mysql" (DB_CONFIG below) or "sqlite" (embedded, single store)
+DB_BACKEND = "mysql"
+
 DB_CONFIG = {
     "host": "localhost",
     "user": "root",
@@ -5,4 +8,93 @@ DB_CONFIG = {
     "database": "store_db"
 }
 
+# Embedded SQLite settings (DB_BACKEND = "sqlite")
+SQLITE_PATH = "store.db"
+SQLITE_BUSY_TIMEOUT = 5      # seconds a writer waits for the database lock
+
+# Connection pool settings (see db.py)
+DB_POOL_SIZE = 10            # max open connections per process
+DB_POOL_TIMEOUT = 5          # seconds to wait for a free connection
+DB_POOL_PING_AFTER = 30      # ping idle connections older than this (seconds) on borrow
+DB_LOCK_RETRIES = 3          # retries for lock-wait timeouts / deadlocks
+DB_LOCK_BACKOFF = 0.05       # first retry delay (seconds), doubled each attempt
+
+# Read replicas (see db.py): connect() overrides per replica, e.g.
+#   [{"host": "127.0.0.1", "port": 3307}]
+# Empty = every read goes to the primary.
+DB_REPLICAS = []
+DB_READ_YOUR_WRITES = 5      # seconds a session reads from the primary after it commits
+
+# Schema migrations (see migrations/)
+MIGRATION_LOCK_TIMEOUT = 60  # seconds to wait while another process migrates
+MIGRATION_BATCH_SIZE = 5000  # rows per backfill statement
+
+# Query instrumentation (see db.py, metrics.py)
+SLOW_QUERY_MS = 200          # log statements slower than this (milliseconds)
+
+# Product list paging / low-stock flag
+PRODUCTS_PAGE_SIZE = 50
+LOW_STOCK_THRESHOLD = 10
+
+# Demand forecast (flask --app app forecast-demand; see services/forecast_service.py)
+FORECAST_HISTORY_DAYS = 56   # days of sales history loaded per run
+FORECAST_WINDOW = 28         # moving-average / variability window (days)
+FORECAST_ALPHA = 0.2         # exponential smoothing factor (0..1)
+FORECAST_LEAD_DAYS = 7       # supplier lead time (days)
+FORECAST_COVER_DAYS = 14     # days of demand an order should cover after arrival
+FORECAST_SAFETY_Z = 1.65     # safety stock, in std devs of daily demand (~95%)
+
+# Product search / typeahead on the sale screen
+SEARCH_RESULT_LIMIT = 10
+SEARCH_RESULT_MAX = 50
+
+# CSV catalog import
+IMPORT_CHUNK_SIZE = 1000     # rows per transaction
+IMPORT_MAX_ERRORS = 1000     # per-row errors kept for the report
+
+# JSON API (/api/v1)
+API_PAGE_SIZE = 100
+API_PAGE_MAX = 500
+
+# Sales list (/sales) and total_amount check (flask --app app check-sale-totals)
+SALES_PAGE_SIZE = 50
+SALES_CHECK_CHUNK = 10000    # sale_ids compared per statement
+
+# Sales export
+EXPORT_CHUNK_SIZE = 5000     # rows fetched from the server per chunk
+
+# Sales partitions / archive (flask --app app partition-sales | archive-sales)
+SALES_PARTITION_MONTHS_AHEAD = 3   # empty monthly partitions kept ready
+SALES_KEEP_MONTHS = 24             # months kept online, current month included
+ARCHIVE_DIR = "archive"            # archived periods are written here (.csv.gz)
+
+# Background jobs (see jobs.py); keep JOB_WORKERS well below DB_POOL_SIZE
+# so jobs can never take the connections checkout needs
+JOB_WORKERS = 2              # jobs running at once per process
+JOB_TYPE_LIMITS = {          # jobs of one type running at once (default 1)
+    "export-sales": 1,
+    "rebuild-rollups": 1,
+    "reconcile-sales-totals": 1,
+    "check-sale-totals": 1,
+    "forecast-demand": 1,
+}
+JOB_RESULT_DIR = "job_results"     # downloadable job output
+JOB_PROGRESS_INTERVAL = 1.0        # min seconds between progress writes
+
+# Production server (python server.py; see server.py). Each worker has
+# its own pools, so DB_POOL_SIZE must cover SERVER_THREADS + JOB_WORKERS,
+# and the database must allow workers x that many connections.
+SERVER_BIND = "0.0.0.0:8000"
+SERVER_WORKERS = 0                 # worker processes; 0 = one per CPU core
+SERVER_THREADS = 4                 # request threads per worker
+SERVER_TIMEOUT = 60                # seconds before a stuck worker is killed and replaced
+SERVER_GRACEFUL_TIMEOUT = 30       # seconds workers get to drain on restart / shutdown
+SERVER_MAX_REQUESTS = 5000         # recycle a worker after this many requests (0 = never)
+SERVER_MAX_REQUESTS_JITTER = 500   # spread recycling so workers don't restart together
+
+# Catalog cache (see cache.py)
+CATALOG_CACHE_SIZE = 5000    # max cached product rows (by id + by SKU)
+PRODUCT_CACHE_TTL = 5        # seconds; product rows carry stock quantity
+SUPPLIER_CACHE_TTL = 60      # seconds
+
 SECRET_KEY = "supersecretkey123"
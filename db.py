@@ -1,57 +1,512 @@
-import mysql.connector
-from config import DB_CONFIG
-import os
+import logging
+import random
+import threading
+import time
+
+from backends import load_backend
+from config import (
+    DB_BACKEND,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PING_AFTER,
+    DB_LOCK_RETRIES,
+    DB_LOCK_BACKOFF,
+    DB_REPLICAS,
+    SLOW_QUERY_MS,
+)
+
+# The active storage backend; repositories use its dialect helpers
+dialect = load_backend(DB_BACKEND)
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within DB_POOL_TIMEOUT."""
+
+
+log = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Process-wide statement counters (exported by /metrics)
+_totals_lock = threading.Lock()
+_totals = {
+    "queries_total": 0,
+    "query_seconds_total": 0.0,
+    "slow_queries_total": 0,
+}
+
+
+def query_count():
+    """Statements executed so far on the current thread (for benchmarks)."""
+    return getattr(_local, "queries", 0)
+
+
+def start_request_stats():
+    """Begin collecting per-request statement stats on this thread."""
+    _local.request = {
+        "queries": 0,
+        "connections": 0,
+        "db_seconds": 0.0,
+        "slowest_seconds": 0.0,
+        "slowest_sql": None,
+    }
+
+
+def request_stats():
+    """Stats collected since start_request_stats(), or None outside a request."""
+    return getattr(_local, "request", None)
+
+
+def end_request_stats():
+    stats = request_stats()
+    _local.request = None
+    return stats
+
+
+def query_totals():
+    with _totals_lock:
+        return dict(_totals)
+
+
+def _one_line(sql):
+    return " ".join(str(sql).split())
+
+
+def _record_statement(operation, elapsed):
+    _local.queries = query_count() + 1
+
+    stats = request_stats()
+    if stats is not None:
+        stats["queries"] += 1
+        stats["db_seconds"] += elapsed
+        if elapsed > stats["slowest_seconds"]:
+            stats["slowest_seconds"] = elapsed
+            stats["slowest_sql"] = operation
+
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+    with _totals_lock:
+        _totals["queries_total"] += 1
+        _totals["query_seconds_total"] += elapsed
+        if slow:
+            _totals["slow_queries_total"] += 1
+
+    if slow:
+        log.warning("Slow query (%.1f ms): %s", elapsed * 1000, _one_line(operation))
+
+
+class InstrumentedCursor:
+    """Cursor proxy that counts and times execute/executemany calls."""
+
+    def __init__(self, raw, conn=None):
+        self._raw = raw
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._raw.execute(operation, params, *args, **kwargs)
+        finally:
+            _record_statement(operation, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._raw.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            _record_statement(operation, time.perf_counter() - started)
+
+    def execute_prepared(self, statement, params):
+        """Run a registered Statement in this cursor's transaction; returns its rowcount."""
+        cursor = self._conn.prepared(statement) if self._conn is not None else self._raw
+        started = time.perf_counter()
+        try:
+            cursor.execute(statement.sql, params)
+            return cursor.rowcount
+        finally:
+            elapsed = time.perf_counter() - started
+            _record_statement(statement.sql, elapsed)
+            _record_prepared(statement.name, elapsed)
+
+
+class PooledConnection:
+    """Thin proxy around a MySQL connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._raw.cursor(*args, **kwargs), self)
+
+    def prepared(self, statement):
+        return self._pool.statements(self._raw).cursor(statement)
+
+    def commit(self):
+        self._raw.commit()
+        if self._pool.name == PRIMARY:
+            _local.committed = True
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+    def discard(self):
+        """Close the underlying connection instead of returning it (e.g. after
+        abandoning an unbuffered result set mid-stream)."""
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.forget(raw)
+
+
+# ----------------------------------------------------
+# Prepared statements
+#
+# The few statements every sale screen click runs (line upserts, stock
+# and total updates, rollups) are declared once with
+# prepared_statement() and run with cursor.execute_prepared(). Each
+# pooled connection keeps one prepared cursor per statement, so MySQL
+# parses and plans it once per connection (COM_STMT_PREPARE) and
+# afterwards receives only the statement id and binary parameters.
+# SQLite gets a plain cursor per statement; sqlite3 already reuses the
+# compiled statement. Executions and time per statement are exported
+# by /metrics.
+# ----------------------------------------------------
+class Statement:
+    def __init__(self, name, sql):
+        self.name = name
+        self.sql = sql
+
+
+_statements = {}
+_statement_totals = {}       # name -> {"executions", "seconds", "prepares"}
+
+
+def prepared_statement(name, sql):
+    """Register a hot statement under a unique name (at import time)."""
+    if name in _statements:
+        raise ValueError(f"Statement {name!r} is already registered")
+    statement = _statements[name] = Statement(name, sql)
+    _statement_totals[name] = {"executions": 0, "seconds": 0.0, "prepares": 0}
+    return statement
+
+
+def _record_prepared(name, elapsed):
+    with _totals_lock:
+        totals = _statement_totals[name]
+        totals["executions"] += 1
+        totals["seconds"] += elapsed
+
+
+def statement_totals():
+    """{statement name: executions / seconds / prepares} since start."""
+    with _totals_lock:
+        return {name: dict(totals) for name, totals in _statement_totals.items()}
+
+
+class StatementRegistry:
+    """Prepared cursors of one connection, by statement name."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._cursors = {}
+
+    def cursor(self, statement):
+        cursor = self._cursors.get(statement.name)
+        if cursor is None:
+            cursor = self._cursors[statement.name] = dialect.prepared_cursor(self._raw)
+            with _totals_lock:
+                _statement_totals[statement.name]["prepares"] += 1
+        return cursor
+
+    def close(self):
+        cursors, self._cursors = self._cursors, {}
+        for cursor in cursors.values():
+            try:
+                cursor.close()
+            except dialect.Error:
+                pass
+
+
+class ConnectionPool:
+    def __init__(self, size, timeout, ping_after, name=None, connect_args=None):
+        self.name = name or PRIMARY
+        self.connect_args = connect_args or {}
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = []          # [(raw_conn, returned_at)]
+        self._open = 0           # connections created and not discarded
+        self._borrowed = 0
+        self._waiting = 0
+        self._registries = {}    # id(raw_conn) -> StatementRegistry
+
+        self._counters = {
+            "borrows_total": 0,
+            "timeouts_total": 0,
+            "created_total": 0,
+            "discarded_total": 0,
+        }
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        raw, returned_at = None, None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, returned_at = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts_total"] += 1
+                    raise PoolTimeout(
+                        f"No database connection free after {self.timeout}s "
+                        f"(pool size {self.size})"
+                    )
+
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._borrowed += 1
+            self._counters["borrows_total"] += 1
+
+        # Connect / ping outside the lock so slow I/O doesn't block other borrowers
+        try:
+            if raw is None:
+                raw = self._new_connection()
+            elif time.monotonic() - returned_at > self.ping_after and not raw.is_connected():
+                self._discard(raw)
+                raw = self._new_connection()
+        except Exception:
+            with self._cond:
+                self._borrowed -= 1
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        # Never hand out a connection with a half-finished transaction
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except dialect.Error:
+            self.forget(raw)
+            return
+
+        with self._cond:
+            self._borrowed -= 1
+            self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+
+    def forget(self, raw):
+        self._discard(raw)
+        with self._cond:
+            self._borrowed -= 1
+            self._open -= 1
+            self._cond.notify()
+
+    def _new_connection(self):
+        raw = dialect.connect(**self.connect_args)
+        with self._cond:
+            self._counters["created_total"] += 1
+        return raw
+
+    def statements(self, raw):
+        """The prepared statements of one pooled connection (created on first use)."""
+        registry = self._registries.get(id(raw))
+        if registry is None:
+            registry = self._registries[id(raw)] = StatementRegistry(raw)
+        return registry
+
+    def _discard(self, raw):
+        registry = self._registries.pop(id(raw), None)
+        if registry is not None:
+            registry.close()
+        try:
+            raw.close()
+        except dialect.Error:
+            pass
+        with self._cond:
+            self._counters["discarded_total"] += 1
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for raw, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "borrowed": self._borrowed,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                **self._counters,
+            }
+
+
+# ----------------------------------------------------
+# Primary / replica routing
+#
+# Writes, and every read that feeds a write or the catalog cache, use
+# get_db_connection() (the primary). Read-only repository functions
+# use get_read_connection(), which goes to one of DB_REPLICAS unless
+# reads are pinned to the primary on this thread: by the sale screen
+# (pin_reads_to_primary) or by read-your-writes, where the app pins a
+# session for DB_READ_YOUR_WRITES seconds after it committed (see
+# committed_this_request). A replica that can't hand out a connection
+# falls back to the primary.
+# ----------------------------------------------------
+
+PRIMARY = "primary"
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _build_pools():
+    pools = {PRIMARY: ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_PING_AFTER)}
+    for i, overrides in enumerate(DB_REPLICAS):
+        name = f"replica{i}"
+        pools[name] = ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_PING_AFTER,
+                                     name=name, connect_args=overrides)
+    return pools
+
+
+def _get_pools():
+    global _pools
+    if not _pools:
+        with _pool_lock:
+            if not _pools:
+                _pools = _build_pools()
+    return _pools
+
+
+def get_pool(name=PRIMARY):
+    return _get_pools()[name]
+
+
+def reset_pool():
+    """Drop every pool (e.g. after fork); the next borrow builds new ones."""
+    global _pools
+    with _pool_lock:
+        old, _pools = _pools, {}
+    for pool in old.values():
+        pool.close_all()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def all_pool_stats():
+    """{pool name: stats} for the primary and every replica."""
+    return {name: pool.stats() for name, pool in _get_pools().items()}
+
+
+def start_request_routing(primary=False):
+    """Reset read routing for a new request; primary=True pins its reads
+    to the primary (read-your-writes)."""
+    _local.primary_reads = primary
+    _local.replica = None
+    _local.committed = False
+
+
+def pin_reads_to_primary():
+    _local.primary_reads = True
+
+
+def committed_this_request():
+    """True if anything was committed on the primary since start_request_routing()."""
+    return getattr(_local, "committed", False)
+
+
+def _replica_pool():
+    """The replica this thread reads from (one per request, so a page
+    never mixes replicas with different lag), or None."""
+    pools = _get_pools()
+    if len(pools) == 1 or getattr(_local, "primary_reads", False):
+        return None
+
+    name = getattr(_local, "replica", None)
+    if name is None:
+        name = _local.replica = random.choice([n for n in pools if n != PRIMARY])
+    return pools[name]
+
 
 def get_db_connection():
-    return mysql.connector.connect(
-        host=DB_CONFIG["host"],
-        user=DB_CONFIG["user"],
-        password=DB_CONFIG["password"],
-        database=DB_CONFIG["database"]
-    )
-
-def initialize_database():
-    """Run schema.sql on first app launch (only when tables don't exist)."""
-
-    # Connect without selecting a database to allow CREATE DATABASE
-    conn = mysql.connector.connect(
-        host=DB_CONFIG["host"],
-        user=DB_CONFIG["user"],
-        password=DB_CONFIG["password"]
-    )
-    cursor = conn.cursor()
-
-    # Create DB if not exists
-    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-    # Now connect to the database
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Check if a table exists (e.g., users table)
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM information_schema.tables
-        WHERE table_schema = %s AND table_name = 'users'
-    """, (DB_CONFIG['database'],))
-
-    exists = cursor.fetchone()[0]
-
-    if exists == 0:
-        # Run schema.sql
-        print("Initializing database using schema.sql ...")
-        with open("schema.sql", "r") as f:
-            sql_script = f.read()
-
-        # Execute SQL script safely
-        for statement in sql_script.split(";"):
-            if statement.strip():
-                cursor.execute(statement + ";")
-
-        conn.commit()
-
-    cursor.close()
-    conn.close()
+    stats = request_stats()
+    if stats is not None:
+        stats["connections"] += 1
+    return get_pool().acquire()
+
+
+def get_read_connection():
+    """A connection for read-only work: a replica when one is configured
+    and this thread's reads aren't pinned to the primary."""
+    pool = _replica_pool()
+    if pool is None:
+        return get_db_connection()
+
+    stats = request_stats()
+    try:
+        conn = pool.acquire()
+    except (dialect.Error, PoolTimeout) as e:
+        log.warning("Replica %s unavailable, reading from primary: %s", pool.name, e)
+        return get_db_connection()
+
+    if stats is not None:
+        stats["connections"] += 1
+    return conn
+
+
+def run_in_transaction(work, retries=DB_LOCK_RETRIES, backoff=DB_LOCK_BACKOFF):
+    """Call work(cursor) inside a transaction and commit its result.
+
+    Any exception rolls the transaction back. Lock-wait timeouts and
+    deadlocks are retried up to `retries` times with jittered
+    exponential backoff; everything else is re-raised immediately.
+    """
+    attempt = 0
+    while True:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            result = work(cursor)
+            conn.commit()
+            return result
+        except dialect.Error as e:
+            conn.rollback()
+            if not dialect.is_retryable(e) or attempt >= retries:
+                raise
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+        attempt += 1
+        delay = backoff * (2 ** (attempt - 1))
+        time.sleep(delay * random.uniform(0.5, 1.0))
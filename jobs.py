@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import JOB_WORKERS, JOB_TYPE_LIMITS, JOB_RESULT_DIR, JOB_PROGRESS_INTERVAL
+from repositories.job_repo import (
+    create_job,
+    claim_job,
+    update_progress,
+    is_cancel_requested,
+    finish_job,
+    get_owners_with_active_jobs,
+    fail_jobs_of,
+)
+
+# ----------------------------------------------------
+# In-process background jobs
+#
+# Job types are registered by services/job_service.py. A submitted job
+# is stored in the jobs table (status / progress / result, readable
+# from any worker process) and queued in the submitting process, whose
+# runner starts it when both a pool thread and a slot for its type are
+# free. Jobs therefore never use more than JOB_WORKERS threads (and so
+# database connections) per process, and one kind of job can't fill
+# every slot.
+#
+# Cancellation is cooperative: a queued job is cancelled in the table
+# and never claimed; a running one sees the request the next time it
+# reports progress (JobContext.progress raises JobCancelled) or checks
+# (JobContext.check_cancelled), so every job type does one or the
+# other at least between its phases.
+# ----------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+_types = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+class JobType:
+    def __init__(self, name, run, prepare=None, limit=None):
+        self.name = name
+        self.run = run              # run(ctx, **params) -> JSON-able summary
+        self.prepare = prepare      # prepare(params) -> params; raises ValueError
+        self.limit = limit or JOB_TYPE_LIMITS.get(name, 1)
+
+
+def register_job_type(name, run, prepare=None, limit=None):
+    _types[name] = JobType(name, run, prepare, limit)
+
+
+def job_types():
+    return sorted(_types)
+
+
+class JobContext:
+    """Handed to a running job: progress reporting and its output file."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.result_path = None
+        self._reported_at = 0.0
+
+    def progress(self, done, total=None, message=None, force=False):
+        """Record progress (at most every JOB_PROGRESS_INTERVAL seconds).
+
+        Raises JobCancelled if the job has been cancelled.
+        """
+        now = time.monotonic()
+        if not force and now - self._reported_at < JOB_PROGRESS_INTERVAL:
+            return
+        self._reported_at = now
+        if update_progress(self.job_id, done, total, message):
+            raise JobCancelled()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job has been cancelled; writes nothing.
+
+        For checks inside the job's own transaction, where a progress
+        write could wait on that transaction (SQLite locks the whole
+        database for a writer).
+        """
+        if is_cancel_requested(self.job_id):
+            raise JobCancelled()
+
+    def output_path(self, filename):
+        """Path for the job's downloadable result (returned by /result)."""
+        os.makedirs(JOB_RESULT_DIR, exist_ok=True)
+        self.result_path = os.path.join(JOB_RESULT_DIR, f"job{self.job_id}_{filename}")
+        return self.result_path
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_INTERRUPTED = "Interrupted: the process running it exited."
+
+
+def _orphaned(owner):
+    """True if owner is another process on this host that no longer exists."""
+    host, pid = owner.rsplit(":", 1)
+    return host == socket.gethostname() and owner != _owner() and not _pid_alive(int(pid))
+
+
+def fail_orphaned_jobs():
+    """Fail queued / running jobs left behind by dead processes on this host.
+
+    Runs when a process starts its runner and when a server worker
+    starts (server.post_fork), so a recycled worker's jobs are failed
+    as soon as its replacement is up.
+    """
+    dead = [o for o in get_owners_with_active_jobs(socket.gethostname()) if _orphaned(o)]
+    return fail_jobs_of(dead, _INTERRUPTED)
+
+
+def fail_if_orphaned(job):
+    """Fail an active job whose process on this host has exited; True if it did."""
+    if job["status"] not in ("queued", "running") or not _orphaned(job["owner"]):
+        return False
+    fail_jobs_of([job["owner"]], _INTERRUPTED)
+    return True
+
+
+class JobRunner:
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._pending = deque()     # (job_id, JobType, params)
+        self._running = {}          # type name -> jobs running
+        self._owner = _owner()
+
+    def submit(self, job_type, params, user_id=None):
+        """Validate, store and queue a job; returns its job_id.
+
+        Raises ValueError for an unknown type or bad parameters.
+        """
+        spec = _types.get(job_type)
+        if spec is None:
+            raise ValueError(f"Unknown job type {job_type!r}; expected one of {job_types()}")
+        params = spec.prepare(dict(params or {})) if spec.prepare else dict(params or {})
+
+        job_id = create_job(job_type, json.dumps(params), self._owner, user_id)
+        with self._lock:
+            self._pending.append((job_id, spec, params))
+        self._dispatch()
+        return job_id
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": len(self._pending),
+                "running": dict(self._running),
+            }
+
+    def _dispatch(self):
+        """Start queued jobs while a thread and a slot for their type are free."""
+        with self._lock:
+            busy = sum(self._running.values())
+            for entry in list(self._pending):
+                if busy >= self.workers:
+                    break
+                job_id, spec, params = entry
+                if self._running.get(spec.name, 0) >= spec.limit:
+                    continue
+                self._pending.remove(entry)
+                self._running[spec.name] = self._running.get(spec.name, 0) + 1
+                busy += 1
+                self._executor.submit(self._run, job_id, spec, params)
+
+    def _run(self, job_id, spec, params):
+        try:
+            if claim_job(job_id):
+                self._execute(job_id, spec, params)
+        except Exception:
+            log.exception("Job %s (%s) could not be recorded", job_id, spec.name)
+        finally:
+            with self._lock:
+                self._running[spec.name] -= 1
+            self._dispatch()
+
+    def _execute(self, job_id, spec, params):
+        ctx = JobContext(job_id)
+        started = time.perf_counter()
+        try:
+            summary = spec.run(ctx, **params)
+        except JobCancelled:
+            _remove(ctx.result_path)
+            finish_job(job_id, "cancelled", "Cancelled.")
+        except Exception as e:
+            log.exception("Job %s (%s) failed", job_id, spec.name)
+            _remove(ctx.result_path)
+            finish_job(job_id, "failed", str(e)[:255])
+        else:
+            finish_job(job_id, "succeeded",
+                       f"Finished in {time.perf_counter() - started:.1f}s.",
+                       json.dumps(summary, default=str), ctx.result_path)
+
+
+def _remove(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                fail_orphaned_jobs()
+                _runner = JobRunner()
+    return _runner
+
+
+def reset_runner():
+    """Forget the runner (e.g. in a forked child, where its threads don't exist)."""
+    global _runner
+    with _runner_lock:
+        _runner = None
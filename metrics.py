@@ -0,0 +1,176 @@
+import threading
+
+from db import all_pool_stats, query_totals, statement_totals
+
+# ----------------------------------------------------
+# Request metrics in Prometheus text format (served at /metrics).
+#
+# app.py times every request and hands the result, together with the
+# per-request statement stats collected in db.py, to observe_request().
+# Routes are labelled by their URL rule ("/sales/view/<int:sale_id>"),
+# not the concrete path, so the label set stays bounded.
+# ----------------------------------------------------
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._lock = threading.Lock()
+        self._series = {}       # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+def _gauge(name, help_text, samples):
+    """samples: [(labels_text, value)] read at scrape time."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines.extend(f"{name}{labels} {_number(value)}" for labels, value in samples)
+    return lines
+
+
+def _counter_value(name, help_text, value):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {_number(value)}"]
+
+
+REQUESTS = Counter(
+    "store_http_requests_total",
+    "HTTP requests by route, method and status.",
+    ("route", "method", "status"),
+)
+REQUEST_LATENCY = Histogram(
+    "store_http_request_duration_seconds",
+    "Time spent handling a request (before the response body is streamed).",
+    ("route", "method"),
+)
+REQUEST_DB_TIME = Histogram(
+    "store_http_request_db_seconds",
+    "Time spent in SQL statements per request.",
+    ("route", "method"),
+)
+REQUEST_QUERIES = Histogram(
+    "store_http_request_queries",
+    "SQL statements issued per request.",
+    ("route", "method"),
+    buckets=QUERY_BUCKETS,
+)
+
+_REQUEST_METRICS = (REQUESTS, REQUEST_LATENCY, REQUEST_DB_TIME, REQUEST_QUERIES)
+
+
+def observe_request(route, method, status, seconds, stats):
+    REQUESTS.inc((route, method, str(status)))
+    REQUEST_LATENCY.observe((route, method), seconds)
+    if stats is not None:
+        REQUEST_DB_TIME.observe((route, method), stats["db_seconds"])
+        REQUEST_QUERIES.observe((route, method), stats["queries"])
+
+
+def render():
+    lines = []
+    for metric in _REQUEST_METRICS:
+        lines.extend(metric.render())
+
+    totals = query_totals()
+    lines.extend(_counter_value(
+        "store_db_queries_total", "SQL statements executed.", totals["queries_total"]))
+    lines.extend(_counter_value(
+        "store_db_query_seconds_total", "Time spent in SQL statements.",
+        totals["query_seconds_total"]))
+    lines.extend(_counter_value(
+        "store_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.",
+        totals["slow_queries_total"]))
+
+    statements = sorted(statement_totals().items())
+    for key, help_text in (
+            ("executions", "Executions of each prepared hot statement."),
+            ("seconds", "Time spent in each prepared hot statement."),
+            ("prepares", "Times each hot statement was prepared (once per pooled connection).")):
+        name = f"store_db_statement_{key}_total"
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter"])
+        lines.extend(f'{name}{{statement="{statement}"}} {_number(totals[key])}'
+                     for statement, totals in statements)
+
+    pools = sorted(all_pool_stats().items())
+    lines.extend(_gauge(
+        "store_db_pool_connections", "Pooled database connections by state.",
+        [(f'{{pool="{name}",state="{state}"}}', stats[state])
+         for name, stats in pools for state in ("open", "borrowed", "idle")],
+    ))
+    lines.extend(_gauge(
+        "store_db_pool_size", "Maximum pool size.",
+        [(f'{{pool="{name}"}}', stats["size"]) for name, stats in pools]))
+    lines.extend(_gauge(
+        "store_db_pool_waiting", "Threads waiting for a free connection.",
+        [(f'{{pool="{name}"}}', stats["waiting"]) for name, stats in pools]))
+    for key in ("borrows_total", "timeouts_total", "created_total", "discarded_total"):
+        name = f"store_db_pool_{key}"
+        lines.extend([f"# HELP {name} Connection pool {key.replace('_total', '')} count.",
+                      f"# TYPE {name} counter"])
+        lines.extend(f'{name}{{pool="{pool}"}} {_number(stats[key])}' for pool, stats in pools)
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,339 @@
+import importlib
+import logging
+import os
+import re
+import time
+from datetime import datetime
+
+from config import MIGRATION_LOCK_TIMEOUT
+from db import dialect
+
+# ----------------------------------------------------
+# Versioned schema migrations
+#
+# Each file in migrations/versions/ named NNNN_description.py is one
+# migration: a docstring saying what it does and upgrade(ops). They
+# run in version order, each exactly once per database; the
+# schema_version table records which have been applied.
+#
+# Startup only reads MAX(version) from schema_version (its primary
+# key) and compares it with the newest file, so an up-to-date store
+# pays one indexed read. Pending migrations run under a server-wide
+# lock (MySQL GET_LOCK) so two processes starting together don't
+# both apply them.
+#
+# MySQL DDL isn't transactional, so every ops helper is idempotent: a
+# migration that fails half-way is simply run again. Schema changes
+# go through ops so that they
+#   - run online where the server can (ALGORITHM=INSTANT / INPLACE,
+#     LOCK=NONE) and stop instead of silently copying a busy table;
+#   - only print what they would do in a dry run.
+# ----------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "versions")
+_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+
+class MigrationError(Exception):
+    pass
+
+
+class OfflineRequired(MigrationError):
+    """The migration can't run without blocking writes; needs allow_offline."""
+
+
+class Migration:
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.module = module
+
+    @property
+    def summary(self):
+        doc = (self.module.__doc__ or "").strip()
+        return doc.splitlines()[0] if doc else self.name
+
+
+def discover():
+    """All migrations in migrations/versions/, oldest first."""
+    migrations = []
+    for filename in sorted(os.listdir(VERSIONS_DIR)):
+        match = _FILE_RE.match(filename)
+        if not match:
+            continue
+        version, name = int(match.group(1)), match.group(2)
+        if migrations and migrations[-1].version == version:
+            raise MigrationError(f"Two migrations numbered {version:04d}")
+        module = importlib.import_module(f"{__name__}.versions.{filename[:-3]}")
+        migrations.append(Migration(version, name, module))
+    return migrations
+
+
+# ----------------------------------------------------
+# SQL scripts (schema files)
+# ----------------------------------------------------
+_SKIPPED_RE = re.compile(r"^(CREATE\s+DATABASE|USE)\b", re.I)
+
+
+def split_sql(text):
+    """Split a SQL script into statements on ';' outside quotes.
+
+    Comments are dropped, and so are CREATE DATABASE / USE: a
+    migration always runs against the configured database.
+    """
+    statements = []
+    buf = []
+    quote = None
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if quote:
+            buf.append(c)
+            if c == quote:
+                if text.startswith(quote, i + 1):     # doubled quote
+                    buf.append(quote)
+                    i += 1
+                else:
+                    quote = None
+            elif c == "\\" and i + 1 < n:
+                buf.append(text[i + 1])
+                i += 1
+        elif c in "'\"`":
+            quote = c
+            buf.append(c)
+        elif text.startswith("--", i):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            continue
+        elif c == ";":
+            statements.append("".join(buf).strip())
+            buf = []
+        else:
+            buf.append(c)
+        i += 1
+    statements.append("".join(buf).strip())
+
+    return [s for s in statements if s and not _SKIPPED_RE.match(s)]
+
+
+# ----------------------------------------------------
+# What upgrade(ops) works with
+# ----------------------------------------------------
+class Operations:
+    def __init__(self, conn, dry_run=False, allow_offline=False, out=print):
+        self.conn = conn
+        self.cursor = conn.cursor(buffered=True)
+        self.dialect = dialect
+        self.dry_run = dry_run
+        self.allow_offline = allow_offline
+        self.out = out
+
+    def close(self):
+        self.cursor.close()
+
+    # Reads always run, dry run or not
+    def query(self, sql, params=None):
+        cursor = self.conn.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def table_exists(self, table):
+        return dialect.table_exists(self.cursor, table)
+
+    def column_exists(self, table, column):
+        return dialect.column_exists(self.cursor, table, column)
+
+    def index_exists(self, table, name):
+        return dialect.index_exists(self.cursor, table, name)
+
+    # Writes
+    def execute(self, sql, params=None):
+        """Run a statement that doesn't block writers for long (DML, CREATE ... IF NOT EXISTS)."""
+        if self.dry_run:
+            self.out(f"{sql.strip()};" if params is None else f"{sql.strip()};  -- {params}")
+            return 0
+        self.cursor.execute(sql, params)
+        return self.cursor.rowcount
+
+    def require_offline(self, reason):
+        """Call before work that blocks writes; stops the run unless allow_offline."""
+        if self.allow_offline:
+            return
+        if self.dry_run:
+            self.out(f"-- needs --allow-offline: {reason}")
+            return
+        raise OfflineRequired(reason)
+
+    def alter(self, sql):
+        """ALTER TABLE without blocking writes, or require_offline if that's impossible."""
+        if self.dry_run:
+            self.out(f"{sql};")
+            return
+        if dialect.execute_online(self.cursor, sql):
+            return
+        self.require_offline(f"{sql} would copy the table")
+        self.cursor.execute(sql)
+
+    def create_index(self, table, name, columns, unique=False):
+        """Add an index online; returns False if it already exists."""
+        if self.index_exists(table, name):
+            return False
+        self.alter(dialect.add_index_sql(table, name, columns, unique))
+        return True
+
+    def drop_index(self, table, name):
+        """Drop an index online; returns False if it doesn't exist."""
+        if not self.index_exists(table, name):
+            return False
+        self.alter(dialect.drop_index_sql(table, name))
+        return True
+
+    def add_column(self, table, column, definition):
+        """Add a column online; returns False if it already exists."""
+        if self.column_exists(table, column):
+            return False
+        self.alter(dialect.add_column_sql(table, column, definition))
+        return True
+
+    def run_script(self, path, skip=None):
+        """Execute a schema file statement by statement (skip(statement) -> True to leave one out)."""
+        with open(path, "r") as f:
+            statements = split_sql(f.read())
+        for statement in statements:
+            if skip is None or not skip(statement):
+                self.execute(statement)
+
+
+# ----------------------------------------------------
+# Runner
+# ----------------------------------------------------
+def _connect():
+    try:
+        return dialect.connect()
+    except dialect.Error as e:
+        if not dialect.is_unknown_database(e):
+            raise
+        dialect.create_database()
+        return dialect.connect()
+
+
+def _current_version(cursor):
+    """Highest applied version; 0 for a database that has never been migrated."""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except dialect.Error as e:
+        if dialect.is_missing_table(e):
+            return 0
+        raise
+    return cursor.fetchone()[0] or 0
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at DATETIME NOT NULL,
+            duration_ms INT NOT NULL
+        )
+    """)
+
+
+def _applied(cursor):
+    try:
+        cursor.execute("SELECT version, applied_at, duration_ms FROM schema_version")
+    except dialect.Error as e:
+        if dialect.is_missing_table(e):
+            return {}
+        raise
+    return {version: (applied_at, ms) for version, applied_at, ms in cursor.fetchall()}
+
+
+def status():
+    """[(Migration, applied_at or None, duration_ms or None)], oldest first."""
+    conn = _connect()
+    cursor = conn.cursor(buffered=True)
+    try:
+        applied = _applied(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+    return [(m, *applied.get(m.version, (None, None))) for m in discover()]
+
+
+def migrate(dry_run=False, allow_offline=False, out=print):
+    """Apply pending migrations in order.
+
+    Returns (versions applied, or listed in a dry run; the migration
+    that stopped the run because it needs allow_offline, or None).
+    """
+    migrations = discover()
+    latest = migrations[-1].version if migrations else 0
+
+    conn = _connect()
+    cursor = conn.cursor(buffered=True)
+    try:
+        if _current_version(cursor) >= latest:
+            return [], None
+
+        if dry_run:
+            return _run(conn, cursor, migrations, dry_run, allow_offline, out)
+
+        if not dialect.migration_lock(cursor, MIGRATION_LOCK_TIMEOUT):
+            raise MigrationError(
+                f"Another process has been migrating for over {MIGRATION_LOCK_TIMEOUT}s.")
+        try:
+            _ensure_version_table(cursor)
+            return _run(conn, cursor, migrations, dry_run, allow_offline, out)
+        finally:
+            dialect.migration_unlock(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _run(conn, cursor, migrations, dry_run, allow_offline, out):
+    # Re-read under the lock: another process may have just finished
+    current = _current_version(cursor)
+    done = []
+
+    for m in migrations:
+        if m.version <= current:
+            continue
+        if dry_run:
+            out(f"-- {m.version:04d} {m.name}: {m.summary}")
+
+        ops = Operations(conn, dry_run, allow_offline, out)
+        started = time.perf_counter()
+        try:
+            m.module.upgrade(ops)
+        except OfflineRequired as e:
+            conn.rollback()
+            log.warning("Migration %04d %s needs --allow-offline: %s", m.version, m.name, e)
+            return done, m
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            ops.close()
+
+        if not dry_run:
+            cursor.execute(
+                "INSERT INTO schema_version (version, name, applied_at, duration_ms)"
+                " VALUES (%s, %s, %s, %s)",
+                (m.version, m.name, datetime.now().replace(microsecond=0),
+                 int((time.perf_counter() - started) * 1000)))
+            conn.commit()
+            log.info("Applied migration %04d %s", m.version, m.name)
+        done.append(m.version)
+
+    return done, None
@@ -0,0 +1,74 @@
+"""Baseline schema (schema.sql / schema_sqlite.sql).
+
+A new database gets the backend's whole schema file: tables, indexes,
+views and seed rows. A store created before migrations existed keeps
+its data: the columns added since its first release come first, then
+only the schema file's CREATE statements and the table_versions seed
+run (users / suppliers / products seeds are left out, so deleted
+default accounts and products don't come back), then the indexes
+declared inline on tables that already existed are added online.
+
+Either way every product then gets a stock snapshot at its current
+quantity, so point-in-time stock has a baseline for stock that was
+never written to the ledger.
+"""
+import re
+
+from config import MIGRATION_BATCH_SIZE
+
+SEED_RE = re.compile(r"^INSERT\b.*?\bINTO\s+(users|suppliers|products)\b", re.I | re.S)
+
+
+def upgrade(ops):
+    if not ops.table_exists("users"):
+        ops.run_script(ops.dialect.SCHEMA_FILE)
+        _seed_stock_snapshots(ops)
+        return
+
+    ops.add_column("products", "reorder_point", "INT NOT NULL DEFAULT 10")
+    ops.add_column("products", "reorder_qty", "INT NOT NULL DEFAULT 0")
+    if (ops.add_column("sale_items", "sale_date", "DATETIME NULL")
+            or ops.query("SELECT 1 AS x FROM sale_items WHERE sale_date IS NULL LIMIT 1")):
+        _backfill_sale_item_dates(ops)
+
+    ops.run_script(ops.dialect.SCHEMA_FILE, skip=SEED_RE.match)
+
+    ops.create_index("products", "idx_products_qty", ["quantity", "sku", "product_name"])
+    ops.create_index("products", "idx_products_name", ["product_name"])
+    ops.create_index("sales", "idx_sales_date", ["sale_date", "user_id", "total_amount"])
+    ops.create_index("sale_items", "idx_saleitems_product",
+                     ["product_id", "quantity_sold", "item_price"])
+
+    _seed_stock_snapshots(ops)
+
+
+def _seed_stock_snapshots(ops):
+    """Snapshot products that have none; quantity and last movement come from one statement."""
+    ops.execute("""
+        INSERT INTO stock_snapshots (product_id, last_movement_id, last_moved_at, quantity)
+        SELECT p.product_id,
+               COALESCE((SELECT MAX(m.movement_id) FROM stock_movements m
+                         WHERE m.product_id = p.product_id), 0),
+               (SELECT MAX(m.moved_at) FROM stock_movements m
+                WHERE m.product_id = p.product_id),
+               p.quantity
+        FROM products p
+        WHERE NOT EXISTS (SELECT 1 FROM stock_snapshots s WHERE s.product_id = p.product_id)
+    """)
+
+
+def _backfill_sale_item_dates(ops):
+    """Copy each sale's date onto its lines, one sale_id range per statement."""
+    bounds = ops.query("SELECT MIN(sale_id) AS first, MAX(sale_id) AS last FROM sale_items")[0]
+    if bounds["first"] is None:
+        return
+
+    start = bounds["first"]
+    while start <= bounds["last"]:
+        ops.execute("""
+            UPDATE sale_items
+            SET sale_date = (SELECT s.sale_date FROM sales s WHERE s.sale_id = sale_items.sale_id)
+            WHERE sale_id >= %s AND sale_id < %s AND sale_date IS NULL
+        """, (start, start + MIGRATION_BATCH_SIZE))
+        ops.conn.commit()
+        start += MIGRATION_BATCH_SIZE
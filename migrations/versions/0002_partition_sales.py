@@ -0,0 +1,57 @@
+"""Partition sales and sale_items by month (MySQL).
+
+Stores created before monthly partitioning have plain sales and
+sale_items tables with foreign keys. Partitioned InnoDB tables can't
+have foreign keys and need sale_date in every unique key, so this
+drops the foreign keys, widens both primary keys and rebuilds the
+tables into monthly partitions. The rebuild copies every row and
+blocks writes: run it with --allow-offline in a maintenance window.
+Nothing to do on SQLite or when the tables are already partitioned.
+"""
+from config import SALES_PARTITION_MONTHS_AHEAD
+
+PARTITIONS = "PARTITION BY RANGE COLUMNS (sale_date) (PARTITION p_future VALUES LESS THAN (MAXVALUE))"
+
+
+def upgrade(ops):
+    if not ops.dialect.PARTITIONED or _partitioned(ops, "sales"):
+        return
+
+    ops.require_offline("rebuilding sales and sale_items into partitions blocks writes")
+
+    for fk in ops.query("""
+        SELECT TABLE_NAME AS tbl, CONSTRAINT_NAME AS name
+        FROM information_schema.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE()
+          AND (TABLE_NAME IN ('sales', 'sale_items')
+               OR REFERENCED_TABLE_NAME IN ('sales', 'sale_items'))
+    """):
+        ops.execute(f"ALTER TABLE {fk['tbl']} DROP FOREIGN KEY {fk['name']}")
+
+    ops.execute(f"""
+        ALTER TABLE sale_items
+            MODIFY sale_date DATETIME NOT NULL,
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (sale_id, product_id, sale_date)
+        {PARTITIONS}
+    """)
+    ops.execute(f"""
+        ALTER TABLE sales
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (sale_id, sale_date)
+        {PARTITIONS}
+    """)
+
+    # Spread the existing history over monthly partitions
+    if ops.dry_run:
+        ops.out("-- then split p_future into monthly partitions (partition-sales)")
+    else:
+        from repositories.archive_repo import ensure_sales_partitions
+        ensure_sales_partitions(SALES_PARTITION_MONTHS_AHEAD)
+
+
+def _partitioned(ops, table):
+    return ops.query("""
+        SELECT COUNT(*) AS n FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    """, (table,))[0]["n"] > 0
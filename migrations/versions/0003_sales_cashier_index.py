@@ -0,0 +1,11 @@
+"""Index sales by cashier for the keyset-paginated /sales list.
+
+idx_sales_cashier (user_id, sale_id) serves one cashier's sales newest
+first. It covers idx_sales_user (user_id), which only SQLite stores
+have, so that one is dropped.
+"""
+
+
+def upgrade(ops):
+    ops.create_index("sales", "idx_sales_cashier", ["user_id", "sale_id"])
+    ops.drop_index("sales", "idx_sales_user")
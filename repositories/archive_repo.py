@@ -0,0 +1,170 @@
+from datetime import date
+
+from db import get_db_connection, run_in_transaction, dialect
+
+# ----------------------------------------------------
+# Monthly sales periods: partition upkeep and archival
+#
+# On MySQL sales and sale_items are range-partitioned by month on
+# sale_date; on SQLite a period is just a sale_date range. The
+# dialect hides the difference (see backends/__init__.py).
+#
+# Archiving a period never touches the rollup tables: the daily rows
+# and product_sales_totals keep counting archived sales, and the
+# period's per-product totals move into product_sales_archived so a
+# rebuild / reconcile still sees the whole history.
+# ----------------------------------------------------
+
+PARTITIONED_TABLES = ("sales", "sale_items")
+
+
+def _month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def _add_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def ensure_sales_partitions(months_ahead, first_month=None):
+    """Make sure monthly partitions exist through months_ahead months from now.
+
+    The first run starts at first_month (default: the oldest sale, or
+    this month) so existing history is spread over monthly partitions.
+    Returns the month starts added (always empty on SQLite).
+    """
+    if not dialect.PARTITIONED:
+        return []
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        existing = dialect.month_partitions(cursor, "sales")
+        if existing:
+            start = existing[-1][1]
+        else:
+            if first_month is None:
+                cursor.execute("SELECT MIN(sale_date) AS first FROM sales")
+                first = cursor.fetchone()["first"]
+                first_month = date.fromisoformat(str(first)[:10]) if first else date.today()
+            start = _month_start(first_month)
+
+        last = _add_months(date.today(), months_ahead)
+        months = []
+        month = start
+        while month <= last:
+            months.append(month)
+            month = _add_months(month, 1)
+
+        if months:
+            for table in PARTITIONED_TABLES:
+                dialect.add_month_partitions(cursor, table, months)
+    finally:
+        cursor.close()
+        conn.close()
+
+    return months
+
+
+def get_closed_periods(cutoff):
+    """[(name, start or None, end)] for periods that end on or before cutoff."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    periods = dialect.closed_periods(cursor, cutoff)
+
+    cursor.close()
+    conn.close()
+    return periods
+
+
+def _range_sql(column, start):
+    sql = f"{column} < %s"
+    if start is not None:
+        sql += f" AND {column} >= %s"
+    return sql
+
+
+def _range_params(start, end):
+    return (end,) if start is None else (end, start)
+
+
+def is_archived(name):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT 1 FROM sales_archive_log WHERE period = %s", (name,))
+    found = cursor.fetchone() is not None
+
+    cursor.close()
+    conn.close()
+    return found
+
+
+def record_archived_period(name, start, end, file_path):
+    """Log the period and fold its lines into product_sales_archived, atomically.
+
+    Returns the log row values, or None if the period was already logged
+    (so rerunning after a crash never counts a period twice).
+    """
+    params = _range_params(start, end)
+
+    def work(cursor):
+        cursor.execute("SELECT 1 FROM sales_archive_log WHERE period = %s", (name,))
+        if cursor.fetchone():
+            return None
+
+        cursor.execute(
+            "SELECT COUNT(*) AS sales_count FROM sales WHERE " + _range_sql("sale_date", start),
+            params)
+        sales_count = cursor.fetchone()["sales_count"]
+
+        cursor.execute(
+            "SELECT COUNT(*) AS line_count,"
+            " COALESCE(SUM(quantity_sold * item_price), 0) AS revenue"
+            " FROM sale_items WHERE " + _range_sql("sale_date", start),
+            params)
+        lines = cursor.fetchone()
+
+        cursor.execute("""
+            INSERT INTO product_sales_archived (product_id, units_sold, revenue)
+            SELECT product_id, SUM(quantity_sold), SUM(quantity_sold * item_price)
+            FROM sale_items
+            WHERE """ + _range_sql("sale_date", start) + """
+            GROUP BY product_id
+            """ + dialect.upsert(("product_id",)) + """
+                units_sold = units_sold + """ + dialect.excluded("units_sold") + """,
+                revenue = revenue + """ + dialect.excluded("revenue"), params)
+
+        cursor.execute("""
+            INSERT INTO sales_archive_log
+                (period, period_start, period_end, file_path, sales_count, line_count, revenue)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (name, start, end, file_path, sales_count,
+              lines["line_count"], lines["revenue"]))
+
+        return {
+            "period": name,
+            "sales": sales_count,
+            "lines": lines["line_count"],
+            "revenue": lines["revenue"],
+        }
+
+    return run_in_transaction(work)
+
+
+def drop_sales_period(name, start, end):
+    """Remove an archived period's rows (DROP PARTITION on MySQL)."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        for table in ("sale_items", "sales"):
+            dialect.drop_period(cursor, table, name, start, end)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
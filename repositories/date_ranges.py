@@ -0,0 +1,23 @@
+from db import dialect
+
+# ----------------------------------------------------
+# Half-open date range predicates
+#
+# Wrapping a column in DATE()/MONTH()/YEAR() hides it from the
+# optimizer; comparing the bare column against constant bounds
+# (start <= col < end) lets the database do an index range scan.
+# The "today" / "this month" bounds are dialect-specific.
+# ----------------------------------------------------
+
+
+def today_range(column):
+    return dialect.today_range(column)
+
+
+def this_month_range(column):
+    return dialect.this_month_range(column)
+
+
+def between_range(column):
+    """Predicate for caller-supplied bounds; bind (start, end) as parameters."""
+    return f"{column} >= %s AND {column} < %s"
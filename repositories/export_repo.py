@@ -0,0 +1,53 @@
+from db import get_read_connection
+from repositories.date_ranges import between_range
+
+EXPORT_COLUMNS = (
+    "sale_id", "sale_date", "sold_by", "product_name",
+    "sku", "quantity_sold", "item_price", "line_total",
+)
+
+
+def iter_sales_report(start, end, cashier=None, chunk_size=5000):
+    """Yield sales_report lines for start <= sale_date < end in chunks of tuples.
+
+    Uses an unbuffered cursor, so rows are pulled from the server as the
+    consumer asks for them and memory stays at one chunk. Reads the base
+    tables rather than the view so the range applies to sale_items'
+    own sale_date too and both tables prune to the requested months.
+    """
+    sql = """
+        SELECT s.sale_id, s.sale_date, u.username AS sold_by, p.product_name,
+               p.sku, si.quantity_sold, si.item_price,
+               si.quantity_sold * si.item_price AS line_total
+        FROM sales s
+        JOIN users u ON s.user_id = u.user_id
+        JOIN sale_items si ON si.sale_id = s.sale_id
+        JOIN products p ON si.product_id = p.product_id
+        WHERE """ + between_range("s.sale_date") + """
+          AND """ + between_range("si.sale_date")
+    params = [start, end, start, end]
+    if cashier:
+        sql += " AND u.username = %s"
+        params.append(cashier)
+    sql += " ORDER BY s.sale_date, s.sale_id"
+
+    conn = get_read_connection()
+    cursor = conn.cursor(buffered=False)
+    finished = False
+
+    try:
+        cursor.execute(sql, tuple(params))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            # Consumer stopped early: unread rows are still on the wire,
+            # so drop the connection rather than drain it
+            conn.discard()
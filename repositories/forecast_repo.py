@@ -0,0 +1,95 @@
+from db import get_db_connection, get_read_connection
+from repositories.date_ranges import between_range
+
+# ----------------------------------------------------
+# Demand forecast storage
+#   Inputs are read in two statements (catalog + daily units from the
+#   sales_daily_product rollup); results replace demand_forecast and
+#   supplier_order_suggestions in one transaction, so the dashboard
+#   always sees a complete run.
+# ----------------------------------------------------
+
+WRITE_CHUNK = 1000
+
+
+def get_forecast_products():
+    """(product_id, supplier_id, quantity, reorder_qty) for the whole catalog, by id."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT product_id, supplier_id, quantity, reorder_qty
+        FROM products
+        ORDER BY product_id
+    """)
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def get_daily_units(start, end):
+    """(product_id, sale_day, units_sold) for start <= sale_day < end."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        SELECT product_id, sale_day, units_sold
+        FROM sales_daily_product
+        WHERE """ + between_range("sale_day"), (start, end))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def save_forecast(product_rows, supplier_rows):
+    """Replace both forecast tables.
+
+    product_rows:  [(product_id, avg_daily, smoothed_daily, days_of_cover, suggested_qty)]
+    supplier_rows: [(supplier_id, product_count, units, min_days_of_cover)]
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("DELETE FROM demand_forecast")
+        for i in range(0, len(product_rows), WRITE_CHUNK):
+            cursor.executemany("""
+                INSERT INTO demand_forecast
+                    (product_id, avg_daily, smoothed_daily, days_of_cover, suggested_qty)
+                VALUES (%s, %s, %s, %s, %s)
+            """, product_rows[i:i + WRITE_CHUNK])
+
+        cursor.execute("DELETE FROM supplier_order_suggestions")
+        if supplier_rows:
+            cursor.executemany("""
+                INSERT INTO supplier_order_suggestions
+                    (supplier_id, product_count, units, min_days_of_cover)
+                VALUES (%s, %s, %s, %s)
+            """, supplier_rows)
+
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_supplier_suggestions():
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT o.supplier_id, s.supplier_name, o.product_count, o.units,
+               o.min_days_of_cover, o.computed_at
+        FROM supplier_order_suggestions o
+        LEFT JOIN suppliers s ON o.supplier_id = s.supplier_id
+        ORDER BY o.units DESC
+    """)
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
@@ -0,0 +1,99 @@
+from db import dialect
+from repositories.stock_repo import record_movements, INITIAL, IMPORT
+
+# ----------------------------------------------------
+# Bulk catalog writes used by the CSV importer.
+# All helpers take the caller's cursor; the importer commits per chunk.
+# ----------------------------------------------------
+
+
+def _in_list(values):
+    return "(" + ", ".join(["%s"] * len(values)) + ")"
+
+
+def find_supplier_ids(cursor, names):
+    """Map supplier_name -> supplier_id for the given names in one query."""
+    names = sorted(set(names))
+    if not names:
+        return {}
+
+    cursor.execute(
+        "SELECT supplier_id, supplier_name FROM suppliers WHERE supplier_name IN "
+        + _in_list(names)
+        + " ORDER BY supplier_id",
+        tuple(names)
+    )
+    found = {}
+    for row in cursor.fetchall():
+        # Duplicate names: the oldest supplier wins, matching the dropdown order
+        found.setdefault(row["supplier_name"], row["supplier_id"])
+    return found
+
+
+def _quantities_by_sku(cursor, skus, lock=False):
+    """{sku: (product_id, quantity)} for the given SKUs."""
+    cursor.execute(
+        "SELECT product_id, sku, quantity FROM products WHERE sku IN " + _in_list(skus)
+        + " ORDER BY product_id " + (dialect.for_update() if lock else ""),
+        tuple(skus)
+    )
+    return {row["sku"]: (row["product_id"], row["quantity"]) for row in cursor.fetchall()}
+
+
+def upsert_products(cursor, rows):
+    """rows: [(name, sku, price, qty, supplier_id)]; insert or update by SKU.
+
+    Quantity changes (and new products' opening stock) are written to
+    the stock ledger; existing rows are locked first so the deltas are
+    exact.
+    """
+    skus = sorted({row[1] for row in rows})
+    before = _quantities_by_sku(cursor, skus, lock=True)
+
+    cursor.executemany("""
+        INSERT INTO products (product_name, sku, price, quantity, supplier_id)
+        VALUES (%s, %s, %s, %s, %s)
+        """ + dialect.upsert(("sku",)) + """
+            product_name = """ + dialect.excluded("product_name") + """,
+            price = """ + dialect.excluded("price") + """,
+            quantity = """ + dialect.excluded("quantity") + """,
+            supplier_id = """ + dialect.excluded("supplier_id"), rows)
+
+    after = _quantities_by_sku(cursor, skus)
+    record_movements(cursor, [
+        (product_id, qty - before[sku][1], IMPORT, None) if sku in before
+        else (product_id, qty, INITIAL, None)
+        for sku, (product_id, qty) in after.items()
+    ])
+
+
+def upsert_suppliers(cursor, rows):
+    """rows: [(name, contact)]; update contact for known names, insert the rest.
+
+    Returns (inserted, updated).
+    """
+    contacts = {}
+    for name, contact in rows:
+        contacts[name] = contact
+
+    existing = find_supplier_ids(cursor, contacts.keys())
+
+    updates = [(existing[name], contact) for name, contact in contacts.items() if name in existing]
+    if updates:
+        case_sql = " ".join(["WHEN %s THEN %s"] * len(updates))
+        params = [v for pair in updates for v in pair]
+        ids = [supplier_id for supplier_id, _ in updates]
+        cursor.execute(
+            "UPDATE suppliers SET contact_info = CASE supplier_id " + case_sql + " END"
+            " WHERE supplier_id IN " + _in_list(ids),
+            tuple(params + ids)
+        )
+
+    inserts = [(name, contact) for name, contact in contacts.items() if name not in existing]
+    if inserts:
+        cursor.executemany("""
+            INSERT INTO suppliers (supplier_name, contact_info)
+            VALUES (%s, %s)
+        """, inserts)
+
+    return len(inserts), len(updates)
@@ -0,0 +1,164 @@
+from datetime import datetime
+
+from db import get_db_connection
+
+# ----------------------------------------------------
+# Background job rows (see jobs.py)
+#   Always read and written on the primary: pollers must see progress
+#   as soon as it is written.
+#   Status changes are conditional on the current status, so a job
+#   cancelled while queued can never be claimed afterwards.
+# ----------------------------------------------------
+
+def _execute(sql, params):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(sql, params)
+    changed = cursor.rowcount
+    conn.commit()
+
+    cursor.close()
+    conn.close()
+    return changed
+
+
+def create_job(job_type, params_json, owner, user_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        INSERT INTO jobs (job_type, params, owner, submitted_by)
+        VALUES (%s, %s, %s, %s)
+    """, (job_type, params_json, owner, user_id))
+    job_id = cursor.lastrowid
+    conn.commit()
+
+    cursor.close()
+    conn.close()
+    return job_id
+
+
+def claim_job(job_id):
+    """queued -> running; False if the job was cancelled before it started."""
+    return _execute("""
+        UPDATE jobs
+        SET status = 'running', started_at = %s
+        WHERE job_id = %s AND status = 'queued' AND cancel_requested = 0
+    """, (datetime.now(), job_id)) == 1
+
+
+def update_progress(job_id, done, total, message):
+    """Record progress; returns True if cancellation has been requested."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        UPDATE jobs
+        SET progress = %s, total = %s, message = %s
+        WHERE job_id = %s
+    """, (done, total, message, job_id))
+    cursor.execute("SELECT cancel_requested FROM jobs WHERE job_id = %s", (job_id,))
+    row = cursor.fetchone()
+    conn.commit()
+
+    cursor.close()
+    conn.close()
+    return bool(row and row["cancel_requested"])
+
+
+def is_cancel_requested(job_id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("SELECT cancel_requested FROM jobs WHERE job_id = %s", (job_id,))
+    row = cursor.fetchone()
+
+    cursor.close()
+    conn.close()
+    return bool(row and row["cancel_requested"])
+
+
+def finish_job(job_id, status, message=None, result_json=None, result_path=None):
+    _execute("""
+        UPDATE jobs
+        SET status = %s, message = %s, result = %s, result_path = %s, finished_at = %s
+        WHERE job_id = %s AND status = 'running'
+    """, (status, message, result_json, result_path, datetime.now(), job_id))
+
+
+def request_cancel(job_id):
+    """Flag an active job; a queued one is cancelled on the spot.
+
+    Returns False if the job doesn't exist or has already finished.
+    """
+    if _execute(
+            "UPDATE jobs SET cancel_requested = 1"
+            " WHERE job_id = %s AND status IN ('queued', 'running')",
+            (job_id,)) != 1:
+        return False
+
+    _execute("""
+        UPDATE jobs
+        SET status = 'cancelled', message = 'Cancelled before it started.', finished_at = %s
+        WHERE job_id = %s AND status = 'queued'
+    """, (datetime.now(), job_id))
+    return True
+
+
+def get_job(job_id):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("SELECT * FROM jobs WHERE job_id = %s", (job_id,))
+    row = cursor.fetchone()
+
+    cursor.close()
+    conn.close()
+    return row
+
+
+def get_recent_jobs(limit=50):
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT job_id, job_type, status, progress, total, message,
+               created_at, started_at, finished_at
+        FROM jobs
+        ORDER BY job_id DESC
+        LIMIT %s
+    """, (limit,))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def get_owners_with_active_jobs(host):
+    """Distinct owners on this host that still have queued / running jobs."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT DISTINCT owner FROM jobs
+        WHERE owner LIKE %s AND status IN ('queued', 'running')
+    """, (host + ":%",))
+    owners = [r["owner"] for r in cursor.fetchall()]
+
+    cursor.close()
+    conn.close()
+    return owners
+
+
+def fail_jobs_of(owners, message):
+    """Mark every active job of the given (dead) owners failed."""
+    if not owners:
+        return 0
+
+    return _execute(
+        "UPDATE jobs SET status = 'failed', message = %s, finished_at = %s"
+        " WHERE owner IN (" + ", ".join(["%s"] * len(owners)) + ")"
+        " AND status IN ('queued', 'running')",
+        (message, datetime.now(), *owners))
@@ -0,0 +1,132 @@
+from datetime import datetime
+
+from db import get_read_connection, run_in_transaction, dialect
+from repositories.stock_repo import INITIAL
+
+# ----------------------------------------------------
+# Stock ledger: snapshots and point-in-time stock
+#
+# stock_movements is written by stock_repo / product_repo /
+# import_repo in the same transaction as each stock change. A
+# product's movements are only written while its products row is
+# locked, so per product movement_id and moved_at both follow commit
+# order. Stock at time T is therefore
+#
+#   nearest snapshot taken at or before T
+#   + movements after its last_movement_id with moved_at <= T
+#
+# and the replay is an index range on (product_id, moved_at) from the
+# snapshot's last_moved_at to T, not a scan of the product's history.
+# Without a snapshot the replay starts from nothing, which is only
+# right for products whose first movement is their INITIAL stock;
+# stock that predates the ledger is covered by a snapshot instead
+# (migration 0001 seeds one per product).
+# ----------------------------------------------------
+
+WRITE_CHUNK = 1000
+
+# Replay lower bound for products without a snapshot
+LEDGER_START = datetime(1970, 1, 1)
+
+
+def take_stock_snapshots():
+    """Snapshot every product whose stock moved since its last snapshot.
+
+    Products never snapshotted are included even without movements, so
+    stock that predates the ledger gets a baseline. The catalog is read
+    without locking; each row's quantity and last movement come from
+    the same statement, so they always agree. Returns the rows written.
+    """
+    def work(cursor):
+        cursor.execute("""
+            SELECT p.product_id, p.quantity,
+                   (SELECT MAX(m.movement_id) FROM stock_movements m
+                    WHERE m.product_id = p.product_id) AS last_movement_id,
+                   (SELECT MAX(m.moved_at) FROM stock_movements m
+                    WHERE m.product_id = p.product_id) AS last_moved_at,
+                   (SELECT MAX(s.last_movement_id) FROM stock_snapshots s
+                    WHERE s.product_id = p.product_id) AS snapped
+            FROM products p
+            ORDER BY p.product_id
+        """)
+        rows = [
+            (r["product_id"], r["last_movement_id"] or 0, r["last_moved_at"], r["quantity"])
+            for r in cursor.fetchall()
+            if r["snapped"] is None or r["snapped"] != (r["last_movement_id"] or 0)
+        ]
+
+        for i in range(0, len(rows), WRITE_CHUNK):
+            cursor.executemany("""
+                INSERT INTO stock_snapshots
+                    (product_id, last_movement_id, last_moved_at, quantity)
+                VALUES (%s, %s, %s, %s)
+                """ + dialect.upsert(("product_id", "last_movement_id")) + """
+                    quantity = """ + dialect.excluded("quantity"),
+                rows[i:i + WRITE_CHUNK])
+
+        return len(rows)
+
+    return run_in_transaction(work)
+
+
+def get_stock_at(at, after_id=None, limit=50, product_id=None):
+    """One keyset page of stock levels as of `at`, plus the next cursor.
+
+    quantity is None when the ledger cannot tell: there is no snapshot
+    at or before `at` and either the product didn't exist yet or its
+    history doesn't start with an INITIAL movement (its stock predates
+    the ledger).
+    """
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    where = ["p.product_id > %s"]
+    params = [LEDGER_START, at, at, after_id or 0]
+    if product_id is not None:
+        where.append("p.product_id = %s")
+        params.append(product_id)
+    params.append(limit + 1)
+
+    cursor.execute("""
+        SELECT p.product_id, p.product_name, p.sku,
+               p.quantity AS current_quantity,
+               snap.quantity AS snapshot_quantity,
+               snap.taken_at AS snapshot_at,
+               (SELECT SUM(m.delta) FROM stock_movements m
+                WHERE m.product_id = p.product_id
+                  AND m.moved_at >= COALESCE(snap.last_moved_at, %s)
+                  AND m.moved_at <= %s
+                  AND m.movement_id > COALESCE(snap.last_movement_id, 0)) AS moved,
+               (SELECT m.reason FROM stock_movements m
+                WHERE m.product_id = p.product_id
+                ORDER BY m.movement_id
+                LIMIT 1) AS first_reason
+        FROM products p
+        LEFT JOIN stock_snapshots snap
+               ON snap.product_id = p.product_id
+              AND snap.last_movement_id = (
+                  SELECT MAX(s.last_movement_id) FROM stock_snapshots s
+                  WHERE s.product_id = p.product_id AND s.taken_at <= %s)
+        WHERE """ + " AND ".join(where) + """
+        ORDER BY p.product_id
+        LIMIT %s
+    """, tuple(params))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["product_id"]
+
+    for row in rows:
+        snapshot, moved = row.pop("snapshot_quantity"), row.pop("moved")
+        opened = row.pop("first_reason") == INITIAL
+        if snapshot is None and (moved is None or not opened):
+            row["quantity"] = None
+        else:
+            row["quantity"] = (snapshot or 0) + int(moved or 0)
+
+    return rows, next_cursor
@@ -0,0 +1,93 @@
+from db import get_db_connection, dialect
+from config import LOW_STOCK_THRESHOLD
+from repositories.date_ranges import today_range, this_month_range
+
+# ----------------------------------------------------
+# EXPLAIN checks for the reporting / dashboard queries.
+# Each entry: (label, sql, params, table, expected index)
+# ----------------------------------------------------
+INDEX_CHECKS = [
+    (
+        "today's sales on sales.sale_date",
+        "SELECT COUNT(*), SUM(total_amount) FROM sales WHERE " + today_range("sale_date"),
+        (),
+        "sales",
+        "idx_sales_date",
+    ),
+    (
+        "this month's sales on sales.sale_date",
+        "SELECT COUNT(*), SUM(total_amount) FROM sales WHERE " + this_month_range("sale_date"),
+        (),
+        "sales",
+        "idx_sales_date",
+    ),
+    (
+        "one cashier's sales, newest first",
+        "SELECT sale_id, total_amount FROM sales WHERE user_id = %s"
+        " ORDER BY sale_id DESC LIMIT 50",
+        (1,),
+        "sales",
+        "idx_sales_cashier",
+    ),
+    (
+        "low stock products",
+        "SELECT product_name, sku, quantity FROM products WHERE quantity < %s ORDER BY quantity",
+        (LOW_STOCK_THRESHOLD,),
+        "products",
+        "idx_products_qty",
+    ),
+    (
+        "units sold per product",
+        "SELECT product_id, SUM(quantity_sold) FROM sale_items GROUP BY product_id",
+        (),
+        "sale_items",
+        "idx_saleitems_product",
+    ),
+    (
+        "today's rollup rows",
+        "SELECT SUM(revenue) FROM sales_daily_product WHERE " + today_range("sale_day"),
+        (),
+        "sales_daily_product",
+        "PRIMARY",
+    ),
+    (
+        "top sellers from product totals",
+        "SELECT product_id, units_sold FROM product_sales_totals "
+        "WHERE units_sold > 0 ORDER BY units_sold DESC LIMIT 10",
+        (),
+        "product_sales_totals",
+        "idx_pst_units",
+    ),
+    (
+        "stock ledger replay since a snapshot",
+        "SELECT SUM(delta) FROM stock_movements "
+        "WHERE product_id = %s AND moved_at >= %s AND moved_at <= %s AND movement_id > %s",
+        (1, "2024-01-01 00:00:00", "2024-01-08 00:00:00", 0),
+        "stock_movements",
+        "idx_movements_time",
+    ),
+]
+
+
+def explain_index_usage():
+    """Run EXPLAIN for every INDEX_CHECKS query and report the index the planner picks."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    results = []
+    for label, sql, params, table, expected in INDEX_CHECKS:
+        key, access, extra = dialect.explain(cursor, sql, params, table)
+
+        results.append({
+            "check": label,
+            "table": table,
+            "expected": expected,
+            "key": key,
+            "type": access,
+            "extra": extra,
+            "ok": key == expected and access != "ALL",
+        })
+
+    cursor.close()
+    conn.close()
+    return results
@@ -1,7 +1,9 @@
-from db import get_db_connection
+from db import get_db_connection, get_read_connection, run_in_transaction, dialect
+from config import LOW_STOCK_THRESHOLD
+from repositories.stock_repo import record_movements, INITIAL, ADJUST
 
 def get_all_products():
-    conn = get_db_connection()
+    conn = get_read_connection()
     cursor = conn.cursor(dictionary=True)
 
     cursor.execute("""
@@ -17,7 +19,127 @@ def get_all_products():
     return rows
 
 
+def _like_prefix(term):
+    """LIKE pattern matching values that start with term; use with ESCAPE '!'.
+
+    '!' rather than backslash so the same SQL works on MySQL and SQLite.
+    """
+    escaped = (term.replace("!", "!!")
+                   .replace("%", "!%")
+                   .replace("_", "!_"))
+    return escaped + "%"
+
+
+def get_products_page(after_id=None, limit=50, supplier_id=None,
+                      name_prefix=None, low_stock=False):
+    """One page of products, newest first, using product_id as a keyset cursor.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    where = []
+    params = []
+
+    if after_id is not None:
+        where.append("p.product_id < %s")
+        params.append(after_id)
+    if supplier_id is not None:
+        where.append("p.supplier_id = %s")
+        params.append(supplier_id)
+    if name_prefix:
+        where.append("p.product_name LIKE %s ESCAPE '!'")
+        params.append(_like_prefix(name_prefix))
+    if low_stock:
+        where.append("p.quantity < %s")
+        params.append(LOW_STOCK_THRESHOLD)
+
+    sql = """
+        SELECT p.*, s.supplier_name
+        FROM products p
+        LEFT JOIN suppliers s ON p.supplier_id = s.supplier_id
+    """
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # Fetch one extra row to know whether another page exists
+    sql += " ORDER BY p.product_id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute(sql, tuple(params))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["product_id"]
+    return rows, next_cursor
+
+
+def search_products(term, limit):
+    """Ranked typeahead: exact SKU, then SKU prefix, then name prefix.
+
+    Each branch is an index range read (sku UNIQUE, idx_products_name)
+    capped at `limit`, so cost doesn't grow with catalog size.
+    """
+    pattern = _like_prefix(term)
+
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    # Derived tables (not parenthesized UNION members) so SQLite accepts
+    # the per-branch ORDER BY / LIMIT too
+    cursor.execute("""
+        SELECT * FROM (
+            SELECT * FROM (
+                SELECT 0 AS match_rank, product_id, product_name, sku, price, quantity
+                FROM products
+                WHERE sku = %s
+            ) AS exact_sku
+            UNION ALL
+            SELECT * FROM (
+                SELECT 1 AS match_rank, product_id, product_name, sku, price, quantity
+                FROM products
+                WHERE sku LIKE %s ESCAPE '!' AND sku <> %s
+                ORDER BY sku
+                LIMIT %s
+            ) AS sku_prefix
+            UNION ALL
+            SELECT * FROM (
+                SELECT 2 AS match_rank, product_id, product_name, sku, price, quantity
+                FROM products
+                WHERE product_name LIKE %s ESCAPE '!'
+                ORDER BY product_name
+                LIMIT %s
+            ) AS name_prefix
+        ) AS ranked
+        ORDER BY match_rank,
+                 CASE WHEN match_rank = 1 THEN sku ELSE product_name END
+    """, (term, pattern, term, limit, pattern, limit))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+
+    # A product can match more than one branch; keep its best rank
+    results = []
+    seen = set()
+    for row in rows:
+        if row["product_id"] in seen:
+            continue
+        seen.add(row["product_id"])
+        results.append(row)
+        if len(results) == limit:
+            break
+    return results
+
+
 def get_product(product_id):
+    # Primary, like get_product_by_sku: both fill the catalog cache, which
+    # must not be repopulated from a lagging replica
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
@@ -29,41 +151,69 @@ def get_product(product_id):
     return row
 
 
-def add_product(name, sku, price, qty, supplier_id):
+def get_product_by_sku(sku):
     conn = get_db_connection()
-    cursor = conn.cursor()
+    cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("""
-        INSERT INTO products (product_name, sku, price, quantity, supplier_id)
-        VALUES (%s, %s, %s, %s, %s)
-    """, (name, sku, price, qty, supplier_id))
+    cursor.execute("SELECT * FROM products WHERE sku=%s", (sku,))
+    row = cursor.fetchone()
 
-    conn.commit()
     cursor.close()
     conn.close()
+    return row
 
 
-def update_product(product_id, name, sku, price, qty, supplier_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def add_product(name, sku, price, qty, supplier_id, reorder_point, reorder_qty):
+    def work(cursor):
+        cursor.execute("""
+            INSERT INTO products (product_name, sku, price, quantity, supplier_id,
+                                  reorder_point, reorder_qty)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (name, sku, price, qty, supplier_id, reorder_point, reorder_qty))
+        record_movements(cursor, [(cursor.lastrowid, qty, INITIAL, None)])
 
-    cursor.execute("""
-        UPDATE products
-        SET product_name=%s, sku=%s, price=%s, quantity=%s, supplier_id=%s
-        WHERE product_id=%s
-    """, (name, sku, price, qty, supplier_id, product_id))
+    run_in_transaction(work)
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+
+def update_product(product_id, name, sku, price, qty, supplier_id,
+                   reorder_point, reorder_qty):
+    """Edit a product; a changed quantity is ledgered as an adjustment."""
+    def work(cursor):
+        cursor.execute(
+            "SELECT quantity FROM products WHERE product_id=%s " + dialect.for_update(),
+            (product_id,))
+        row = cursor.fetchone()
+        if not row:
+            return
+
+        cursor.execute("""
+            UPDATE products
+            SET product_name=%s, sku=%s, price=%s, quantity=%s, supplier_id=%s,
+                reorder_point=%s, reorder_qty=%s
+            WHERE product_id=%s
+        """, (name, sku, price, qty, supplier_id, reorder_point, reorder_qty, product_id))
+        record_movements(cursor, [(product_id, qty - row["quantity"], ADJUST, None)])
+
+    run_in_transaction(work)
 
 
 def delete_product(product_id):
+    """Delete a product with no sale lines; False if it has any (or doesn't exist).
+
+    sale_items is partitioned and so has no foreign key to products;
+    this check stands in for the old ON DELETE RESTRICT.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    cursor.execute("DELETE FROM products WHERE product_id=%s", (product_id,))
+    cursor.execute("""
+        DELETE FROM products
+        WHERE product_id=%s
+          AND NOT EXISTS (SELECT 1 FROM sale_items WHERE product_id=%s)
+    """, (product_id, product_id))
+    deleted = cursor.rowcount == 1
     conn.commit()
 
     cursor.close()
     conn.close()
+    return deleted
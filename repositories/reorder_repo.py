@@ -0,0 +1,153 @@
+from db import get_read_connection, run_in_transaction, dialect
+
+# ----------------------------------------------------
+# Low-stock alerts and suggested purchase orders
+#
+# stock_alerts rows are raised by stock_repo when a sale takes a
+# product below its reorder_point. suggest_purchase_orders() is the
+# batch side: it drops alerts for products that have been restocked,
+# picks up products that went low without a sale (edits, imports,
+# changed reorder points) and groups the uncovered alerts by supplier
+# into suggested purchase orders.
+# ----------------------------------------------------
+
+def _in_list(values):
+    return "(" + ", ".join(["%s"] * len(values)) + ")"
+
+
+def get_open_alerts():
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT p.product_id, p.product_name, p.sku, p.quantity,
+               p.reorder_point, a.raised_at, a.po_id
+        FROM stock_alerts a
+        JOIN products p ON a.product_id = p.product_id
+        WHERE p.quantity < p.reorder_point
+        ORDER BY p.quantity ASC, p.product_id
+    """)
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def get_suggested_orders(limit=20):
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT po.po_id, po.created_at, s.supplier_name,
+               COUNT(l.product_id) AS line_count,
+               COALESCE(SUM(l.quantity), 0) AS units
+        FROM purchase_orders po
+        LEFT JOIN suppliers s ON po.supplier_id = s.supplier_id
+        LEFT JOIN purchase_order_lines l ON l.po_id = po.po_id
+        WHERE po.status = 'suggested'
+        GROUP BY po.po_id, po.created_at, s.supplier_name
+        ORDER BY po.po_id DESC
+        LIMIT %s
+    """, (limit,))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def _order_qty(row):
+    """reorder_qty, the forecast quantity, or enough to get back to the
+    reorder point, whichever is largest."""
+    return max(row["reorder_qty"], row["forecast_qty"],
+               row["reorder_point"] - row["quantity"])
+
+
+def _clear_recovered_alerts(cursor):
+    """Drop alerts for products back at/above their reorder point.
+
+    The condition is in the DELETE itself, so an alert a sale raises
+    meanwhile can't be dropped on the strength of an earlier read.
+    """
+    cursor.execute("""
+        DELETE FROM stock_alerts
+        WHERE product_id IN (
+            SELECT product_id FROM products WHERE quantity >= reorder_point
+        )
+    """)
+    return cursor.rowcount
+
+
+def suggest_purchase_orders():
+    """Refresh stock_alerts and turn uncovered alerts into one suggested order per supplier.
+
+    Clearing recovered alerts share-locks the products rows it checks
+    (MySQL), so it commits on its own straight away; the rest only
+    reads the catalog, so cashiers are not blocked while the job runs.
+    Returns (cleared, raised, orders).
+    """
+    # 1. Alerts for products that have been restocked
+    cleared = run_in_transaction(_clear_recovered_alerts)
+
+    def work(cursor):
+        # 2. Low products with no alert (stock set directly, not sold down)
+        cursor.execute("""
+            SELECT p.product_id, p.quantity
+            FROM products p
+            LEFT JOIN stock_alerts a ON a.product_id = p.product_id
+            WHERE p.quantity < p.reorder_point
+              AND a.product_id IS NULL
+        """)
+        missing = [(r["product_id"], r["quantity"]) for r in cursor.fetchall()]
+        if missing:
+            cursor.executemany("""
+                INSERT INTO stock_alerts (product_id, quantity)
+                VALUES (%s, %s)
+                """ + dialect.upsert(("product_id",)) + """
+                    quantity = """ + dialect.excluded("quantity"), missing)
+
+        # 3. Uncovered alerts grouped by supplier
+        cursor.execute("""
+            SELECT a.product_id, p.supplier_id, p.quantity,
+                   p.reorder_point, p.reorder_qty,
+                   COALESCE(f.suggested_qty, 0) AS forecast_qty
+            FROM stock_alerts a
+            JOIN products p ON a.product_id = p.product_id
+            LEFT JOIN demand_forecast f ON f.product_id = a.product_id
+            WHERE a.po_id IS NULL
+              AND p.quantity < p.reorder_point
+            ORDER BY p.supplier_id, a.product_id
+        """)
+        by_supplier = {}
+        for row in cursor.fetchall():
+            by_supplier.setdefault(row["supplier_id"], []).append(
+                (row["product_id"], _order_qty(row)))
+
+        orders = []
+        for supplier_id, lines in by_supplier.items():
+            cursor.execute(
+                "INSERT INTO purchase_orders (supplier_id) VALUES (%s)", (supplier_id,))
+            po_id = cursor.lastrowid
+
+            cursor.executemany("""
+                INSERT INTO purchase_order_lines (po_id, product_id, quantity)
+                VALUES (%s, %s, %s)
+            """, [(po_id, product_id, qty) for product_id, qty in lines])
+
+            ids = [product_id for product_id, _ in lines]
+            cursor.execute(
+                "UPDATE stock_alerts SET po_id = %s WHERE product_id IN " + _in_list(ids),
+                (po_id, *ids))
+
+            orders.append({
+                "po_id": po_id,
+                "supplier_id": supplier_id,
+                "lines": len(lines),
+                "units": sum(qty for _, qty in lines),
+            })
+
+        return len(missing), orders
+
+    raised, orders = run_in_transaction(work)
+    return cleared, raised, orders
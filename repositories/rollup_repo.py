@@ -0,0 +1,346 @@
+from datetime import date
+
+from db import get_db_connection, get_read_connection, run_in_transaction, dialect, prepared_statement
+from repositories.date_ranges import today_range, this_month_range
+
+# ----------------------------------------------------
+# Sales rollups
+#   sales_daily_product  : sale day x product  (units, revenue)
+#   sales_daily_cashier  : sale day x cashier  (sales, units, revenue)
+#   product_sales_totals : product, all time   (units, revenue)
+#
+# The write helpers take the caller's cursor so the rollup changes
+# commit (or roll back) together with the sale item change. Every such
+# change also locks the product row (stock update), so the totals row
+# adds no new lock contention.
+# ----------------------------------------------------
+
+_UPSERT_PRODUCT_DAY = dialect.upsert(("sale_day", "product_id")) + """
+            units_sold = units_sold + """ + dialect.excluded("units_sold") + """,
+            revenue = revenue + """ + dialect.excluded("revenue")
+
+_UPSERT_CASHIER_DAY = dialect.upsert(("sale_day", "user_id")) + """
+            units_sold = units_sold + """ + dialect.excluded("units_sold") + """,
+            revenue = revenue + """ + dialect.excluded("revenue")
+
+_UPSERT_PRODUCT_TOTAL = dialect.upsert(("product_id",)) + """
+            units_sold = units_sold + """ + dialect.excluded("units_sold") + """,
+            revenue = revenue + """ + dialect.excluded("revenue")
+
+
+_ADD_PRODUCT_DAY = prepared_statement("rollup.product_day", """
+    INSERT INTO sales_daily_product (sale_day, product_id, units_sold, revenue)
+    SELECT DATE(s.sale_date), %s, %s, %s
+    FROM sales s
+    WHERE s.sale_id = %s AND s.sale_date = %s
+    """ + _UPSERT_PRODUCT_DAY)
+
+_ADD_CASHIER_DAY = prepared_statement("rollup.cashier_day", """
+    INSERT INTO sales_daily_cashier (sale_day, user_id, sales_count, units_sold, revenue)
+    SELECT DATE(s.sale_date), s.user_id, 0, %s, %s
+    FROM sales s
+    WHERE s.sale_id = %s AND s.sale_date = %s
+    """ + _UPSERT_CASHIER_DAY)
+
+_ADD_PRODUCT_TOTAL = prepared_statement("rollup.product_total", """
+    INSERT INTO product_sales_totals (product_id, units_sold, revenue)
+    VALUES (%s, %s, %s)
+    """ + _UPSERT_PRODUCT_TOTAL)
+
+
+def apply_sale_item_change(cursor, sale_id, sale_date, product_id, qty_delta, amount_delta):
+    cursor.execute_prepared(_ADD_PRODUCT_DAY, (product_id, qty_delta, amount_delta, sale_id, sale_date))
+    cursor.execute_prepared(_ADD_CASHIER_DAY, (qty_delta, amount_delta, sale_id, sale_date))
+    cursor.execute_prepared(_ADD_PRODUCT_TOTAL, (product_id, qty_delta, amount_delta))
+
+
+def record_new_sale(cursor, sale_id):
+    cursor.execute("""
+        INSERT INTO sales_daily_cashier (sale_day, user_id, sales_count, units_sold, revenue)
+        SELECT DATE(s.sale_date), s.user_id, 1, 0, 0
+        FROM sales s
+        WHERE s.sale_id = %s
+        """ + dialect.upsert(("sale_day", "user_id")) + """
+            sales_count = sales_count + 1
+    """, (sale_id,))
+
+
+def apply_new_sale_items(cursor, sale_id):
+    """Fold every line of a freshly inserted sale into the rollups (three statements)."""
+    cursor.execute("""
+        INSERT INTO sales_daily_product (sale_day, product_id, units_sold, revenue)
+        SELECT DATE(s.sale_date), si.product_id, si.quantity_sold,
+               si.quantity_sold * si.item_price
+        FROM sales s
+        JOIN sale_items si ON s.sale_id = si.sale_id
+        WHERE s.sale_id = %s
+        """ + _UPSERT_PRODUCT_DAY, (sale_id,))
+
+    cursor.execute("""
+        INSERT INTO sales_daily_cashier (sale_day, user_id, sales_count, units_sold, revenue)
+        SELECT DATE(s.sale_date), s.user_id, 1,
+               COALESCE(SUM(si.quantity_sold), 0),
+               COALESCE(SUM(si.quantity_sold * si.item_price), 0)
+        FROM sales s
+        LEFT JOIN sale_items si ON s.sale_id = si.sale_id
+        WHERE s.sale_id = %s
+        GROUP BY s.sale_id
+        """ + dialect.upsert(("sale_day", "user_id")) + """
+            sales_count = sales_count + 1,
+            units_sold = units_sold + """ + dialect.excluded("units_sold") + """,
+            revenue = revenue + """ + dialect.excluded("revenue"), (sale_id,))
+
+    cursor.execute("""
+        INSERT INTO product_sales_totals (product_id, units_sold, revenue)
+        SELECT product_id, quantity_sold, quantity_sold * item_price
+        FROM sale_items
+        WHERE sale_id = %s
+        """ + _UPSERT_PRODUCT_TOTAL, (sale_id,))
+
+
+def archive_horizon(cursor):
+    """Start of the live sales history: the end of the newest archived
+    period as a date, or None if nothing has been archived."""
+    cursor.execute("SELECT MAX(period_end) AS horizon FROM sales_archive_log")
+    row = cursor.fetchone()
+    horizon = row["horizon"] if isinstance(row, dict) else row[0]
+    return date.fromisoformat(str(horizon)[:10]) if horizon else None
+
+
+def _lifetime_lines(where=""):
+    """(product_id, units, revenue) rows for live sale_items plus archived totals."""
+    return """
+        SELECT product_id, quantity_sold AS units, quantity_sold * item_price AS revenue
+        FROM sale_items """ + where + """
+        UNION ALL
+        SELECT product_id, units_sold, revenue
+        FROM product_sales_archived """ + where
+
+
+def rebuild_rollups(checkpoint=None):
+    """Recompute all rollup tables from sales + sale_items in one transaction.
+
+    Days before the archive horizon are no longer in sales, so their
+    daily rollup rows are kept as they are; product totals add the
+    archived per-product totals back in. checkpoint(), if given, is
+    called after each of the three tables; an exception it raises
+    rolls the rebuild back and leaves the old rollups in place.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        horizon = archive_horizon(cursor)
+        day_filter, sale_filter, params = "", "", ()
+        if horizon is not None:
+            day_filter = " WHERE sale_day >= %s"
+            sale_filter = " WHERE s.sale_date >= %s"
+            params = (horizon,)
+
+        cursor.execute("DELETE FROM sales_daily_product" + day_filter, params)
+        cursor.execute("""
+            INSERT INTO sales_daily_product (sale_day, product_id, units_sold, revenue)
+            SELECT DATE(s.sale_date),
+                   si.product_id,
+                   SUM(si.quantity_sold),
+                   SUM(si.quantity_sold * si.item_price)
+            FROM sales s
+            JOIN sale_items si ON s.sale_id = si.sale_id
+            """ + sale_filter + """
+            GROUP BY DATE(s.sale_date), si.product_id
+        """, params)
+        product_rows = cursor.rowcount
+        if checkpoint:
+            checkpoint()
+
+        cursor.execute("DELETE FROM sales_daily_cashier" + day_filter, params)
+        cursor.execute("""
+            INSERT INTO sales_daily_cashier (sale_day, user_id, sales_count, units_sold, revenue)
+            SELECT DATE(s.sale_date),
+                   s.user_id,
+                   COUNT(*),
+                   COALESCE(SUM(t.units), 0),
+                   COALESCE(SUM(t.revenue), 0)
+            FROM sales s
+            LEFT JOIN (
+                SELECT sale_id,
+                       SUM(quantity_sold) AS units,
+                       SUM(quantity_sold * item_price) AS revenue
+                FROM sale_items
+                GROUP BY sale_id
+            ) t ON t.sale_id = s.sale_id
+            """ + sale_filter + """
+            GROUP BY DATE(s.sale_date), s.user_id
+        """, params)
+        cashier_rows = cursor.rowcount
+        if checkpoint:
+            checkpoint()
+
+        cursor.execute("DELETE FROM product_sales_totals")
+        cursor.execute("""
+            INSERT INTO product_sales_totals (product_id, units_sold, revenue)
+            SELECT product_id, SUM(units), SUM(revenue)
+            FROM (""" + _lifetime_lines() + """) lines
+            GROUP BY product_id
+        """)
+        total_rows = cursor.rowcount
+        if checkpoint:
+            checkpoint()
+
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return product_rows, cashier_rows, total_rows
+
+
+# Totals rows that disagree with sale_items + archived totals
+# (revenue compared to the cent)
+_TOTALS_MISMATCHES = """
+    SELECT e.product_id,
+           e.units_sold AS expected_units, e.revenue AS expected_revenue,
+           t.units_sold AS actual_units, t.revenue AS actual_revenue
+    FROM (
+        SELECT product_id,
+               SUM(units) AS units_sold,
+               SUM(revenue) AS revenue
+        FROM (""" + _lifetime_lines() + """) lines
+        GROUP BY product_id
+    ) e
+    LEFT JOIN product_sales_totals t ON t.product_id = e.product_id
+    WHERE t.product_id IS NULL
+       OR t.units_sold <> e.units_sold
+       OR ABS(t.revenue - e.revenue) >= 0.005
+    UNION ALL
+    SELECT t.product_id, 0, 0, t.units_sold, t.revenue
+    FROM product_sales_totals t
+    WHERE (t.units_sold <> 0 OR ABS(t.revenue) >= 0.005)
+      AND NOT EXISTS (SELECT 1 FROM sale_items si WHERE si.product_id = t.product_id)
+      AND NOT EXISTS (SELECT 1 FROM product_sales_archived a WHERE a.product_id = t.product_id)
+"""
+
+
+def reconcile_product_totals(repair=False, progress=None):
+    """Compare product_sales_totals with sale_items (plus archived totals);
+    returns the mismatched rows.
+
+    With repair=True the mismatched products are recomputed. Their
+    product rows are locked first, which serializes the repair with
+    sale item changes for the same products. progress(done, total), if
+    given, is called between the comparison and the repair.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute(_TOTALS_MISMATCHES)
+    mismatches = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+
+    if not repair or not mismatches:
+        return mismatches
+    if progress:
+        progress(1, 2)
+
+    ids = sorted(r["product_id"] for r in mismatches)
+    in_list = "(" + ", ".join(["%s"] * len(ids)) + ")"
+
+    def work(cursor):
+        cursor.execute(
+            "SELECT product_id FROM products WHERE product_id IN " + in_list
+            + " " + dialect.for_update(), tuple(ids))
+        cursor.fetchall()
+
+        cursor.execute(
+            "DELETE FROM product_sales_totals WHERE product_id IN " + in_list, tuple(ids))
+        cursor.execute("""
+            INSERT INTO product_sales_totals (product_id, units_sold, revenue)
+            SELECT product_id, SUM(units), SUM(revenue)
+            FROM (""" + _lifetime_lines("WHERE product_id IN " + in_list) + """) lines
+            GROUP BY product_id
+        """, tuple(ids) * 2)
+
+    run_in_transaction(work)
+    return mismatches
+
+
+def get_sales_summary():
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT
+            SUM(revenue) AS total_revenue,
+            SUM(units_sold) AS total_items
+        FROM sales_daily_product
+    """)
+    summary = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT
+            SUM(revenue) AS revenue_today,
+            SUM(units_sold) AS qty_today
+        FROM sales_daily_product
+        WHERE """ + today_range("sale_day"))
+    today = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT
+            SUM(revenue) AS revenue_month,
+            SUM(units_sold) AS qty_month
+        FROM sales_daily_product
+        WHERE """ + this_month_range("sale_day"))
+    month = cursor.fetchone()
+
+    cursor.close()
+    conn.close()
+    return summary, today, month
+
+
+def get_dashboard_totals():
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT
+            COALESCE(SUM(sales_count), 0) AS total_sales,
+            SUM(revenue) AS total_amount
+        FROM sales_daily_cashier
+        WHERE """ + today_range("sale_day"))
+    today_sales = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT
+            COALESCE(SUM(sales_count), 0) AS monthly_sales,
+            SUM(revenue) AS monthly_amount
+        FROM sales_daily_cashier
+        WHERE """ + this_month_range("sale_day"))
+    month_sales = cursor.fetchone()
+
+    cursor.close()
+    conn.close()
+    return today_sales, month_sales
+
+
+def get_top_products(limit):
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT
+            p.product_name,
+            t.units_sold AS total_qty,
+            t.revenue AS total_amount
+        FROM product_sales_totals t
+        JOIN products p ON t.product_id = p.product_id
+        WHERE t.units_sold > 0
+        ORDER BY t.units_sold DESC
+        LIMIT %s
+    """, (limit,))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
@@ -1,43 +1,459 @@
-from db import get_db_connection
+from db import (
+    get_db_connection,
+    get_read_connection,
+    run_in_transaction,
+    dialect,
+    prepared_statement,
+)
+from repositories.rollup_repo import (
+    apply_new_sale_items,
+    apply_sale_item_change,
+    record_new_sale,
+)
+from repositories.stock_repo import reserve_stock, reserve_stock_many, release_stock
 
-def get_sales_list():
-    conn = get_db_connection()
+
+class CheckoutError(Exception):
+    """Cart could not be sold; .problems lists one message per bad line."""
+
+    def __init__(self, problems):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def get_sales_page(after_id=None, limit=50, start=None, end=None, cashier=None):
+    """Sales newest first, keyset-paginated on sale_id; returns (rows, next_cursor).
+
+    Reads the maintained sales.total_amount instead of summing lines.
+    Optional filters: start <= sale_date < end (datetimes) and the
+    cashier's username (idx_sales_cashier: user_id, sale_id).
+    """
+    sql = """
+        SELECT s.sale_id, s.sale_date, u.username, s.total_amount
+        FROM sales s
+        JOIN users u ON s.user_id = u.user_id
+    """
+    where, params = [], []
+    if after_id is not None:
+        where.append("s.sale_id < %s")
+        params.append(after_id)
+    if start is not None:
+        where.append("s.sale_date >= %s")
+        params.append(start)
+    if end is not None:
+        where.append("s.sale_date < %s")
+        params.append(end)
+    if cashier:
+        where.append("u.username = %s")
+        params.append(cashier)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY s.sale_id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    conn = get_read_connection()
     cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("""
-        SELECT sale_id, sale_date, sold_by AS username,
-               SUM(line_total) AS total_amount
-        FROM sales_report
-        GROUP BY sale_id
-        ORDER BY sale_id DESC
-    """)
+    cursor.execute(sql, tuple(params))
     rows = cursor.fetchall()
 
     cursor.close()
     conn.close()
-    return rows
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["sale_id"]
+    return rows, next_cursor
+
+
+def _sale_date(cursor, sale_id):
+    """The sale's sale_date, or None if there is no such sale.
+
+    sales and sale_items are partitioned by sale_date; statements about
+    one sale also filter on it so they touch a single partition.
+    """
+    cursor.execute("SELECT sale_date FROM sales WHERE sale_id = %s", (sale_id,))
+    row = cursor.fetchone()
+    return row["sale_date"] if row else None
 
 
 def get_sale_details(sale_id):
-    conn = get_db_connection()
+    # Base tables rather than sales_report: the view joins sale_items on
+    # sale_id alone, so its partitions couldn't be pruned
+    conn = get_read_connection()
     cursor = conn.cursor(dictionary=True)
 
+    sale, items = None, []
+    sale_date = _sale_date(cursor, sale_id)
+    if sale_date is not None:
+        cursor.execute("""
+            SELECT s.sale_id, s.sale_date, u.username,
+                   SUM(si.quantity_sold * si.item_price) AS total_amount
+            FROM sales s
+            JOIN users u ON s.user_id = u.user_id
+            JOIN sale_items si ON si.sale_id = s.sale_id
+            WHERE s.sale_id = %s AND s.sale_date = %s AND si.sale_date = %s
+            GROUP BY s.sale_id, s.sale_date, u.username
+        """, (sale_id, sale_date, sale_date))
+        sale = cursor.fetchone()
+
+        cursor.execute("""
+            SELECT p.product_name, p.sku, si.quantity_sold, si.item_price,
+                   (si.quantity_sold * si.item_price) AS line_total
+            FROM sale_items si
+            JOIN products p ON si.product_id = p.product_id
+            WHERE si.sale_id = %s AND si.sale_date = %s
+        """, (sale_id, sale_date))
+        items = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return sale, items
+
+
+def get_sale_items(sale_id):
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    rows = []
+    sale_date = _sale_date(cursor, sale_id)
+    if sale_date is not None:
+        cursor.execute("""
+            SELECT
+                si.product_id,
+                si.quantity_sold,
+                si.item_price,
+                p.product_name,
+                p.sku
+            FROM sale_items si
+            JOIN products p ON si.product_id = p.product_id
+            WHERE si.sale_id = %s AND si.sale_date = %s
+        """, (sale_id, sale_date))
+        rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+    return rows
+
+
+# ----------------------------------------------------
+# Sale mutations
+#   Each runs in one transaction via run_in_transaction (lock-wait
+#   retries) and changes stock only through stock_repo. The item
+#   routes read the sale's sale_date once and pass it to every
+#   statement, for partition pruning.
+# ----------------------------------------------------
+
+def create_sale(user_id):
+    def work(cursor):
+        cursor.execute("""
+            INSERT INTO sales (user_id, total_amount)
+            VALUES (%s, 0)
+        """, (user_id,))
+        sale_id = cursor.lastrowid
+        record_new_sale(cursor, sale_id)
+        return sale_id
+
+    return run_in_transaction(work)
+
+
+# Hot statements of the sale screen (see db.prepared_statement)
+_ADD_LINE = prepared_statement("sale_items.add", """
+    INSERT INTO sale_items (sale_id, product_id, quantity_sold, item_price, sale_date)
+    SELECT s.sale_id, p.product_id, %s, p.price, s.sale_date
+    FROM sales s
+    JOIN products p ON p.product_id = %s
+    WHERE s.sale_id = %s AND s.sale_date = %s
+    """ + dialect.upsert(("sale_id", "product_id")) + """
+        quantity_sold = quantity_sold + """ + dialect.excluded("quantity_sold"))
+
+_INCREASE_LINE = prepared_statement("sale_items.increase", """
+    UPDATE sale_items
+    SET quantity_sold = quantity_sold + 1
+    WHERE sale_id=%s AND product_id=%s AND sale_date=%s
+""")
+
+_DECREASE_LINE = prepared_statement("sale_items.decrease", """
+    UPDATE sale_items
+    SET quantity_sold = quantity_sold - 1
+    WHERE sale_id=%s AND product_id=%s AND sale_date=%s
+""")
+
+_DELETE_LINE = prepared_statement("sale_items.delete", """
+    DELETE FROM sale_items
+    WHERE sale_id=%s AND product_id=%s AND sale_date=%s
+""")
+
+_ADD_TO_TOTAL = prepared_statement("sales.add_to_total", """
+    UPDATE sales
+    SET total_amount = total_amount + %s
+    WHERE sale_id = %s AND sale_date = %s
+""")
+
+
+def _line_price(cursor, sale_id, sale_date, product_id):
+    cursor.execute("""
+        SELECT item_price FROM sale_items
+        WHERE sale_id=%s AND product_id=%s AND sale_date=%s
+    """, (sale_id, product_id, sale_date))
+    return cursor.fetchone()["item_price"]
+
+
+def _add_to_total(cursor, sale_id, sale_date, product_id, qty_delta, price):
+    cursor.execute_prepared(_ADD_TO_TOTAL, (price * qty_delta, sale_id, sale_date))
+    apply_sale_item_change(cursor, sale_id, sale_date, product_id, qty_delta, price * qty_delta)
+
+
+def add_item_to_sale(sale_id, product_id, qty):
+    """Sell qty of a product on a sale; False if the sale or product doesn't exist.
+
+    Raises stock_repo.OutOfStock.
+    """
+    def work(cursor):
+        sale_date = _sale_date(cursor, sale_id)
+        if sale_date is None:
+            return False
+
+        # New line takes the current product price; an existing line keeps its own.
+        # Nothing is inserted for an unknown product, before any write.
+        if cursor.execute_prepared(_ADD_LINE, (qty, product_id, sale_id, sale_date)) == 0:
+            return False
+
+        reserve_stock(cursor, product_id, qty, sale_id)
+        price = _line_price(cursor, sale_id, sale_date, product_id)
+        _add_to_total(cursor, sale_id, sale_date, product_id, qty, price)
+        return True
+
+    return run_in_transaction(work)
+
+
+def increase_sale_item(sale_id, product_id):
+    """Add one unit to an existing line; False if the line doesn't exist."""
+    def work(cursor):
+        sale_date = _sale_date(cursor, sale_id)
+        if sale_date is None:
+            return False
+        if cursor.execute_prepared(_INCREASE_LINE, (sale_id, product_id, sale_date)) != 1:
+            return False
+
+        reserve_stock(cursor, product_id, 1, sale_id)
+        price = _line_price(cursor, sale_id, sale_date, product_id)
+        _add_to_total(cursor, sale_id, sale_date, product_id, 1, price)
+        return True
+
+    return run_in_transaction(work)
+
+
+def _remove_line(cursor, sale_id, sale_date, product_id, qty, price):
+    cursor.execute_prepared(_DELETE_LINE, (sale_id, product_id, sale_date))
+    release_stock(cursor, product_id, qty, sale_id)
+    _add_to_total(cursor, sale_id, sale_date, product_id, -qty, price)
+
+
+def _locked_line(cursor, sale_id, sale_date, product_id):
     cursor.execute("""
-        SELECT DISTINCT sale_id, sale_date, sold_by AS username,
-               SUM(line_total) AS total_amount
-        FROM sales_report
-        WHERE sale_id=%s
-        GROUP BY sale_id
-    """, (sale_id,))
-    sale = cursor.fetchone()
+        SELECT quantity_sold, item_price
+        FROM sale_items
+        WHERE sale_id=%s AND product_id=%s AND sale_date=%s
+        """ + dialect.for_update(), (sale_id, product_id, sale_date))
+    return cursor.fetchone()
+
+
+def decrease_sale_item(sale_id, product_id):
+    """Take one unit off a line, removing the line when it reaches zero."""
+    def work(cursor):
+        sale_date = _sale_date(cursor, sale_id)
+        item = _locked_line(cursor, sale_id, sale_date, product_id) if sale_date is not None else None
+        if not item:
+            return
+
+        if item["quantity_sold"] == 1:
+            _remove_line(cursor, sale_id, sale_date, product_id, 1, item["item_price"])
+            return
+
+        cursor.execute_prepared(_DECREASE_LINE, (sale_id, product_id, sale_date))
+        release_stock(cursor, product_id, 1, sale_id)
+        _add_to_total(cursor, sale_id, sale_date, product_id, -1, item["item_price"])
+
+    run_in_transaction(work)
+
+
+def remove_sale_item(sale_id, product_id):
+    def work(cursor):
+        sale_date = _sale_date(cursor, sale_id)
+        item = _locked_line(cursor, sale_id, sale_date, product_id) if sale_date is not None else None
+        if item:
+            _remove_line(cursor, sale_id, sale_date, product_id,
+                         item["quantity_sold"], item["item_price"])
+
+    run_in_transaction(work)
+
+
+def checkout_sale(user_id, lines):
+    """Create a complete sale from a cart in one transaction.
+
+    lines: [{"product_id": int} or {"sku": str}, plus "qty": int]
+    Round trips are fixed regardless of cart size: read products,
+    insert sale, read its sale_date, conditional stock decrement (plus
+    its ledger rows and alerts), insert items, three rollup upserts,
+    commit. Returns (sale_id, total_amount).
+    """
+    ids = sorted({l["product_id"] for l in lines if l.get("product_id") is not None})
+    skus = sorted({l["sku"] for l in lines if l.get("sku") is not None})
+    if not ids and not skus:
+        raise CheckoutError(["Cart is empty."])
+
+    def work(cursor):
+        # 1. Read every product in the cart at once
+        where = []
+        params = []
+        if ids:
+            where.append("product_id IN (" + ", ".join(["%s"] * len(ids)) + ")")
+            params.extend(ids)
+        if skus:
+            where.append("sku IN (" + ", ".join(["%s"] * len(skus)) + ")")
+            params.extend(skus)
+
+        cursor.execute(
+            "SELECT product_id, sku, product_name, price, quantity FROM products WHERE "
+            + " OR ".join(where),
+            tuple(params)
+        )
+        rows = cursor.fetchall()
+        by_id = {r["product_id"]: r for r in rows}
+        by_sku = {r["sku"]: r for r in rows}
+
+        # 2. Resolve SKUs, merge repeated lines, validate stock in bulk
+        problems = []
+        wanted = {}
+        for l in lines:
+            if l.get("product_id") is not None:
+                product = by_id.get(l["product_id"])
+                ref = f"product {l['product_id']}"
+            else:
+                product = by_sku.get(l["sku"])
+                ref = f"SKU {l['sku']}"
+
+            if product is None:
+                problems.append(f"{ref}: not found.")
+                continue
+            wanted[product["product_id"]] = wanted.get(product["product_id"], 0) + l["qty"]
+
+        for product_id, qty in wanted.items():
+            product = by_id[product_id]
+            if product["quantity"] < qty:
+                problems.append(
+                    f"{product['product_name']}: not enough stock. "
+                    f"Available: {product['quantity']}, requested: {qty}"
+                )
+
+        if problems:
+            raise CheckoutError(problems)
+
+        items = [
+            (product_id, qty, by_id[product_id]["price"])
+            for product_id, qty in sorted(wanted.items())
+        ]
+        total = sum(price * qty for _, qty, price in items)
+
+        # 3. Sale header with its final total; lines carry its sale_date
+        cursor.execute("""
+            INSERT INTO sales (user_id, total_amount)
+            VALUES (%s, %s)
+        """, (user_id, total))
+        sale_id = cursor.lastrowid
+
+        sale_date = _sale_date(cursor, sale_id)
+
+        # 4. Conditional set-wise decrement (ledgered against the new sale);
+        #    a concurrent sale may have won the race
+        if not reserve_stock_many(cursor, wanted, sale_id):
+            raise CheckoutError(["Stock changed during checkout; please try again."])
+
+        # 5. All lines in one multi-row INSERT
+        cursor.executemany("""
+            INSERT INTO sale_items (sale_id, product_id, quantity_sold, item_price, sale_date)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(sale_id, product_id, qty, price, sale_date)
+              for product_id, qty, price in items])
+
+        # 6. Rollups and product totals
+        apply_new_sale_items(cursor, sale_id)
+
+        return sale_id, total
+
+    return run_in_transaction(work)
+
+
+# ----------------------------------------------------
+# sales.total_amount consistency
+#   The item routes keep total_amount in step with the lines in the
+#   same transaction; these find and fix sales where it has drifted
+#   (manual edits, pre-rollup history). Checked one sale_id range per
+#   statement on the primary.
+# ----------------------------------------------------
+_LINE_SUM = "COALESCE(SUM(si.quantity_sold * si.item_price), 0)"
+
+
+def get_sale_id_bounds():
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("SELECT MIN(sale_id) AS first, MAX(sale_id) AS last FROM sales")
+    row = cursor.fetchone()
+
+    cursor.close()
+    conn.close()
+    return row["first"], row["last"]
+
+
+def get_total_drift(after_id, until_id):
+    """Sales with after_id < sale_id <= until_id whose total_amount isn't the sum of their lines."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
 
     cursor.execute("""
-        SELECT product_name, sku, quantity_sold, item_price, line_total
-        FROM sales_report
-        WHERE sale_id=%s
-    """, (sale_id,))
-    items = cursor.fetchall()
+        SELECT s.sale_id, s.total_amount, """ + _LINE_SUM + """ AS line_total
+        FROM sales s
+        LEFT JOIN sale_items si ON si.sale_id = s.sale_id
+        WHERE s.sale_id > %s AND s.sale_id <= %s
+        GROUP BY s.sale_id, s.total_amount
+        HAVING ABS(s.total_amount - """ + _LINE_SUM + """) >= 0.005
+        ORDER BY s.sale_id
+    """, (after_id, until_id))
+    rows = cursor.fetchall()
 
     cursor.close()
     conn.close()
-    return sale, items
+    return rows
+
+
+def repair_sale_totals(sale_ids):
+    """Set total_amount to the line sum for sale_ids; returns the rows changed.
+
+    The sales rows are locked first, which serializes the repair with
+    the item routes (they update the same row).
+    """
+    if not sale_ids:
+        return 0
+    ids = sorted(sale_ids)
+    in_list = "(" + ", ".join(["%s"] * len(ids)) + ")"
+
+    def work(cursor):
+        cursor.execute(
+            "SELECT sale_id FROM sales WHERE sale_id IN " + in_list
+            + " " + dialect.for_update(), tuple(ids))
+        cursor.fetchall()
+
+        cursor.execute("""
+            UPDATE sales
+            SET total_amount = (
+                SELECT """ + _LINE_SUM + """
+                FROM sale_items si
+                WHERE si.sale_id = sales.sale_id
+            )
+            WHERE sale_id IN """ + in_list, tuple(ids))
+        return cursor.rowcount
+
+    return run_in_transaction(work)
@@ -0,0 +1,129 @@
+from db import dialect, prepared_statement
+
+# ----------------------------------------------------
+# Stock reservation primitives
+#
+# Every stock change is a single conditional UPDATE; success is read
+# from the affected-row count, so there is no read-then-write window in
+# which two cashiers can sell the same last unit. All helpers take the
+# caller's cursor and run inside its transaction (see
+# db.run_in_transaction for the lock-wait retry policy).
+#
+# A successful reservation that takes a product from at/above its
+# reorder_point to below it raises a stock_alerts row in the same
+# transaction (see reorder_repo for the batch side).
+#
+# Every change is also appended to stock_movements in the same
+# transaction, always *after* the products row has been locked, so a
+# product's movement_ids follow its commit order (ledger_repo relies
+# on this for snapshots and point-in-time stock).
+# ----------------------------------------------------
+
+# stock_movements.reason values
+INITIAL = "initial"     # product created
+SALE = "sale"           # sold on a sale (negative delta)
+RETURN = "return"       # taken back off a sale
+ADJUST = "adjust"       # quantity edited by hand
+IMPORT = "import"       # set by the CSV importer
+
+
+_RESERVE = prepared_statement("stock.reserve", """
+    UPDATE products
+    SET quantity = quantity - %s
+    WHERE product_id = %s AND quantity >= %s
+""")
+
+_RELEASE = prepared_statement("stock.release", """
+    UPDATE products
+    SET quantity = quantity + %s
+    WHERE product_id = %s
+""")
+
+
+class OutOfStock(Exception):
+    """Reservation failed; .available is the current stock (None if no such product)."""
+
+    def __init__(self, product_id, requested, available):
+        if available is None:
+            message = "Product not found."
+        else:
+            message = f"Not enough stock. Available: {available}"
+        super().__init__(message)
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+
+
+def record_movements(cursor, movements):
+    """Append [(product_id, delta, reason, sale_id)] to the ledger.
+
+    Zero deltas are skipped, except INITIAL: a product's history must
+    start with one (ledger_repo replays from it) even at zero stock.
+    """
+    rows = [m for m in movements if m[1] or m[2] == INITIAL]
+    if rows:
+        cursor.executemany("""
+            INSERT INTO stock_movements (product_id, delta, reason, sale_id)
+            VALUES (%s, %s, %s, %s)
+        """, rows)
+
+
+def reserve_stock(cursor, product_id, qty, sale_id=None):
+    """Take qty units if (and only if) that many remain; raise OutOfStock otherwise."""
+    if cursor.execute_prepared(_RESERVE, (qty, product_id, qty)) != 1:
+        # Failure path only: read the stock level for the error message
+        cursor.execute("SELECT quantity FROM products WHERE product_id = %s", (product_id,))
+        row = cursor.fetchone()
+        raise OutOfStock(product_id, qty, row["quantity"] if row else None)
+
+    record_movements(cursor, [(product_id, -qty, SALE, sale_id)])
+    _raise_crossed_alerts(cursor, {product_id: qty})
+
+
+def reserve_stock_many(cursor, wanted, sale_id=None):
+    """Reserve {product_id: qty} in one statement; True only if every line succeeded.
+
+    On False the caller must roll back, since some rows may have been decremented.
+    """
+    items = sorted(wanted.items())
+    case_sql = " ".join(["WHEN %s THEN %s"] * len(items))
+    case_params = [v for product_id, qty in items for v in (product_id, qty)]
+    ids = [product_id for product_id, _ in items]
+
+    cursor.execute(
+        "UPDATE products"
+        " SET quantity = quantity - CASE product_id " + case_sql + " END"
+        " WHERE product_id IN (" + ", ".join(["%s"] * len(ids)) + ")"
+        " AND quantity >= CASE product_id " + case_sql + " END",
+        tuple(case_params + ids + case_params)
+    )
+    if cursor.rowcount != len(items):
+        return False
+
+    record_movements(cursor, [(product_id, -qty, SALE, sale_id) for product_id, qty in items])
+    _raise_crossed_alerts(cursor, wanted)
+    return True
+
+
+def _raise_crossed_alerts(cursor, taken):
+    """Alert on products that {product_id: qty} just took below their reorder point."""
+    items = sorted(taken.items())
+    case_sql = " ".join(["WHEN %s THEN %s"] * len(items))
+    case_params = [v for product_id, qty in items for v in (product_id, qty)]
+    ids = [product_id for product_id, _ in items]
+
+    cursor.execute(
+        "INSERT INTO stock_alerts (product_id, quantity)"
+        " SELECT p.product_id, p.quantity FROM products p"
+        " WHERE p.product_id IN (" + ", ".join(["%s"] * len(ids)) + ")"
+        " AND p.quantity < p.reorder_point"
+        " AND p.quantity + CASE p.product_id " + case_sql + " END >= p.reorder_point "
+        + dialect.upsert(("product_id",))
+        + " " + dialect.target("stock_alerts", "quantity") + " = " + dialect.excluded("quantity"),
+        tuple(ids + case_params)
+    )
+
+
+def release_stock(cursor, product_id, qty, sale_id=None):
+    if cursor.execute_prepared(_RELEASE, (qty, product_id)) == 1:
+        record_movements(cursor, [(product_id, qty, RETURN, sale_id)])
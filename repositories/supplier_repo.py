@@ -1,6 +1,8 @@
-from db import get_db_connection
+from db import get_db_connection, get_read_connection
 
 def get_suppliers():
+    # Primary: list_suppliers caches this, and the cache must not be
+    # repopulated from a lagging replica
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
@@ -12,8 +14,34 @@ def get_suppliers():
     return rows
 
 
+def get_suppliers_page(after_id=None, limit=50):
+    """Suppliers newest first, keyset-paginated on supplier_id; returns (rows, next_cursor)."""
+    sql = "SELECT * FROM suppliers"
+    params = []
+    if after_id is not None:
+        sql += " WHERE supplier_id < %s"
+        params.append(after_id)
+    sql += " ORDER BY supplier_id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    conn = get_read_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute(sql, tuple(params))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["supplier_id"]
+    return rows, next_cursor
+
+
 def get_supplier(supplier_id):
-    conn = get_db_connection()
+    conn = get_read_connection()
     cursor = conn.cursor(dictionary=True)
 
     cursor.execute("SELECT * FROM suppliers WHERE supplier_id=%s", (supplier_id,))
@@ -0,0 +1,38 @@
+from db import get_db_connection, get_read_connection
+
+
+def bump_versions(tables):
+    """Increment the change version of each table (own short transaction)."""
+    tables = sorted(set(tables))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "UPDATE table_versions SET version = version + 1 WHERE table_name IN ("
+        + ", ".join(["%s"] * len(tables)) + ")",
+        tuple(tables)
+    )
+    conn.commit()
+
+    cursor.close()
+    conn.close()
+
+
+def get_versions(tables):
+    """{table_name: version}; tables without a row are left out."""
+    tables = sorted(set(tables))
+
+    conn = get_read_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "SELECT table_name, version FROM table_versions WHERE table_name IN ("
+        + ", ".join(["%s"] * len(tables)) + ")",
+        tuple(tables)
+    )
+    rows = dict(cursor.fetchall())
+
+    cursor.close()
+    conn.close()
+    return rows
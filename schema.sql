@@ -67,6 +67,14 @@ CREATE TABLE IF NOT EXISTS products (
     sku VARCHAR(50) NOT NULL UNIQUE,
     price DECIMAL(10,2) NOT NULL,
     quantity INT NOT NULL DEFAULT 0,
+    -- A stock_alerts row is raised when quantity drops below reorder_point
+    reorder_point INT NOT NULL DEFAULT 10,
+    reorder_qty INT NOT NULL DEFAULT 0,
+
+    -- Low-stock scans read only this index (covering)
+    KEY idx_products_qty (quantity, sku, product_name),
+    -- Name-prefix filtering on the product list
+    KEY idx_products_name (product_name),
 
     CONSTRAINT fk_products_supplier
         FOREIGN KEY (supplier_id)
@@ -87,18 +95,32 @@ WHERE NOT EXISTS (SELECT 1 FROM products WHERE sku='MILK1L');
 
 -- ============================================
 -- 4. Sales
+--    Range-partitioned by month on sale_date; sale_items
+--    carries its parent's sale_date and the same partitions.
+--    InnoDB partitioned tables can't have foreign keys, so
+--    the user / sale / product references are enforced by
+--    the app (sales_repo writes every line, products with
+--    sale lines can't be deleted).
+--      flask --app app partition-sales   add months ahead
+--      flask --app app archive-sales     export + drop old months
 -- ============================================
 CREATE TABLE IF NOT EXISTS sales (
-    sale_id INT AUTO_INCREMENT PRIMARY KEY,
+    sale_id INT AUTO_INCREMENT,
     user_id INT NOT NULL,
-    sale_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sale_date DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     total_amount DECIMAL(10,2) NOT NULL DEFAULT 0,
 
-    CONSTRAINT fk_sales_user
-        FOREIGN KEY (user_id)
-        REFERENCES users(user_id)
-        ON UPDATE CASCADE
-        ON DELETE RESTRICT
+    -- The partitioning column must be part of every unique key
+    PRIMARY KEY (sale_id, sale_date),
+
+    -- Date-range summaries (half-open sale_date ranges), covering
+    KEY idx_sales_date (sale_date, user_id, total_amount),
+
+    -- One cashier's sales, newest first (/sales keyset pages)
+    KEY idx_sales_cashier (user_id, sale_id)
+)
+PARTITION BY RANGE COLUMNS (sale_date) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
 );
 
 
@@ -110,20 +132,15 @@ CREATE TABLE IF NOT EXISTS sale_items (
     product_id INT NOT NULL,
     quantity_sold INT NOT NULL,
     item_price DECIMAL(10,2) NOT NULL,
+    sale_date DATETIME NOT NULL,         -- copied from the parent sale
 
-    PRIMARY KEY (sale_id, product_id),
-
-    CONSTRAINT fk_saleitems_sale
-        FOREIGN KEY (sale_id)
-        REFERENCES sales(sale_id)
-        ON UPDATE CASCADE
-        ON DELETE CASCADE,
+    PRIMARY KEY (sale_id, product_id, sale_date),
 
-    CONSTRAINT fk_saleitems_product
-        FOREIGN KEY (product_id)
-        REFERENCES products(product_id)
-        ON UPDATE CASCADE
-        ON DELETE RESTRICT
+    -- Per-product aggregates without touching the clustered rows
+    KEY idx_saleitems_product (product_id, quantity_sold, item_price)
+)
+PARTITION BY RANGE COLUMNS (sale_date) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
 );
 
 
@@ -144,3 +161,219 @@ FROM sales s
 JOIN users u ON s.user_id = u.user_id
 JOIN sale_items si ON s.sale_id = si.sale_id
 JOIN products p ON si.product_id = p.product_id;
+
+
+-- ============================================
+-- 7. Daily Sales Rollups
+--    Maintained by the sale item routes in the same
+--    transaction; rebuild with `flask --app app rebuild-rollups`
+-- ============================================
+CREATE TABLE IF NOT EXISTS sales_daily_product (
+    sale_day DATE NOT NULL,
+    product_id INT NOT NULL,
+    units_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sale_day, product_id),
+    KEY idx_sdp_product (product_id)
+);
+
+CREATE TABLE IF NOT EXISTS sales_daily_cashier (
+    sale_day DATE NOT NULL,
+    user_id INT NOT NULL,
+    sales_count INT NOT NULL DEFAULT 0,
+    units_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sale_day, user_id)
+);
+
+-- Lifetime totals per product; top-N reads idx_pst_units backwards.
+-- Verify / repair with `flask --app app reconcile-sales-totals`
+CREATE TABLE IF NOT EXISTS product_sales_totals (
+    product_id INT PRIMARY KEY,
+    units_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+    KEY idx_pst_units (units_sold, product_id)
+);
+
+
+-- ============================================
+-- 8. Per-table change versions
+--    Bumped by the services after every committed write;
+--    the JSON API derives ETags from them (one PK read).
+-- ============================================
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO table_versions (table_name, version) VALUES
+    ('products', 0),
+    ('suppliers', 0),
+    ('sales', 0);
+
+
+-- ============================================
+-- 9. Low-stock alerts and suggested purchase orders
+--    stock_alerts holds one row per product with an open
+--    alert; rows are raised by the stock-decrementing code
+--    and grouped into orders by `flask --app app suggest-orders`
+-- ============================================
+CREATE TABLE IF NOT EXISTS purchase_orders (
+    po_id INT AUTO_INCREMENT PRIMARY KEY,
+    supplier_id INT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'suggested',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    KEY idx_po_status (status, po_id),
+
+    CONSTRAINT fk_po_supplier
+        FOREIGN KEY (supplier_id)
+        REFERENCES suppliers(supplier_id)
+        ON UPDATE CASCADE
+        ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS purchase_order_lines (
+    po_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+
+    PRIMARY KEY (po_id, product_id),
+
+    CONSTRAINT fk_pol_po
+        FOREIGN KEY (po_id)
+        REFERENCES purchase_orders(po_id)
+        ON DELETE CASCADE,
+
+    CONSTRAINT fk_pol_product
+        FOREIGN KEY (product_id)
+        REFERENCES products(product_id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS stock_alerts (
+    product_id INT PRIMARY KEY,
+    quantity INT NOT NULL,               -- stock level when raised
+    raised_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    po_id INT NULL,                      -- suggested order covering it
+
+    CONSTRAINT fk_alerts_product
+        FOREIGN KEY (product_id)
+        REFERENCES products(product_id)
+        ON DELETE CASCADE
+);
+
+
+-- ============================================
+-- 10. Demand forecast
+--    Rewritten by `flask --app app forecast-demand`
+-- ============================================
+CREATE TABLE IF NOT EXISTS demand_forecast (
+    product_id INT PRIMARY KEY,
+    avg_daily DECIMAL(12,3) NOT NULL,        -- moving average, units/day
+    smoothed_daily DECIMAL(12,3) NOT NULL,   -- exponential smoothing, units/day
+    days_of_cover DECIMAL(10,1) NULL,        -- NULL when there is no demand
+    suggested_qty INT NOT NULL DEFAULT 0,
+    computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_forecast_product
+        FOREIGN KEY (product_id)
+        REFERENCES products(product_id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS supplier_order_suggestions (
+    supplier_id INT PRIMARY KEY,             -- 0 = products without a supplier
+    product_count INT NOT NULL,
+    units INT NOT NULL,
+    min_days_of_cover DECIMAL(10,1) NULL,
+    computed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- ============================================
+-- 11. Sales archive
+--    One row per archived period; product_sales_archived
+--    keeps the per-product totals of archived lines so the
+--    rollup rebuild / reconcile still see the full history
+-- ============================================
+CREATE TABLE IF NOT EXISTS sales_archive_log (
+    period VARCHAR(16) PRIMARY KEY,      -- partition name, e.g. p202401
+    period_start DATETIME NULL,          -- NULL = everything before period_end
+    period_end DATETIME NOT NULL,
+    file_path VARCHAR(255) NOT NULL,
+    sales_count INT NOT NULL,
+    line_count INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS product_sales_archived (
+    product_id INT PRIMARY KEY,
+    units_sold INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14,2) NOT NULL DEFAULT 0
+);
+
+
+-- ============================================
+-- 12. Stock ledger
+--    stock_movements is append-only: one row per stock
+--    change, written in the same transaction as the change.
+--    No FK to products, so history outlives deleted products.
+--    stock_snapshots is written by `flask --app app
+--    snapshot-stock`; stock at a past time is the nearest
+--    earlier snapshot plus the movements after it.
+-- ============================================
+CREATE TABLE IF NOT EXISTS stock_movements (
+    movement_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    product_id INT NOT NULL,
+    delta INT NOT NULL,                  -- signed change in quantity
+    reason VARCHAR(16) NOT NULL,         -- initial, sale, return, adjust, import
+    sale_id INT NULL,
+    moved_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    KEY idx_movements_product (product_id, movement_id),
+    KEY idx_movements_time (product_id, moved_at)
+);
+
+CREATE TABLE IF NOT EXISTS stock_snapshots (
+    product_id INT NOT NULL,
+    last_movement_id BIGINT NOT NULL,    -- last movement included (0 = none)
+    last_moved_at DATETIME NULL,         -- its moved_at (lower bound for replay)
+    quantity INT NOT NULL,
+    taken_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (product_id, last_movement_id),
+    KEY idx_snapshots_time (product_id, taken_at)
+);
+
+
+-- ============================================
+-- 13. Background jobs
+--    One row per submitted job (see jobs.py). owner is the
+--    host:pid running it; a restarted process fails the jobs
+--    its dead predecessor left queued or running.
+-- ============================================
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INT AUTO_INCREMENT PRIMARY KEY,
+    job_type VARCHAR(40) NOT NULL,
+    params TEXT NOT NULL,                -- JSON
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+                                         -- queued, running, succeeded, failed, cancelled
+    progress INT NOT NULL DEFAULT 0,     -- units of work done
+    total INT NULL,                      -- units expected (NULL = unknown)
+    message VARCHAR(255) NULL,
+    cancel_requested TINYINT(1) NOT NULL DEFAULT 0,
+    result TEXT NULL,                    -- JSON summary
+    result_path VARCHAR(255) NULL,       -- downloadable output, if any
+    owner VARCHAR(100) NOT NULL,
+    submitted_by INT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME NULL,
+    finished_at DATETIME NULL,
+
+    KEY idx_jobs_owner (owner, status)
+);
@@ -0,0 +1,312 @@
+-- ============================================
+-- Inventory Management System - SQLite Schema
+-- Embedded equivalent of schema.sql (DB_BACKEND = "sqlite")
+-- ============================================
+
+PRAGMA journal_mode = WAL;
+PRAGMA foreign_keys = ON;
+
+-- ============================================
+-- 1. Users table
+-- ============================================
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(50) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('manager', 'cashier'))
+);
+
+-- Seed users (passwords stored as SHA2(password, 256) hex)
+INSERT OR IGNORE INTO users (username, password_hash, role) VALUES
+    ('manager', '866485796cfa8d7c0cf7111640205b83076433547577511d81f8030ae99ecea5', 'manager'),
+    ('cashier1', 'b4c94003c562bb0d89535eca77f07284fe560fd48a7cc1ed99f0a56263d616ba', 'cashier');
+
+
+-- ============================================
+-- 2. Suppliers
+-- ============================================
+CREATE TABLE IF NOT EXISTS suppliers (
+    supplier_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    supplier_name VARCHAR(100) NOT NULL,
+    contact_info VARCHAR(150)
+);
+
+INSERT INTO suppliers (supplier_name, contact_info)
+SELECT 'ABC Distributors', 'abc@gmail.com'
+WHERE NOT EXISTS (SELECT 1 FROM suppliers WHERE supplier_name='ABC Distributors');
+
+INSERT INTO suppliers (supplier_name, contact_info)
+SELECT 'Fresh Foods Supply Co.', 'fresh@foods.com'
+WHERE NOT EXISTS (SELECT 1 FROM suppliers WHERE supplier_name='Fresh Foods Supply Co.');
+
+
+-- ============================================
+-- 3. Products
+-- ============================================
+CREATE TABLE IF NOT EXISTS products (
+    product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    supplier_id INTEGER
+        REFERENCES suppliers(supplier_id)
+        ON UPDATE CASCADE
+        ON DELETE SET NULL,
+    product_name VARCHAR(100) NOT NULL,
+    sku VARCHAR(50) NOT NULL UNIQUE,
+    price NUMERIC NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    -- A stock_alerts row is raised when quantity drops below reorder_point
+    reorder_point INTEGER NOT NULL DEFAULT 10,
+    reorder_qty INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_products_qty ON products (quantity, sku, product_name);
+-- NOCASE so LIKE 'prefix%' (case-insensitive in SQLite) can range-scan
+CREATE INDEX IF NOT EXISTS idx_products_name ON products (product_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_products_sku_nocase ON products (sku COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_products_supplier ON products (supplier_id);
+
+INSERT OR IGNORE INTO products (supplier_id, product_name, sku, price, quantity) VALUES
+    (1, 'Rice Bag 25kg', 'RICE25KG', 18.50, 40),
+    (2, 'Milk 1L', 'MILK1L', 1.20, 100);
+
+
+-- ============================================
+-- 4. Sales
+-- ============================================
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL
+        REFERENCES users(user_id)
+        ON UPDATE CASCADE
+        ON DELETE RESTRICT,
+    -- Local time, like MySQL's CURRENT_TIMESTAMP (SQLite's is UTC)
+    sale_date DATETIME DEFAULT (datetime('now', 'localtime')),
+    total_amount NUMERIC NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_sales_date ON sales (sale_date, user_id, total_amount);
+CREATE INDEX IF NOT EXISTS idx_sales_cashier ON sales (user_id, sale_id);
+
+
+-- ============================================
+-- 5. Sale Items (Composite Key)
+-- ============================================
+CREATE TABLE IF NOT EXISTS sale_items (
+    sale_id INTEGER NOT NULL
+        REFERENCES sales(sale_id)
+        ON UPDATE CASCADE
+        ON DELETE CASCADE,
+    product_id INTEGER NOT NULL
+        REFERENCES products(product_id)
+        ON UPDATE CASCADE
+        ON DELETE RESTRICT,
+    quantity_sold INTEGER NOT NULL,
+    item_price NUMERIC NOT NULL,
+    sale_date DATETIME NOT NULL,         -- copied from the parent sale
+
+    PRIMARY KEY (sale_id, product_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_saleitems_product ON sale_items (product_id, quantity_sold, item_price);
+-- No partitions in SQLite: archive-sales deletes closed months by range
+CREATE INDEX IF NOT EXISTS idx_saleitems_date ON sale_items (sale_date);
+
+
+-- ============================================
+-- 6. Reporting View
+-- ============================================
+DROP VIEW IF EXISTS sales_report;
+CREATE VIEW sales_report AS
+SELECT
+    s.sale_id,
+    s.sale_date,
+    u.username AS sold_by,
+    p.product_name,
+    p.sku,
+    si.quantity_sold,
+    si.item_price,
+    (si.quantity_sold * si.item_price) AS line_total
+FROM sales s
+JOIN users u ON s.user_id = u.user_id
+JOIN sale_items si ON s.sale_id = si.sale_id
+JOIN products p ON si.product_id = p.product_id;
+
+
+-- ============================================
+-- 7. Daily Sales Rollups
+-- ============================================
+CREATE TABLE IF NOT EXISTS sales_daily_product (
+    sale_day DATE NOT NULL,
+    product_id INTEGER NOT NULL,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sale_day, product_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_sdp_product ON sales_daily_product (product_id);
+
+CREATE TABLE IF NOT EXISTS sales_daily_cashier (
+    sale_day DATE NOT NULL,
+    user_id INTEGER NOT NULL,
+    sales_count INTEGER NOT NULL DEFAULT 0,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (sale_day, user_id)
+) WITHOUT ROWID;
+
+-- Lifetime totals per product; top-N reads idx_pst_units backwards.
+-- Verify / repair with `flask --app app reconcile-sales-totals`
+CREATE TABLE IF NOT EXISTS product_sales_totals (
+    product_id INTEGER PRIMARY KEY,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_pst_units ON product_sales_totals (units_sold, product_id);
+
+
+-- ============================================
+-- 8. Per-table change versions
+-- ============================================
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO table_versions (table_name, version) VALUES
+    ('products', 0),
+    ('suppliers', 0),
+    ('sales', 0);
+
+
+-- ============================================
+-- 9. Low-stock alerts and suggested purchase orders
+-- ============================================
+CREATE TABLE IF NOT EXISTS purchase_orders (
+    po_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    supplier_id INTEGER
+        REFERENCES suppliers(supplier_id)
+        ON UPDATE CASCADE
+        ON DELETE SET NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'suggested',
+    created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_po_status ON purchase_orders (status, po_id);
+
+CREATE TABLE IF NOT EXISTS purchase_order_lines (
+    po_id INTEGER NOT NULL
+        REFERENCES purchase_orders(po_id)
+        ON DELETE CASCADE,
+    product_id INTEGER NOT NULL
+        REFERENCES products(product_id)
+        ON DELETE CASCADE,
+    quantity INTEGER NOT NULL,
+
+    PRIMARY KEY (po_id, product_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stock_alerts (
+    product_id INTEGER PRIMARY KEY
+        REFERENCES products(product_id)
+        ON DELETE CASCADE,
+    quantity INTEGER NOT NULL,
+    raised_at DATETIME DEFAULT (datetime('now', 'localtime')),
+    po_id INTEGER
+);
+
+
+-- ============================================
+-- 10. Demand forecast
+-- ============================================
+CREATE TABLE IF NOT EXISTS demand_forecast (
+    product_id INTEGER PRIMARY KEY
+        REFERENCES products(product_id)
+        ON DELETE CASCADE,
+    avg_daily NUMERIC NOT NULL,
+    smoothed_daily NUMERIC NOT NULL,
+    days_of_cover NUMERIC,
+    suggested_qty INTEGER NOT NULL DEFAULT 0,
+    computed_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS supplier_order_suggestions (
+    supplier_id INTEGER PRIMARY KEY,
+    product_count INTEGER NOT NULL,
+    units INTEGER NOT NULL,
+    min_days_of_cover NUMERIC,
+    computed_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+
+-- ============================================
+-- 11. Sales archive
+-- ============================================
+CREATE TABLE IF NOT EXISTS sales_archive_log (
+    period VARCHAR(16) PRIMARY KEY,
+    period_start DATETIME,
+    period_end DATETIME NOT NULL,
+    file_path VARCHAR(255) NOT NULL,
+    sales_count INTEGER NOT NULL,
+    line_count INTEGER NOT NULL,
+    revenue NUMERIC NOT NULL,
+    archived_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS product_sales_archived (
+    product_id INTEGER PRIMARY KEY,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC NOT NULL DEFAULT 0
+);
+
+
+-- ============================================
+-- 12. Stock ledger
+-- ============================================
+CREATE TABLE IF NOT EXISTS stock_movements (
+    movement_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    delta INTEGER NOT NULL,
+    reason VARCHAR(16) NOT NULL,
+    sale_id INTEGER,
+    moved_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_movements_product ON stock_movements (product_id, movement_id);
+CREATE INDEX IF NOT EXISTS idx_movements_time ON stock_movements (product_id, moved_at);
+
+CREATE TABLE IF NOT EXISTS stock_snapshots (
+    product_id INTEGER NOT NULL,
+    last_movement_id INTEGER NOT NULL,
+    last_moved_at DATETIME,
+    quantity INTEGER NOT NULL,
+    taken_at DATETIME DEFAULT (datetime('now', 'localtime')),
+    PRIMARY KEY (product_id, last_movement_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_snapshots_time ON stock_snapshots (product_id, taken_at);
+
+
+-- ============================================
+-- 13. Background jobs
+-- ============================================
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_type VARCHAR(40) NOT NULL,
+    params TEXT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    progress INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    message VARCHAR(255),
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    result_path VARCHAR(255),
+    owner VARCHAR(100) NOT NULL,
+    submitted_by INTEGER,
+    created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+    started_at DATETIME,
+    finished_at DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs (owner, status);
@@ -0,0 +1,107 @@
+import logging
+import os
+
+import click
+from gunicorn.app.base import BaseApplication
+
+import db
+import jobs
+import migrations
+from config import (
+    SERVER_BIND,
+    SERVER_WORKERS,
+    SERVER_THREADS,
+    SERVER_TIMEOUT,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_MAX_REQUESTS,
+    SERVER_MAX_REQUESTS_JITTER,
+)
+
+# ----------------------------------------------------
+# Production server: gunicorn, configured from config.py
+#   python server.py [--bind HOST:PORT] [--workers N] [--threads N]
+#
+# The master imports the app, applies pending online migrations and
+# compiles every template once, then forks the workers, so they start
+# warm and share those pages copy-on-write. Nothing database-side
+# crosses the fork: the master closes its pools before forking and
+# each worker builds its own pools and job runner on first use.
+#
+# Signals to the master:
+#   TERM / INT   graceful shutdown: stop accepting, let in-flight
+#                requests finish (up to SERVER_GRACEFUL_TIMEOUT)
+#   HUP          replace every worker the same way (config reload;
+#                code is preloaded, so deploys need USR2 + TERM of
+#                the old master, or a restart)
+#   TTIN / TTOU  one worker more / fewer
+#
+# Workers are recycled after SERVER_MAX_REQUESTS requests (jittered
+# so they don't all restart together). A background job still running
+# when its worker exits is marked failed when the replacement worker
+# starts, or when it is polled (jobs.fail_orphaned_jobs).
+# ----------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+
+def load_app():
+    applied, blocked = migrations.migrate()
+    if blocked:
+        log.warning("Migration %04d %s blocks writes and was not applied; "
+                    "run flask --app app migrate --allow-offline", blocked.version, blocked.name)
+
+    from app import app
+
+    env = app.jinja_env
+    for name in env.list_templates():
+        env.get_template(name)
+
+    db.reset_pool()     # connections opened while loading stay in the master
+    return app
+
+
+def post_fork(server, worker):
+    db.reset_pool()
+    jobs.reset_runner()
+    # A worker is usually forked to replace one that exited (recycled
+    # or killed); fail the jobs that went with it
+    try:
+        jobs.fail_orphaned_jobs()
+    except Exception:
+        log.exception("Could not fail orphaned jobs")
+
+
+class StoreServer(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return load_app()
+
+
+@click.command()
+@click.option('--bind', default=SERVER_BIND)
+@click.option('--workers', type=int, default=SERVER_WORKERS)
+@click.option('--threads', type=int, default=SERVER_THREADS)
+def main(bind, workers, threads):
+    StoreServer({
+        "bind": bind,
+        "workers": workers or os.cpu_count() or 1,
+        "threads": threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": SERVER_TIMEOUT,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "max_requests": SERVER_MAX_REQUESTS,
+        "max_requests_jitter": SERVER_MAX_REQUESTS_JITTER,
+        "post_fork": post_fork,
+    }).run()
+
+
+if __name__ == '__main__':
+    main()
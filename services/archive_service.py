@@ -0,0 +1,77 @@
+import os
+from datetime import date
+
+from config import ARCHIVE_DIR, SALES_KEEP_MONTHS, SALES_PARTITION_MONTHS_AHEAD
+from repositories.archive_repo import (
+    ensure_sales_partitions,
+    get_closed_periods,
+    is_archived,
+    record_archived_period,
+    drop_sales_period,
+)
+from services.export_service import export_sales
+from services.version_service import mark_changed
+
+# Lower bound for the oldest period, which has no start of its own
+EARLIEST = date(1970, 1, 1)
+
+
+def _add_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def prepare_partitions(months_ahead=SALES_PARTITION_MONTHS_AHEAD):
+    return ensure_sales_partitions(months_ahead)
+
+
+def _write_archive(path, start, end):
+    """Write the period as gzipped CSV, atomically (temp file + rename)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as out:
+        for part in export_sales(start or EARLIEST, end, fmt="csv", compress=True):
+            out.write(part)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, path)
+
+
+def archive_sales(keep_months=SALES_KEEP_MONTHS, directory=ARCHIVE_DIR,
+                  dry_run=False, today=None):
+    """Export and drop every period older than the last keep_months months.
+
+    Each period is written to <directory>/sales_<period>.csv.gz, logged
+    (with its per-product totals) and only then dropped, so a crash at
+    any point can be resumed by running the job again. Sales without
+    any lines have nothing to export and are dropped with their period.
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1 (the current month stays online).")
+
+    cutoff = _add_months(today or date.today(), -(keep_months - 1))
+    results = []
+
+    for name, start, end in get_closed_periods(cutoff):
+        path = os.path.join(directory, f"sales_{name}.csv.gz")
+        result = {"period": name, "start": start, "end": end, "file": path}
+
+        if dry_run:
+            result["status"] = "would archive"
+            results.append(result)
+            continue
+
+        if is_archived(name):
+            result["status"] = "dropped (already archived)"
+        else:
+            _write_archive(path, start, end)
+            logged = record_archived_period(name, start, end, path)
+            result.update(logged or {})
+            result["status"] = "archived"
+
+        drop_sales_period(name, start, end)
+        results.append(result)
+
+    if results and not dry_run:
+        mark_changed('sales')
+    return results
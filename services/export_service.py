@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from config import EXPORT_CHUNK_SIZE
+from repositories.export_repo import EXPORT_COLUMNS, iter_sales_report
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def parse_date_range(start, end):
+    """'YYYY-MM-DD' strings, end inclusive -> (start, end_exclusive) datetimes."""
+    try:
+        start_dt = datetime.strptime(start, "%Y-%m-%d")
+        end_dt = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1)
+    except (TypeError, ValueError):
+        raise ValueError("start and end must be dates in YYYY-MM-DD format.")
+    if end_dt <= start_dt:
+        raise ValueError("end must not be before start.")
+    return start_dt, end_dt
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return str(value)       # Decimal
+
+
+def _csv_chunks(chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows([[_plain(v) for v in row] for row in rows])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _jsonl_chunks(chunks):
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain, row))), separators=(",", ":")) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def _gzip(parts):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)     # 31 = gzip container
+    for part in parts:
+        data = compressor.compress(part)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_sales(start, end, cashier=None, fmt="csv", compress=False):
+    """Generator of bytes for a sales_report export; memory stays at one chunk."""
+    chunks = iter_sales_report(start, end, cashier, EXPORT_CHUNK_SIZE)
+    parts = _csv_chunks(chunks) if fmt == "csv" else _jsonl_chunks(chunks)
+    return _gzip(parts) if compress else parts
+
+
+def export_filename(start, end, fmt, compress):
+    name = f"sales_{start:%Y%m%d}_{(end - timedelta(days=1)):%Y%m%d}.{fmt}"
+    return name + ".gz" if compress else name
@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from repositories.forecast_repo import (
+    get_forecast_products,
+    get_daily_units,
+    save_forecast,
+    get_supplier_suggestions,
+)
+from config import (
+    FORECAST_HISTORY_DAYS,
+    FORECAST_WINDOW,
+    FORECAST_ALPHA,
+    FORECAST_LEAD_DAYS,
+    FORECAST_COVER_DAYS,
+    FORECAST_SAFETY_Z,
+)
+
+# ----------------------------------------------------
+# Vectorized demand forecast
+#
+# Daily units for every product go into one (products x days) matrix;
+# every statistic below is a whole-matrix NumPy operation, so the cost
+# is a few array passes regardless of catalog size. Per product:
+#   avg_daily      moving average over the last FORECAST_WINDOW days
+#   smoothed_daily simple exponential smoothing (level after last day)
+#   days_of_cover  stock / smoothed_daily
+#   suggested_qty  order-up-to: demand over lead time + cover period,
+#                  plus safety stock, minus stock on hand
+# ----------------------------------------------------
+
+def demand_matrix(product_ids, history, start, days):
+    """Scatter (product_id, sale_day, units) rows into a len(product_ids) x days array.
+
+    product_ids must be sorted; rows for unknown products or days
+    outside the window are dropped.
+    """
+    demand = np.zeros((len(product_ids), days))
+    if not history or not len(product_ids):
+        return demand
+
+    pids = np.fromiter((r[0] for r in history), dtype=np.int64, count=len(history))
+    sale_days = np.array([str(r[1])[:10] for r in history], dtype="datetime64[D]")
+    units = np.fromiter((r[2] for r in history), dtype=np.float64, count=len(history))
+
+    rows = np.searchsorted(product_ids, pids)
+    cols = (sale_days - np.datetime64(start, "D")).astype(np.int64)
+    valid = (rows < len(product_ids)) & (cols >= 0) & (cols < days)
+    valid[valid] &= product_ids[rows[valid]] == pids[valid]
+
+    np.add.at(demand, (rows[valid], cols[valid]), units[valid])
+    return demand
+
+
+def smoothing_weights(days, alpha):
+    """Weights w such that demand @ w is the exponential smoothing level.
+
+    Level starts at the first day's value: L = (1-a)^(n-1) x0 + sum a(1-a)^(n-1-i) xi
+    """
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (days - 1)
+    return weights
+
+
+def forecast(demand, stock, reorder_qty, window=FORECAST_WINDOW, alpha=FORECAST_ALPHA,
+             lead_days=FORECAST_LEAD_DAYS, cover_days=FORECAST_COVER_DAYS,
+             safety_z=FORECAST_SAFETY_Z):
+    """Per-product arrays (avg_daily, smoothed_daily, days_of_cover, suggested_qty)."""
+    recent = demand[:, -window:]
+    avg_daily = recent.mean(axis=1)
+    spread = recent.std(axis=1)
+    smoothed = demand @ smoothing_weights(demand.shape[1], alpha)
+
+    cover = np.full(len(stock), np.inf)
+    np.divide(stock, smoothed, out=cover, where=smoothed > 0)
+
+    target = smoothed * (lead_days + cover_days) + safety_z * spread * np.sqrt(lead_days)
+    qty = np.ceil(np.clip(target - stock, 0, None))
+    # Never suggest less than the product's fixed order quantity
+    qty = np.where(qty > 0, np.maximum(qty, reorder_qty), 0)
+
+    return avg_daily, smoothed, cover, qty.astype(np.int64)
+
+
+def per_supplier(supplier_ids, cover, qty):
+    """Group product results by supplier: (supplier_id, products, units, min cover)."""
+    ordering = qty > 0
+    if not ordering.any():
+        return []
+
+    suppliers, inverse = np.unique(supplier_ids[ordering], return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(suppliers))
+    units = np.bincount(inverse, weights=qty[ordering], minlength=len(suppliers))
+    min_cover = np.full(len(suppliers), np.inf)
+    np.minimum.at(min_cover, inverse, cover[ordering])
+
+    return [
+        (int(s), int(n), int(u), None if np.isinf(c) else round(float(c), 1))
+        for s, n, u, c in zip(suppliers, counts, units, min_cover)
+    ]
+
+
+def run_forecast(today=None, progress=None):
+    """Load history, forecast every product and store the results.
+
+    progress(done, total), if given, is called after loading and after
+    the forecast, before anything is stored. Returns (products,
+    suppliers_with_orders, units_suggested).
+    """
+    today = today or date.today()
+    start = today - timedelta(days=FORECAST_HISTORY_DAYS)
+
+    products = get_forecast_products()
+    history = get_daily_units(start, today)
+    if progress:
+        progress(1, 3)
+
+    n = len(products)
+    product_ids = np.fromiter((p[0] for p in products), dtype=np.int64, count=n)
+    supplier_ids = np.fromiter((p[1] or 0 for p in products), dtype=np.int64, count=n)
+    stock = np.fromiter((p[2] for p in products), dtype=np.float64, count=n)
+    reorder_qty = np.fromiter((p[3] for p in products), dtype=np.float64, count=n)
+
+    demand = demand_matrix(product_ids, history, start, FORECAST_HISTORY_DAYS)
+    avg_daily, smoothed, cover, qty = forecast(demand, stock, reorder_qty)
+
+    cover_out = np.round(cover, 1).astype(object)
+    cover_out[np.isinf(cover)] = None
+    product_rows = list(zip(
+        product_ids.tolist(),
+        np.round(avg_daily, 3).tolist(),
+        np.round(smoothed, 3).tolist(),
+        cover_out.tolist(),
+        qty.tolist(),
+    ))
+    supplier_rows = per_supplier(supplier_ids, cover, qty)
+    if progress:
+        progress(2, 3)
+
+    save_forecast(product_rows, supplier_rows)
+    return n, len(supplier_rows), int(qty.sum())
+
+
+def supplier_suggestions():
+    return get_supplier_suggestions()
@@ -0,0 +1,150 @@
+import csv
+
+from db import run_in_transaction, dialect
+from cache import bump_catalog_version
+from config import IMPORT_CHUNK_SIZE, IMPORT_MAX_ERRORS
+from repositories.import_repo import find_supplier_ids, upsert_products, upsert_suppliers
+from services.product_service import validate_product_fields
+from services.version_service import mark_changed
+
+PRODUCT_COLUMNS = ("product_name", "sku", "price", "quantity", "supplier")
+SUPPLIER_COLUMNS = ("supplier_name", "contact_info")
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []        # first IMPORT_MAX_ERRORS of (line, message)
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "error_count": self.error_count,
+            "errors": [{"line": line, "error": msg} for line, msg in self.errors],
+        }
+
+
+def _read_chunks(stream, required):
+    """Yield lists of (line_number, row_dict) without reading the whole file."""
+    reader = csv.DictReader(stream)
+    header = [c.strip() for c in (reader.fieldnames or [])]
+    missing = [c for c in required if c not in header]
+    if missing:
+        raise ValueError("Missing CSV columns: " + ", ".join(missing))
+    reader.fieldnames = header
+
+    chunk = []
+    for row in reader:
+        chunk.append((reader.line_num, row))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_chunk(result, lines, rows, write):
+    """Write a chunk in one transaction; if a row's values are rejected,
+    retry row by row to pinpoint them.
+
+    Any other failure (lost connection, pool timeout, a bug) would fail
+    every row the same way, so it is raised instead.
+    """
+    if not rows:
+        return
+    try:
+        run_in_transaction(lambda cursor: write(cursor, rows))
+        result.imported += len(rows)
+        return
+    except dialect.RowError:
+        pass
+
+    for line, row in zip(lines, rows):
+        try:
+            run_in_transaction(lambda cursor: write(cursor, [row]))
+            result.imported += 1
+        except dialect.RowError as e:
+            result.error(line, "Database error: " + str(e))
+
+
+# ----------------------------------------------------
+# Products: upsert by SKU, supplier given by name
+# ----------------------------------------------------
+def import_products_csv(stream):
+    result = ImportResult()
+    supplier_ids = {}       # supplier name -> id, filled chunk by chunk
+
+    for chunk in _read_chunks(stream, PRODUCT_COLUMNS):
+        result.rows += len(chunk)
+
+        # Resolve all new supplier names of this chunk in one query
+        unseen = {(row.get("supplier") or "").strip() for _, row in chunk}
+        unseen = [name for name in unseen if name and name not in supplier_ids]
+        if unseen:
+            found = run_in_transaction(lambda cursor: find_supplier_ids(cursor, unseen))
+            for name in unseen:
+                supplier_ids[name] = found.get(name)
+
+        lines, rows = [], []
+        for line, row in chunk:
+            try:
+                name, sku, price, qty = validate_product_fields(
+                    row.get("product_name"), row.get("sku"),
+                    row.get("price"), row.get("quantity"),
+                )
+            except ValueError as e:
+                result.error(line, str(e))
+                continue
+
+            supplier_name = (row.get("supplier") or "").strip()
+            supplier_id = None
+            if supplier_name:
+                supplier_id = supplier_ids.get(supplier_name)
+                if supplier_id is None:
+                    result.error(line, f"Unknown supplier: {supplier_name}")
+                    continue
+
+            lines.append(line)
+            rows.append((name, sku, price, qty, supplier_id))
+
+        _write_chunk(result, lines, rows, upsert_products)
+
+    if result.imported:
+        bump_catalog_version()
+        mark_changed('products')
+    return result
+
+
+# ----------------------------------------------------
+# Suppliers: upsert by supplier name
+# ----------------------------------------------------
+def import_suppliers_csv(stream):
+    result = ImportResult()
+
+    for chunk in _read_chunks(stream, SUPPLIER_COLUMNS):
+        result.rows += len(chunk)
+
+        lines, rows = [], []
+        for line, row in chunk:
+            name = (row.get("supplier_name") or "").strip()
+            contact = (row.get("contact_info") or "").strip()
+            if not name or not contact:
+                result.error(line, "Both fields required.")
+                continue
+            lines.append(line)
+            rows.append((name, contact))
+
+        _write_chunk(result, lines, rows, upsert_suppliers)
+
+    if result.imported:
+        bump_catalog_version()
+        mark_changed('suppliers', 'products')
+    return result
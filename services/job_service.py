@@ -0,0 +1,123 @@
+import json
+
+from jobs import register_job_type, get_runner, job_types, fail_if_orphaned
+from repositories.job_repo import get_job, get_recent_jobs, request_cancel
+from services.export_service import EXPORT_FORMATS, parse_date_range, export_sales, export_filename
+from services.report_service import rebuild_sales_rollups, reconcile_sales_totals
+from services.forecast_service import run_forecast
+from services.sales_service import check_sale_totals
+
+
+# ----------------------------------------------------
+# Job types
+# ----------------------------------------------------
+def _prepare_export(params):
+    fmt = params.get("format") or "csv"
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError("format must be csv or jsonl.")
+    parse_date_range(params.get("start"), params.get("end"))    # validates
+    return {
+        "start": params["start"],
+        "end": params["end"],
+        "cashier": (params.get("cashier") or "").strip() or None,
+        "format": fmt,
+        "gzip": bool(params.get("gzip")),
+    }
+
+
+def _run_export(ctx, start, end, cashier, format, gzip):
+    start, end = parse_date_range(start, end)
+    path = ctx.output_path(export_filename(start, end, format, gzip))
+
+    written = 0
+    with open(path, "wb") as out:
+        for part in export_sales(start, end, cashier, format, gzip):
+            out.write(part)
+            written += len(part)
+            ctx.progress(written, None, f"{written / 1e6:.1f} MB written")
+
+    return {"bytes": written}
+
+
+def _phases(ctx):
+    """Progress callback for jobs with a few long phases: every call checks for cancellation."""
+    return lambda done, total: ctx.progress(done, total, force=True)
+
+
+def _run_rebuild(ctx):
+    # One transaction: check for cancellation between tables without writing progress
+    product_rows, cashier_rows, total_rows = rebuild_sales_rollups(ctx.check_cancelled)
+    return {
+        "sales_daily_product": product_rows,
+        "sales_daily_cashier": cashier_rows,
+        "product_sales_totals": total_rows,
+    }
+
+
+def _prepare_reconcile(params):
+    return {"repair": bool(params.get("repair"))}
+
+
+def _run_reconcile(ctx, repair):
+    mismatches = reconcile_sales_totals(repair, _phases(ctx))
+    return {
+        "mismatches": len(mismatches),
+        "repaired": repair,
+        "product_ids": [m["product_id"] for m in mismatches[:100]],
+    }
+
+
+def _run_sale_check(ctx, repair):
+    drift = check_sale_totals(repair, lambda done, total: ctx.progress(done, total))
+    return {
+        "drifted": len(drift),
+        "repaired": repair,
+        "sale_ids": [d["sale_id"] for d in drift[:100]],
+    }
+
+
+def _run_forecast(ctx):
+    products, suppliers, units = run_forecast(progress=_phases(ctx))
+    return {"products": products, "suppliers": suppliers, "units": units}
+
+
+register_job_type("export-sales", _run_export, _prepare_export)
+register_job_type("rebuild-rollups", _run_rebuild)
+register_job_type("reconcile-sales-totals", _run_reconcile, _prepare_reconcile)
+register_job_type("check-sale-totals", _run_sale_check, _prepare_reconcile)
+register_job_type("forecast-demand", _run_forecast)
+
+
+# ----------------------------------------------------
+# Submit / poll / cancel
+# ----------------------------------------------------
+def available_job_types():
+    return job_types()
+
+def submit_job(job_type, params, user_id=None):
+    return get_runner().submit(job_type, params, user_id)
+
+def job_status(job_id):
+    """The job row with params / result decoded, or None.
+
+    A job still shown as active whose process on this host has exited
+    is failed first, so a poll never waits on a job nobody is running.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return None
+    if fail_if_orphaned(job):
+        job = get_job(job_id)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+def recent_jobs(limit=50):
+    return get_recent_jobs(limit)
+
+def cancel_job(job_id):
+    return request_cancel(job_id)
+
+def runner_stats():
+    return get_runner().stats()
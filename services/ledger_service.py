@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta
+
+from repositories.ledger_repo import take_stock_snapshots, get_stock_at
+
+
+def parse_point_in_time(value):
+    """'YYYY-MM-DD' (end of that day) or 'YYYY-MM-DD HH:MM[:SS]' -> datetime."""
+    value = (value or "").strip()
+    try:
+        if len(value) == 10:
+            return datetime.strptime(value, "%Y-%m-%d") + timedelta(days=1, seconds=-1)
+        return datetime.fromisoformat(value).replace(microsecond=0, tzinfo=None)
+    except ValueError:
+        raise ValueError("at must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS.")
+
+
+def snapshot_stock():
+    return take_stock_snapshots()
+
+
+def stock_at(at, after_id=None, limit=50, product_id=None):
+    return get_stock_at(at, after_id, limit, product_id)
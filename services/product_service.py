@@ -1,22 +1,94 @@
 from repositories.product_repo import (
     get_all_products,
+    get_products_page,
     get_product,
+    get_product_by_sku,
+    search_products,
     add_product,
     update_product,
     delete_product
 )
+from cache import LRUCache, bump_catalog_version
+from services.version_service import mark_changed
+from config import CATALOG_CACHE_SIZE, PRODUCT_CACHE_TTL, LOW_STOCK_THRESHOLD
+
+# Keyed by ("id", product_id) and ("sku", sku)
+product_cache = LRUCache("products", CATALOG_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+
+def validate_product_fields(name, sku, price, qty):
+    """Server-side rules for a product row (form or import).
+
+    Returns (name, sku, price, qty) cleaned and converted; raises
+    ValueError with a user-facing message otherwise.
+    """
+    name = (name or "").strip()
+    sku = (sku or "").strip()
+    price = (price or "").strip() if isinstance(price, str) else price
+    qty = (qty or "").strip() if isinstance(qty, str) else qty
+
+    if not name or not sku or price in ("", None) or qty in ("", None):
+        raise ValueError("All fields are required.")
+
+    try:
+        price = float(price)
+        qty = int(qty)
+    except ValueError:
+        raise ValueError("Invalid price or quantity.")
+
+    if price <= 0 or qty < 0:
+        raise ValueError("Price must be > 0 and Quantity ≥ 0.")
+
+    return name, sku, price, qty
+
+def validate_reorder_fields(reorder_point, reorder_qty):
+    """Reorder point / quantity from a form; blanks take the defaults."""
+    reorder_point = str(reorder_point if reorder_point is not None else "").strip()
+    reorder_qty = str(reorder_qty if reorder_qty is not None else "").strip()
+
+    try:
+        reorder_point = int(reorder_point) if reorder_point else LOW_STOCK_THRESHOLD
+        reorder_qty = int(reorder_qty) if reorder_qty else 0
+    except ValueError:
+        raise ValueError("Invalid reorder point or reorder quantity.")
+
+    if reorder_point < 0 or reorder_qty < 0:
+        raise ValueError("Reorder point and reorder quantity must be ≥ 0.")
+
+    return reorder_point, reorder_qty
 
 def list_products():
     return get_all_products()
 
+def find_products(term, limit=10):
+    return search_products(term, limit)
+
+def list_products_page(after_id=None, limit=50, supplier_id=None,
+                       name_prefix=None, low_stock=False):
+    return get_products_page(after_id, limit, supplier_id, name_prefix, low_stock)
+
 def product_details(product_id):
-    return get_product(product_id)
+    return product_cache.get(("id", product_id), lambda: get_product(product_id))
+
+def product_by_sku(sku):
+    return product_cache.get(("sku", sku), lambda: get_product_by_sku(sku))
 
-def create_product(name, sku, price, qty, supplier_id):
-    add_product(name, sku, price, qty, supplier_id)
+def create_product(name, sku, price, qty, supplier_id,
+                   reorder_point=LOW_STOCK_THRESHOLD, reorder_qty=0):
+    add_product(name, sku, price, qty, supplier_id, reorder_point, reorder_qty)
+    bump_catalog_version()
+    mark_changed('products')
 
-def edit_product(product_id, name, sku, price, qty, supplier_id):
-    update_product(product_id, name, sku, price, qty, supplier_id)
+def edit_product(product_id, name, sku, price, qty, supplier_id,
+                 reorder_point=LOW_STOCK_THRESHOLD, reorder_qty=0):
+    update_product(product_id, name, sku, price, qty, supplier_id,
+                   reorder_point, reorder_qty)
+    bump_catalog_version()
+    mark_changed('products')
 
 def remove_product(product_id):
-    delete_product(product_id)
+    """False when the product has sale lines and was kept."""
+    if not delete_product(product_id):
+        return False
+    bump_catalog_version()
+    mark_changed('products')
+    return True
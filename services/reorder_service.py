@@ -0,0 +1,14 @@
+from repositories.reorder_repo import (
+    get_open_alerts,
+    get_suggested_orders,
+    suggest_purchase_orders,
+)
+
+def open_alerts():
+    return get_open_alerts()
+
+def suggested_orders(limit=20):
+    return get_suggested_orders(limit)
+
+def run_reorder_job():
+    return suggest_purchase_orders()
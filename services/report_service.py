@@ -0,0 +1,22 @@
+from repositories.rollup_repo import (
+    get_sales_summary,
+    get_dashboard_totals,
+    get_top_products,
+    rebuild_rollups,
+    reconcile_product_totals,
+)
+
+def sales_summary():
+    return get_sales_summary()
+
+def dashboard_totals():
+    return get_dashboard_totals()
+
+def top_products(limit=10):
+    return get_top_products(limit)
+
+def rebuild_sales_rollups(checkpoint=None):
+    return rebuild_rollups(checkpoint)
+
+def reconcile_sales_totals(repair=False, progress=None):
+    return reconcile_product_totals(repair, progress)
@@ -1,11 +1,96 @@
+from datetime import datetime, timedelta
+
+from config import SALES_CHECK_CHUNK
 from repositories.sales_repo import (
-    get_sales_list,
+    get_sales_page,
+    get_sale_id_bounds,
+    get_total_drift,
+    repair_sale_totals,
     get_sale_details,
+    get_sale_items,
+    create_sale,
+    add_item_to_sale,
+    increase_sale_item,
+    decrease_sale_item,
+    remove_sale_item,
+    checkout_sale,
+    CheckoutError,
 )
+from repositories.stock_repo import OutOfStock
 from repositories.product_repo import get_product
+from services.version_service import mark_changed
+
+def parse_sales_filters(start, end):
+    """Optional 'YYYY-MM-DD' bounds, end inclusive -> (start, end_exclusive) or None each."""
+    try:
+        start_dt = datetime.strptime(start, "%Y-%m-%d") if start else None
+        end_dt = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format.")
+    if start_dt and end_dt and end_dt <= start_dt:
+        raise ValueError("The end date must not be before the start date.")
+    return start_dt, end_dt
+
+def list_sales_page(after_id=None, limit=50, start=None, end=None, cashier=None):
+    return get_sales_page(after_id, limit, start, end, cashier)
+
+def check_sale_totals(repair=False, progress=None):
+    """Sales whose total_amount differs from the sum of their lines.
 
-def list_sales():
-    return get_sales_list()
+    Scans sale_id ranges of SALES_CHECK_CHUNK; progress(done, total),
+    if given, is called after each one. With repair=True the drifted
+    totals are recomputed from the lines.
+    """
+    first, last = get_sale_id_bounds()
+    if first is None:
+        return []
+
+    drift = []
+    after = first - 1
+    while after < last:
+        until = min(after + SALES_CHECK_CHUNK, last)
+        drift.extend(get_total_drift(after, until))
+        if progress:
+            progress(until - first + 1, last - first + 1)
+        after = until
+
+    if repair and drift:
+        repair_sale_totals([d["sale_id"] for d in drift])
+        mark_changed('sales')
+    return drift
 
 def sale_info(sale_id):
     return get_sale_details(sale_id)
+
+def sale_items(sale_id):
+    return get_sale_items(sale_id)
+
+def start_sale(user_id):
+    sale_id = create_sale(user_id)
+    mark_changed('sales')
+    return sale_id
+
+def add_item(sale_id, product_id, qty):
+    added = add_item_to_sale(sale_id, product_id, qty)
+    if added:
+        mark_changed('sales', 'products')
+    return added
+
+def increase_item_qty(sale_id, product_id):
+    changed = increase_sale_item(sale_id, product_id)
+    if changed:
+        mark_changed('sales', 'products')
+    return changed
+
+def decrease_item_qty(sale_id, product_id):
+    decrease_sale_item(sale_id, product_id)
+    mark_changed('sales', 'products')
+
+def remove_item_line(sale_id, product_id):
+    remove_sale_item(sale_id, product_id)
+    mark_changed('sales', 'products')
+
+def checkout(user_id, lines):
+    result = checkout_sale(user_id, lines)
+    mark_changed('sales', 'products')
+    return result
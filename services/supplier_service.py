@@ -1,22 +1,38 @@
 from repositories.supplier_repo import (
     get_suppliers,
     get_supplier,
+    get_suppliers_page,
     add_supplier,
     update_supplier,
     delete_supplier
 )
+from cache import LRUCache, bump_catalog_version
+from services.version_service import mark_changed
+from config import SUPPLIER_CACHE_TTL
+
+# Single entry: the full supplier list used by the product form dropdowns
+supplier_cache = LRUCache("suppliers", 1, ttl=SUPPLIER_CACHE_TTL)
 
 def list_suppliers():
-    return get_suppliers()
+    return supplier_cache.get("all", get_suppliers)
+
+def list_suppliers_page(after_id=None, limit=50):
+    return get_suppliers_page(after_id, limit)
 
 def supplier_details(supplier_id):
     return get_supplier(supplier_id)
 
 def create_supplier(name, contact):
     add_supplier(name, contact)
+    bump_catalog_version()
+    mark_changed('suppliers')
 
 def edit_supplier(supplier_id, name, contact):
     update_supplier(supplier_id, name, contact)
+    bump_catalog_version()
+    mark_changed('suppliers', 'products')
 
 def remove_supplier(supplier_id):
     delete_supplier(supplier_id)
+    bump_catalog_version()
+    mark_changed('suppliers', 'products')
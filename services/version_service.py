@@ -0,0 +1,7 @@
+from repositories.version_repo import bump_versions, get_versions
+
+def mark_changed(*tables):
+    bump_versions(tables)
+
+def table_versions(*tables):
+    return get_versions(tables)
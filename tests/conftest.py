@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+# The tests run against the embedded SQLite backend; config has to be
+# set before db (and the backend it loads) is imported.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)      # schema files are opened relative to the repo root
+
+import config  # noqa: E402
+
+config.DB_BACKEND = "sqlite"
+config.SQLITE_PATH = os.path.join(ROOT, ".pytest_cache", "store_test.db")
+
+
+@pytest.fixture
+def store():
+    """A freshly migrated database, with empty in-process caches."""
+    import cache
+    import db
+    import migrations
+
+    db.reset_pool()
+    for c in cache._registry:
+        c.clear()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(config.SQLITE_PATH + suffix):
+            os.remove(config.SQLITE_PATH + suffix)
+    os.makedirs(os.path.dirname(config.SQLITE_PATH), exist_ok=True)
+
+    migrations.migrate(out=lambda line: None)
+    yield
+    db.reset_pool()
+
+
+@pytest.fixture
+def client(store):
+    from app import app
+
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """login(role) signs the test client in as the seeded manager or cashier."""
+    users = {"manager": (1, "manager"), "cashier": (2, "cashier1")}
+
+    def sign_in(role):
+        user_id, username = users[role]
+        with client.session_transaction() as session:
+            session["user_id"] = user_id
+            session["username"] = username
+            session["role"] = role
+        return client
+
+    return sign_in
@@ -0,0 +1,53 @@
+from services.product_service import create_product, edit_product
+
+
+def test_unchanged_collection_is_answered_with_304(login):
+    client = login("manager")
+
+    first = client.get("/api/v1/products?limit=1")
+    again = client.get("/api/v1/products?limit=1", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+    assert [p["sku"] for p in first.get_json()["data"]] == ["MILK1L"]
+    assert first.get_json()["next"] == 2
+    assert again.status_code == 304 and again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_a_write_changes_the_etag(login):
+    client = login("manager")
+    etag = client.get("/api/v1/products").headers["ETag"]
+
+    edit_product(2, "Milk 1L", "MILK1L", 1.25, 100, 2, 10, 0)
+    changed = client.get("/api/v1/products", headers={"If-None-Match": etag})
+
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.get_json()["data"][0]["price"] in ("1.25", 1.25)
+
+
+def test_etag_is_per_query_and_per_table(login):
+    client = login("manager")
+    products = client.get("/api/v1/products").headers["ETag"]
+    low = client.get("/api/v1/products?low_stock=1").headers["ETag"]
+    suppliers = client.get("/api/v1/suppliers").headers["ETag"]
+
+    create_product("Bread", "BREAD1", 2.5, 20, None)
+
+    assert len({products, low, suppliers}) == 3
+    assert client.get("/api/v1/suppliers", headers={"If-None-Match": suppliers}).status_code == 304
+    assert client.get("/api/v1/products", headers={"If-None-Match": products}).status_code == 200
+
+
+def test_catalog_is_managers_only(login):
+    client = login("cashier")
+
+    assert client.get("/api/v1/products").status_code == 403
+    assert client.get("/api/v1/suppliers").status_code == 403
+    assert client.get("/api/v1/sales").status_code == 200
+
+
+def test_api_requires_login(client):
+    resp = client.get("/api/v1/sales")
+
+    assert resp.status_code == 401
+    assert resp.get_json() == {"error": "Login required."}
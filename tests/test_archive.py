@@ -0,0 +1,98 @@
+import csv
+import gzip
+import io
+from datetime import date, datetime
+
+import pytest
+
+import db
+from repositories import sales_repo
+from repositories.archive_repo import record_archived_period
+from repositories.rollup_repo import reconcile_product_totals
+from services.archive_service import archive_sales
+from services.product_service import remove_product
+from services.version_service import table_versions
+
+OLD = datetime(2024, 3, 15, 10, 30)
+
+
+def _execute(sql, params=()):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall() if cursor.description else None
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def _old_sale(product_id, qty):
+    """A sale rung up now and then moved back to OLD."""
+    sale_id = sales_repo.create_sale(2)
+    sales_repo.add_item_to_sale(sale_id, product_id, qty)
+    _execute("UPDATE sales SET sale_date = %s WHERE sale_id = %s", (OLD, sale_id))
+    _execute("UPDATE sale_items SET sale_date = %s WHERE sale_id = %s", (OLD, sale_id))
+    return sale_id
+
+
+def test_old_periods_are_exported_then_dropped(store, tmp_path):
+    _old_sale(1, 2)
+    current = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(current, 2, 1)
+    version = table_versions("sales")["sales"]
+
+    results = archive_sales(keep_months=1, directory=str(tmp_path), today=date(2024, 5, 20))
+
+    assert [(r["period"], r["status"]) for r in results] == [
+        ("p202403", "archived"), ("p202404", "archived"),
+    ]
+    assert (results[0]["sales"], results[0]["lines"]) == (1, 1)
+
+    with gzip.open(tmp_path / "sales_p202403.csv.gz", "rt") as f:
+        rows = list(csv.DictReader(io.StringIO(f.read())))
+    assert [(r["sku"], r["quantity_sold"]) for r in rows] == [("RICE25KG", "2")]
+
+    assert _execute("SELECT sale_id FROM sales") == [(current,)]
+    assert table_versions("sales")["sales"] > version
+    # Lifetime totals now come from the archived rows
+    assert reconcile_product_totals() == []
+
+
+def test_dry_run_changes_nothing(store, tmp_path):
+    _old_sale(1, 1)
+
+    results = archive_sales(keep_months=1, directory=str(tmp_path), dry_run=True,
+                            today=date(2024, 4, 2))
+
+    assert [r["status"] for r in results] == ["would archive"]
+    assert len(_execute("SELECT * FROM sales")) == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_a_logged_period_is_dropped_without_exporting_again(store, tmp_path):
+    _old_sale(2, 4)
+    record_archived_period("p202403", None, date(2024, 4, 1), "elsewhere.csv.gz")
+
+    results = archive_sales(keep_months=1, directory=str(tmp_path), today=date(2024, 4, 2))
+
+    assert [r["status"] for r in results] == ["dropped (already archived)"]
+    assert _execute("SELECT * FROM sale_items") == []
+    assert reconcile_product_totals() == []
+
+
+def test_current_month_always_stays():
+    with pytest.raises(ValueError):
+        archive_sales(keep_months=0)
+
+
+def test_products_with_sales_are_kept(login):
+    client = login("manager")
+    _old_sale(1, 1)
+
+    page = client.get("/products/delete/1").get_data(as_text=True)
+
+    assert not remove_product(1)
+    assert "Product has sales and can&#39;t be deleted." in page
+    assert remove_product(2)
+    assert [r[0] for r in _execute("SELECT product_id FROM products")] == [1]
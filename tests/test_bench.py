@@ -0,0 +1,70 @@
+import db
+from bench.__main__ import _compare
+from bench.datagen import generate
+from bench.driver import _percentile, run
+
+
+def _count(table):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return count
+
+
+def test_cursors_count_statements_per_thread(store):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    before = db.query_count()
+    cursor.execute("SELECT 1")
+    cursor.executemany("UPDATE products SET quantity = quantity WHERE product_id = %s", [(1,), (2,)])
+    conn.rollback()
+    cursor.close()
+    conn.close()
+
+    assert db.query_count() - before == 2
+
+
+def test_nearest_rank_percentiles():
+    values = list(range(1, 101))
+
+    assert [_percentile(values, p) for p in (50, 95, 99)] == [50, 95, 99]
+    assert _percentile([7], 99) == 7
+    assert _percentile([], 50) is None
+
+
+def test_generate_appends_synthetic_history(store):
+    generate(suppliers=3, products=20, cashiers=2, sales=30, days=10, log=lambda line: None)
+
+    assert (_count("suppliers"), _count("products"), _count("sales")) == (5, 22, 30)
+    assert _count("sale_items") >= 30
+    assert _count("sales_daily_product") > 0          # rollups rebuilt
+
+
+def test_run_reports_every_hot_route(store):
+    generate(suppliers=2, products=10, cashiers=1, sales=10, days=5, log=lambda line: None)
+
+    report = run(workers=2, requests_per_worker=5)
+
+    assert report["worker_errors"] == []
+    assert report["requests"] == 10
+    assert set(report["routes"]) == {
+        "/dashboard", "/products", "/sales", "/sales/add-item/<id>", "/sales/reports",
+    }
+    for r in report["routes"].values():
+        assert r["errors"] == 0
+        assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
+        assert r["queries_per_request"] >= 1
+
+
+def test_compare_shows_the_change(capsys):
+    route = {"p50_ms": 10, "p95_ms": 20, "p99_ms": 40, "queries_per_request": 4}
+    before = {"routes": {"/sales": route}}
+    after = {"routes": {"/sales": dict(route, p95_ms=30, queries_per_request=2)}}
+
+    _compare(before, after)
+
+    out = capsys.readouterr().out
+    assert "+50%" in out and "-50%" in out
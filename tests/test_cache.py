@@ -0,0 +1,63 @@
+import db
+from cache import LRUCache, bump_catalog_version
+from services.product_service import edit_product, product_details
+
+
+def _loader(values):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return values.pop(0)
+
+    return load, calls
+
+
+def test_hits_until_the_catalog_version_changes():
+    cache = LRUCache("test-version", 10)
+    load, calls = _loader(["old", "new"])
+
+    assert cache.get("k", load) == "old"
+    assert cache.get("k", load) == "old"
+    bump_catalog_version()
+    assert cache.get("k", load) == "new"
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_entries_expire_and_are_evicted():
+    cache = LRUCache("test-expiry", 2, ttl=0)
+    load, calls = _loader(["a", "b"])
+    cache.get("k", load)
+    cache.get("k", load)
+    assert len(calls) == 2                  # ttl 0: never a hit
+
+    lru = LRUCache("test-lru", 2)
+    for key in ("a", "b", "c"):
+        lru.put(key, key)
+    assert lru.stats()["evictions"] == 1
+    assert lru.get("a", lambda: "reloaded") == "reloaded"
+
+
+def test_missing_rows_are_not_cached():
+    cache = LRUCache("test-none", 10)
+    load, calls = _loader([None, "found"])
+
+    assert cache.get("k", load) is None
+    assert cache.get("k", load) == "found"
+
+
+def test_product_edits_invalidate_cached_products(store):
+    assert product_details(1)["product_name"] == "Rice Bag 25kg"
+
+    # A write that bypasses the service is not seen until the version moves
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE products SET product_name = 'Renamed' WHERE product_id = 1")
+    conn.commit()
+    cursor.close()
+    conn.close()
+    assert product_details(1)["product_name"] == "Rice Bag 25kg"
+
+    edit_product(1, "Rice Bag 10kg", "RICE10KG", 9.5, 40, 1)
+    assert product_details(1)["product_name"] == "Rice Bag 10kg"
@@ -0,0 +1,68 @@
+import pytest
+
+import db
+from repositories.sales_repo import CheckoutError, checkout_sale, get_sale_items
+
+
+def _stock():
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id, quantity FROM products ORDER BY product_id")
+    stock = dict(cursor.fetchall())
+    cursor.close()
+    conn.close()
+    return stock
+
+
+def _sale_count():
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sales")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return count
+
+
+def test_cart_is_sold_in_one_sale(store):
+    sale_id, total = checkout_sale(1, [
+        {"product_id": 1, "qty": 2},
+        {"sku": "MILK1L", "qty": 3},
+        {"product_id": 2, "qty": 1},        # merged with the SKU line
+    ])
+
+    assert round(float(total), 2) == 2 * 18.5 + 4 * 1.2
+    lines = {r["product_id"]: r["quantity_sold"] for r in get_sale_items(sale_id)}
+    assert lines == {1: 2, 2: 4}
+    assert _stock() == {1: 38, 2: 96}
+
+
+def test_bad_lines_reject_the_whole_cart(store):
+    before = _stock()
+
+    with pytest.raises(CheckoutError) as e:
+        checkout_sale(1, [
+            {"product_id": 1, "qty": 1},
+            {"product_id": 2, "qty": 101},
+            {"sku": "NOPE", "qty": 1},
+        ])
+
+    assert len(e.value.problems) == 2
+    assert _stock() == before
+    assert _sale_count() == 0
+
+
+def test_checkout_route(login):
+    client = login("cashier")
+
+    sold = client.post("/sales/checkout", json={"items": [{"sku": "RICE25KG", "qty": 1}]})
+    rejected = client.post("/sales/checkout", json={"items": [{"product_id": 2, "qty": 500}]})
+    invalid = client.post("/sales/checkout", json={"items": [{"product_id": 1, "qty": 0}]})
+
+    assert sold.status_code == 201 and sold.get_json()["total_amount"] in ("18.5", "18.50")
+    assert rejected.status_code == 409 and len(rejected.get_json()["problems"]) == 1
+    assert invalid.status_code == 400
+
+
+def test_checkout_requires_login(client):
+    assert client.post("/sales/checkout", json={"items": []}).status_code == 401
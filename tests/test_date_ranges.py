@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta
+
+import db
+from repositories.date_ranges import between_range, this_month_range, today_range
+from repositories.maintenance_repo import explain_index_usage
+
+
+def _count(where, params=()):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sales WHERE " + where, params)
+    count = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return count
+
+
+def _sales_at(*moments):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO sales (user_id, total_amount, sale_date) VALUES (1, 0, %s)",
+                       [(m,) for m in moments])
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def test_today_is_midnight_to_midnight(store):
+    midnight = datetime.combine(date.today(), datetime.min.time())
+    _sales_at(midnight, midnight + timedelta(hours=23, minutes=59, seconds=59),
+              midnight - timedelta(seconds=1), midnight + timedelta(days=1))
+
+    assert _count(today_range("sale_date")) == 2
+
+
+def test_this_month_starts_on_the_first(store):
+    first = datetime.combine(date.today().replace(day=1), datetime.min.time())
+    _sales_at(first, first - timedelta(seconds=1))
+
+    assert _count(this_month_range("sale_date")) == 1
+
+
+def test_between_range_is_half_open(store):
+    _sales_at(datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59), datetime(2024, 2, 1))
+
+    assert _count(between_range("sale_date"), (datetime(2024, 1, 1), datetime(2024, 2, 1))) == 2
+
+
+def test_reporting_queries_use_their_indexes(store):
+    results = explain_index_usage()
+
+    assert results
+    assert [r["check"] for r in results if not r["ok"]] == []
@@ -0,0 +1,93 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+
+from repositories import sales_repo
+from services import export_service
+from services.export_service import export_filename, export_sales, parse_date_range
+
+
+def _ring_up():
+    """Manager sells 2 rice, cashier1 sells 3 milk; both today."""
+    first = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(first, 1, 2)
+    second = sales_repo.create_sale(2)
+    sales_repo.add_item_to_sale(second, 2, 3)
+
+
+def _today():
+    day = date.today().isoformat()
+    return parse_date_range(day, day)
+
+
+def test_date_range_includes_the_end_day():
+    start, end = parse_date_range("2024-01-01", "2024-01-31")
+    assert (start, end) == (datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+    with pytest.raises(ValueError):
+        parse_date_range("2024-02-01", "2024-01-31")
+    with pytest.raises(ValueError):
+        parse_date_range("01/02/2024", "2024-01-31")
+
+
+def test_csv_export_has_a_header_and_one_row_per_line(store):
+    _ring_up()
+
+    text = b"".join(export_sales(*_today())).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(text)))
+
+    assert [(r["sold_by"], r["sku"], r["quantity_sold"]) for r in rows] == [
+        ("manager", "RICE25KG", "2"), ("cashier1", "MILK1L", "3"),
+    ]
+    assert float(rows[0]["line_total"]) == 37.0
+
+
+def test_jsonl_cashier_filter_and_gzip(store):
+    _ring_up()
+    start, end = _today()
+
+    plain = b"".join(export_sales(start, end, "cashier1", fmt="jsonl"))
+    packed = b"".join(export_sales(start, end, "cashier1", fmt="jsonl", compress=True))
+
+    assert gzip.decompress(packed) == plain
+    lines = [json.loads(line) for line in plain.decode("utf-8").splitlines()]
+    assert [(r["sold_by"], r["sku"]) for r in lines] == [("cashier1", "MILK1L")]
+
+
+def test_small_chunks_stream_every_row(store, monkeypatch):
+    monkeypatch.setattr(export_service, "EXPORT_CHUNK_SIZE", 1)
+    _ring_up()
+
+    parts = list(export_sales(*_today()))
+
+    assert len(parts) == 2                  # header rides with the first chunk
+    assert b"".join(parts).count(b"\n") == 3
+
+
+def test_stopping_early_leaves_the_pool_usable(store):
+    _ring_up()
+
+    body = export_sales(*_today(), fmt="jsonl")
+    next(body)
+    body.close()
+
+    assert b"".join(export_sales(*_today(), fmt="jsonl")).count(b"\n") == 2
+
+
+def test_export_route(login):
+    client = login("manager")
+    _ring_up()
+    day = date.today().isoformat()
+
+    resp = client.get(f"/sales/export?start={day}&end={day}&format=csv&gzip=1")
+    bad_format = client.get(f"/sales/export?start={day}&end={day}&format=xml")
+    bad_dates = client.get("/sales/export?start=yesterday&end=today")
+
+    assert resp.status_code == 200 and resp.mimetype == "application/gzip"
+    assert export_filename(*_today(), "csv", True) in resp.headers["Content-Disposition"]
+    assert gzip.decompress(resp.data).count(b"\n") == 3
+    assert bad_format.status_code == bad_dates.status_code == 400
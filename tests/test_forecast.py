@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+import db
+from repositories import sales_repo
+from services.forecast_service import (
+    demand_matrix,
+    forecast,
+    per_supplier,
+    run_forecast,
+    smoothing_weights,
+    supplier_suggestions,
+)
+
+
+def test_demand_matrix_scatters_and_sums_rows():
+    history = [
+        (1, "2024-01-01", 2), (1, "2024-01-01", 3), (3, "2024-01-03 00:00:00", 4),
+        (2, "2024-01-02", 9),               # not in product_ids
+        (1, "2023-12-31", 9), (3, "2024-01-04", 9),     # outside the window
+    ]
+
+    demand = demand_matrix(np.array([1, 3]), history, date(2024, 1, 1), 3)
+
+    assert demand.tolist() == [[5, 0, 0], [0, 0, 4]]
+
+
+def test_smoothing_weights_match_the_recurrence():
+    series = [4.0, 0.0, 7.0, 1.0, 3.0]
+    level = series[0]
+    for x in series[1:]:
+        level = 0.3 * x + 0.7 * level
+
+    weights = smoothing_weights(len(series), 0.3)
+
+    assert np.isclose(np.array(series) @ weights, level)
+    assert np.isclose(weights.sum(), 1.0)
+
+
+def test_steady_demand_orders_up_to_lead_time_plus_cover():
+    demand = np.array([[2.0] * 10, [0.0] * 10])
+    stock = np.array([10.0, 10.0])
+
+    avg, smoothed, cover, qty = forecast(demand, stock, np.array([50.0, 50.0]), window=5,
+                                         alpha=0.5, lead_days=3, cover_days=4, safety_z=1.65)
+
+    assert avg.tolist() == [2.0, 0.0] and np.allclose(smoothed, [2.0, 0.0])
+    assert cover[0] == 5.0 and np.isinf(cover[1])
+    assert qty.tolist() == [50, 0]              # 2 * 7 - 10 = 4, raised to reorder_qty
+
+
+def test_per_supplier_totals_only_products_to_order():
+    rows = per_supplier(np.array([1, 2, 1, 2]), np.array([3.0, np.inf, 1.5, 9.0]),
+                        np.array([10, 0, 5, 0]))
+
+    assert rows == [(1, 2, 15, 1.5)]
+
+
+def test_run_forecast_stores_both_tables(store):
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, 1, 5)
+    sales_repo.add_item_to_sale(sale_id, 2, 95)
+    phases = []
+
+    result = run_forecast(date.today() + timedelta(days=1),
+                          progress=lambda done, total: phases.append(done))
+
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id, suggested_qty FROM demand_forecast ORDER BY product_id")
+    stored = [tuple(r) for r in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+
+    # Milk: one day of 95 -> smoothed 19/day; 19 * 21 + 1.65 * std * sqrt(7) - 5 on hand
+    spread = np.std([95] + [0] * 27)
+    milk = int(np.ceil(19 * 21 + 1.65 * spread * np.sqrt(7) - 5))
+    assert stored == [(1, 0), (2, milk)]
+    assert result == (2, 1, milk)
+    assert phases == [1, 2]
+    assert [(s["supplier_id"], s["units"]) for s in supplier_suggestions()] == [(2, milk)]
@@ -0,0 +1,114 @@
+import io
+import sqlite3
+
+import pytest
+
+import db
+from services import import_service
+from services.import_service import ImportResult, _write_chunk, import_products_csv, import_suppliers_csv
+
+
+def _csv(*lines):
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+def _product(sku):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_name, price, quantity, supplier_id FROM products WHERE sku = %s", (sku,))
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return tuple(row) if row else None
+
+
+def test_bad_rows_are_reported_by_line_and_the_rest_imported(store):
+    result = import_products_csv(_csv(
+        "product_name,sku,price,quantity,supplier",
+        "Bread,BREAD1,2.50,20,ABC Distributors",
+        "Eggs,EGGS12,abc,5,",
+        "Butter,BUTTER,3.10,8,Nobody Ltd",
+        "Rice Bag 25kg,RICE25KG,19.00,45,ABC Distributors",
+    ))
+
+    assert (result.rows, result.imported, result.error_count) == (4, 2, 2)
+    assert result.errors == [(3, "Invalid price or quantity."), (4, "Unknown supplier: Nobody Ltd")]
+    assert _product("BREAD1") == ("Bread", 2.5, 20, 1)
+    assert _product("RICE25KG") == ("Rice Bag 25kg", 19.0, 45, 1)   # updated by SKU
+    assert _product("EGGS12") is None
+
+
+def test_chunks_keep_their_line_numbers(store, monkeypatch):
+    monkeypatch.setattr(import_service, "IMPORT_CHUNK_SIZE", 2)
+
+    result = import_products_csv(_csv(
+        "product_name,sku,price,quantity,supplier",
+        "A,SKU-A,1,1,",
+        "B,SKU-B,1,1,",
+        "C,SKU-C,0,1,",
+        "D,SKU-D,1,1,",
+        "E,SKU-E,1,,",
+    ))
+
+    assert (result.rows, result.imported) == (5, 3)
+    assert [line for line, _ in result.errors] == [4, 6]
+
+
+def test_missing_columns_are_refused(store):
+    with pytest.raises(ValueError) as e:
+        import_products_csv(_csv("product_name,sku,price", "A,SKU-A,1"))
+    assert str(e.value) == "Missing CSV columns: quantity, supplier"
+
+
+def test_suppliers_are_upserted_by_name(store):
+    result = import_suppliers_csv(_csv(
+        "supplier_name,contact_info",
+        "ABC Distributors,orders@abc.example",
+        "New Farm,555-0100",
+        "No Contact,",
+    ))
+
+    assert (result.imported, result.errors) == (2, [(4, "Both fields required.")])
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT supplier_id, supplier_name, contact_info FROM suppliers ORDER BY supplier_id")
+    rows = [tuple(r) for r in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    assert rows[0] == (1, "ABC Distributors", "orders@abc.example")
+    assert rows[-1][1:] == ("New Farm", "555-0100")
+
+
+def test_rejected_rows_are_retried_one_by_one(store):
+    def write(cursor, rows):
+        if "bad" in rows:
+            raise sqlite3.IntegrityError("rejected")
+
+    result = ImportResult()
+    _write_chunk(result, [2, 3, 4], ["ok", "bad", "ok"], write)
+
+    assert result.imported == 2
+    assert result.errors == [(3, "Database error: rejected")]
+
+
+def test_other_failures_are_raised_not_reported(store):
+    calls = []
+
+    def write(cursor, rows):
+        calls.append(rows)
+        raise db.PoolTimeout("pool exhausted")
+
+    with pytest.raises(db.PoolTimeout):
+        _write_chunk(ImportResult(), [2, 3], ["a", "b"], write)
+    assert len(calls) == 1
+
+
+def test_import_route_shows_the_report(login):
+    client = login("manager")
+    upload = io.BytesIO(b"product_name,sku,price,quantity,supplier\nBread,BREAD1,2.5,20,\nX,,1,1,\n")
+
+    page = client.post("/import", data={"kind": "products", "file": (upload, "prices.csv")},
+                       content_type="multipart/form-data").get_data(as_text=True)
+
+    assert "All fields are required." in page
+    assert _product("BREAD1") is not None
@@ -0,0 +1,153 @@
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import date
+
+import pytest
+
+import jobs
+from repositories import sales_repo
+from repositories.job_repo import create_job
+from services.job_service import cancel_job, job_status, submit_job
+
+
+@pytest.fixture
+def runner(store, monkeypatch, tmp_path):
+    """A fresh job runner writing results under tmp_path."""
+    monkeypatch.setattr(jobs, "JOB_RESULT_DIR", str(tmp_path))
+    jobs.reset_runner()
+    yield jobs.get_runner()
+    jobs.reset_runner()
+
+
+@pytest.fixture
+def gated(monkeypatch):
+    """Registers job type "gated": it reports it started, then checks for
+    cancellation until the test opens the gate."""
+    started, gate = threading.Event(), threading.Event()
+
+    def run(ctx):
+        started.set()
+        while not gate.wait(0.01):
+            ctx.check_cancelled()
+        return {"ok": True}
+
+    monkeypatch.setitem(jobs._types, "gated", jobs.JobType("gated", run, limit=1))
+    yield started, gate
+    gate.set()
+
+
+def _wait(job_id, *statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = job_status(job_id)
+        if job["status"] in statuses or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def _dead_owner():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return f"{socket.gethostname()}:{proc.pid}"
+
+
+def test_export_job_runs_to_a_downloadable_file(runner, tmp_path):
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, 1, 2)
+    day = date.today().isoformat()
+
+    job_id = submit_job("export-sales", {"start": day, "end": day}, user_id=1)
+    job = _wait(job_id, "succeeded", "failed")
+
+    assert job["status"] == "succeeded"
+    assert job["params"]["format"] == "csv" and job["result"]["bytes"] > 0
+    with open(job["result_path"], "rb") as f:
+        assert f.read().count(b"\n") == 2
+
+
+def test_bad_submissions_are_refused(runner):
+    with pytest.raises(ValueError):
+        submit_job("no-such-job", {})
+    with pytest.raises(ValueError):
+        submit_job("export-sales", {"start": "2024-01-01", "end": "2024-01-31", "format": "xml"})
+
+
+def test_a_type_never_takes_more_than_its_slots(runner, gated):
+    started, gate = gated
+    first = submit_job("gated", {})
+    second = submit_job("gated", {})
+    started.wait(5)
+
+    assert runner.stats()["running"] == {"gated": 1}
+    assert job_status(second)["status"] == "queued"
+
+    gate.set()
+    assert _wait(second, "succeeded")["status"] == "succeeded"
+    assert job_status(first)["result"] == {"ok": True}
+
+
+def test_cancelled_while_queued_never_starts(runner, gated):
+    started, gate = gated
+    first = submit_job("gated", {})
+    second = submit_job("gated", {})
+    started.wait(5)
+
+    assert cancel_job(second)
+    assert job_status(second)["status"] == "cancelled"
+
+    gate.set()
+    _wait(first, "succeeded")
+    assert job_status(second)["started_at"] is None
+    assert not cancel_job(second)               # already finished
+
+
+def test_cancelled_while_running_stops_at_its_next_check(runner, gated):
+    started, _ = gated
+    job_id = submit_job("gated", {})
+    started.wait(5)
+
+    assert cancel_job(job_id)
+    job = _wait(job_id, "cancelled")
+
+    assert (job["status"], job["message"]) == ("cancelled", "Cancelled.")
+
+
+def test_a_failing_job_records_its_error(runner, monkeypatch):
+    def run(ctx):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs._types, "broken", jobs.JobType("broken", run))
+
+    job = _wait(submit_job("broken", {}), "failed")
+
+    assert (job["status"], job["message"]) == ("failed", "boom")
+
+
+def test_jobs_of_an_exited_process_are_failed(store):
+    polled = create_job("rebuild-rollups", "{}", _dead_owner(), 1)
+    swept = create_job("rebuild-rollups", "{}", _dead_owner(), 1)
+    mine = create_job("rebuild-rollups", "{}", jobs._owner(), 1)
+
+    assert job_status(polled)["status"] == "failed"
+    assert jobs.fail_orphaned_jobs() == 1
+    assert job_status(swept)["message"] == jobs._INTERRUPTED
+    assert job_status(mine)["status"] == "queued"
+
+
+def test_jobs_api(runner, login):
+    client = login("manager")
+
+    created = client.post("/api/v1/jobs", json={"type": "rebuild-rollups"})
+    job_id = created.get_json()["job_id"]
+    _wait(job_id, "succeeded")
+    result = client.get(created.headers["Location"] + "/result")
+
+    assert created.status_code == 202
+    assert result.get_json()["sales_daily_product"] == 0
+    assert client.post("/api/v1/jobs", json={"type": "nope"}).status_code == 400
+    assert client.post(f"/api/v1/jobs/{job_id}/cancel").status_code == 409
+    assert client.get("/api/v1/jobs/999").status_code == 404
+    assert login("cashier").get("/api/v1/jobs").status_code == 403
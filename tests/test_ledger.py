@@ -0,0 +1,146 @@
+import importlib
+from datetime import datetime, timedelta
+
+import db
+import migrations
+from repositories import sales_repo
+from repositories.ledger_repo import get_stock_at, take_stock_snapshots
+from repositories.product_repo import add_product, update_product
+from repositories.stock_repo import ADJUST, INITIAL, RETURN, SALE
+from services.ledger_service import parse_point_in_time
+
+
+def _later():
+    return datetime.now() + timedelta(minutes=1)
+
+
+def _stock(product_id, at=None):
+    rows, _ = get_stock_at(at or _later(), product_id=product_id)
+    return rows[0]["quantity"]
+
+
+def _sell(product_id, qty):
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, product_id, qty)
+
+
+def _insert_unledgered_product(sku, qty):
+    """A product whose stock predates the ledger: no movements, no snapshot."""
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO products (product_name, sku, price, quantity) VALUES (%s, %s, 1, %s)",
+        (sku, sku, qty))
+    product_id = cursor.lastrowid
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return product_id
+
+
+def _product_id(sku):
+    conn = db.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT product_id FROM products WHERE sku = %s", (sku,))
+    product_id = cursor.fetchone()["product_id"]
+    cursor.close()
+    conn.close()
+    return product_id
+
+
+def test_seeded_products_replay_from_baseline_snapshot(store):
+    milk = _product_id("MILK1L")        # schema seed: 100 units, never ledgered
+    _sell(milk, 3)
+    assert _stock(milk) == 97
+
+
+def test_stock_predating_the_ledger_is_unknown_without_snapshot(store):
+    product_id = _insert_unledgered_product("OLD1", 100)
+    _sell(product_id, 3)
+
+    assert _stock(product_id) is None           # not -3
+
+    take_stock_snapshots()
+    assert _stock(product_id) == 97
+
+
+def test_baseline_rerun_seeds_snapshots_for_existing_store(store):
+    product_id = _insert_unledgered_product("OLD2", 50)
+
+    baseline = importlib.import_module("migrations.versions.0001_baseline")
+    conn = db.dialect.connect()
+    ops = migrations.Operations(conn)
+    baseline.upgrade(ops)
+    conn.commit()
+    ops.close()
+    conn.close()
+
+    _sell(product_id, 5)
+    assert _stock(product_id) == 45
+
+
+def test_products_created_after_the_ledger_replay_from_initial(store):
+    add_product("New", "NEW1", 2, 20, None, 10, 0)
+    add_product("Empty", "NEW0", 2, 0, None, 10, 0)
+    new, empty = _product_id("NEW1"), _product_id("NEW0")
+    _sell(new, 4)
+
+    assert _stock(new) == 16
+    assert _stock(empty) == 0
+    assert _stock(new, datetime(2000, 1, 1)) is None     # didn't exist yet
+
+
+def test_every_stock_change_is_ledgered_with_its_reason(store):
+    add_product("New", "NEW1", 2, 20, None, 10, 0)
+    product_id = _product_id("NEW1")
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, product_id, 5)
+    sales_repo.decrease_sale_item(sale_id, product_id)
+    update_product(product_id, "New", "NEW1", 2, 30, None, 10, 0)
+
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT reason, delta, sale_id FROM stock_movements"
+                   " WHERE product_id = %s ORDER BY movement_id", (product_id,))
+    moves = [tuple(r) for r in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+
+    assert moves == [(INITIAL, 20, None), (SALE, -5, sale_id), (RETURN, 1, sale_id),
+                     (ADJUST, 14, None)]
+    assert _stock(product_id) == 30
+
+
+def test_stock_at_a_past_moment_stops_at_that_moment(store):
+    add_product("New", "NEW1", 2, 20, None, 10, 0)
+    product_id = _product_id("NEW1")
+    take_stock_snapshots()
+    _sell(product_id, 4)
+
+    # Move the sale a day ahead: a moment before it still sees 20
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE stock_movements SET moved_at = %s WHERE reason = %s",
+                   (datetime.now() + timedelta(days=1), SALE))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    assert _stock(product_id) == 20
+    assert _stock(product_id, datetime.now() + timedelta(days=2)) == 16
+
+
+def test_stock_api_pages_and_validates_at(login):
+    client = login("manager")
+    at = (datetime.now() + timedelta(minutes=1)).strftime("%Y-%m-%d %H:%M:%S")
+
+    first = client.get(f"/api/v1/stock?at={at}&limit=1").get_json()
+    second = client.get(f"/api/v1/stock?at={at}&limit=1&after={first['next']}").get_json()
+    bad = client.get("/api/v1/stock?at=yesterday")
+
+    assert [(r["sku"], r["quantity"]) for r in first["data"] + second["data"]] == [
+        ("RICE25KG", 40), ("MILK1L", 100),
+    ]
+    assert second["next"] is None
+    assert bad.status_code == 400
+    assert parse_point_in_time("2024-01-31") == datetime(2024, 1, 31, 23, 59, 59)
@@ -0,0 +1,69 @@
+import logging
+
+import db
+import metrics
+
+
+def _run(*statements):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    for sql in statements:
+        cursor.execute(sql)
+        cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+
+def test_histogram_buckets_are_cumulative():
+    h = metrics.Histogram("t_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        h.observe(("/x",), value)
+
+    lines = h.render()
+
+    assert 't_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{route="/x",le="1"} 2' in lines
+    assert 't_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 't_seconds_count{route="/x"} 3' in lines
+
+
+def test_label_values_are_escaped():
+    c = metrics.Counter("t_total", "Test.", ("route",))
+    c.inc(('/a"b',))
+
+    assert c.render()[-1] == 't_total{route="/a\\"b"} 1'
+
+
+def test_request_stats_count_and_time_statements(store):
+    db.start_request_stats()
+    _run("SELECT 1", "SELECT COUNT(*) FROM products")
+    stats = db.end_request_stats()
+
+    assert stats["queries"] == 2
+    assert stats["db_seconds"] >= stats["slowest_seconds"] > 0
+    assert stats["slowest_sql"] in ("SELECT 1", "SELECT COUNT(*) FROM products")
+    assert db.request_stats() is None
+
+
+def test_slow_statements_are_logged(store, monkeypatch, caplog):
+    monkeypatch.setattr(db, "SLOW_QUERY_MS", 0)
+    before = db.query_totals()["slow_queries_total"]
+
+    with caplog.at_level(logging.WARNING, logger="db"):
+        _run("SELECT   1")
+
+    assert db.query_totals()["slow_queries_total"] == before + 1
+    assert any("Slow query" in r.getMessage() and "SELECT 1" in r.getMessage()
+               for r in caplog.records)
+
+
+def test_metrics_endpoint_reports_routes_by_rule(login):
+    client = login("manager")
+
+    resp = client.get("/sales/view/1")
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert "Server-Timing" in resp.headers
+    assert 'store_http_requests_total{route="/sales/view/<int:sale_id>",method="GET",status="' in body
+    assert 'store_http_request_queries_count{route="/sales/view/<int:sale_id>",method="GET"}' in body
+    assert 'store_db_pool_connections{pool="primary",state="open"}' in body
@@ -0,0 +1,89 @@
+import types
+
+import pytest
+
+import db
+import migrations
+from migrations import Migration, split_sql
+
+
+def _fake(version, upgrade, doc="Test migration."):
+    return Migration(version, f"fake_{version}", types.SimpleNamespace(__doc__=doc, upgrade=upgrade))
+
+
+def _with(monkeypatch, *extra):
+    real = migrations.discover()
+    monkeypatch.setattr(migrations, "discover", lambda: real + list(extra))
+
+
+def _query(sql, params=()):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = [tuple(r) for r in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def test_split_sql_respects_quotes_and_drops_comments():
+    script = """
+        CREATE DATABASE store; USE store;
+        -- a comment; with a semicolon
+        INSERT INTO t VALUES ('a;b', 'it''s', "x\\"y");
+        /* block; comment */ SELECT 1
+    """
+
+    assert split_sql(script) == [
+        "INSERT INTO t VALUES ('a;b', 'it''s', \"x\\\"y\")",
+        "SELECT 1",
+    ]
+
+
+def test_every_migration_is_applied_once(store):
+    applied = migrations.status()
+
+    assert [m.version for m, _, _ in applied] == [1, 2, 3]
+    assert all(applied_at is not None for _, applied_at, _ in applied)
+    assert migrations.migrate(out=lambda line: None) == ([], None)
+
+
+def test_dry_run_prints_and_changes_nothing(store, monkeypatch):
+    _with(monkeypatch, _fake(4, lambda ops: ops.create_index("products", "idx_test", ["price"])))
+    lines = []
+
+    assert migrations.migrate(dry_run=True, out=lines.append) == ([4], None)
+    assert lines[0] == "-- 0004 fake_4: Test migration."
+    assert "idx_test" in lines[1]
+    assert _query("SELECT version FROM schema_version WHERE version = 4") == []
+
+    assert migrations.migrate(out=lines.append) == ([4], None)
+    assert _query("SELECT name FROM sqlite_master WHERE name = 'idx_test'") == [("idx_test",)]
+
+
+def test_blocking_work_needs_allow_offline(store, monkeypatch):
+    def upgrade(ops):
+        ops.require_offline("rebuilds products")
+        ops.execute("UPDATE products SET reorder_qty = 5")
+
+    blocked = _fake(4, upgrade)
+    _with(monkeypatch, blocked)
+
+    assert migrations.migrate(out=lambda line: None) == ([], blocked)
+    assert _query("SELECT DISTINCT reorder_qty FROM products") == [(0,)]
+
+    assert migrations.migrate(allow_offline=True, out=lambda line: None) == ([4], None)
+    assert _query("SELECT DISTINCT reorder_qty FROM products") == [(5,)]
+
+
+def test_a_failed_migration_is_rolled_back_and_not_recorded(store, monkeypatch):
+    def upgrade(ops):
+        ops.execute("UPDATE products SET reorder_qty = 9")
+        raise RuntimeError("half way")
+
+    _with(monkeypatch, _fake(4, upgrade))
+
+    with pytest.raises(RuntimeError):
+        migrations.migrate(out=lambda line: None)
+    assert _query("SELECT DISTINCT reorder_qty FROM products") == [(0,)]
+    assert [m.version for m, at, _ in migrations.status() if at is None] == [4]
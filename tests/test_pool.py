@@ -0,0 +1,62 @@
+import pytest
+
+import db
+
+
+def _pool(size=2, timeout=0.05):
+    return db.ConnectionPool(size, timeout, ping_after=60)
+
+
+def test_connections_are_reused(store):
+    pool = _pool()
+
+    conn = pool.acquire()
+    raw = conn._raw
+    conn.close()
+    again = pool.acquire()
+
+    assert again._raw is raw
+    assert pool.stats()["created_total"] == 1
+    assert pool.stats()["borrows_total"] == 2
+    again.close()
+
+
+def test_full_pool_times_out(store):
+    pool = _pool(size=1)
+    held = pool.acquire()
+
+    with pytest.raises(db.PoolTimeout):
+        pool.acquire()
+
+    stats = pool.stats()
+    assert stats["timeouts_total"] == 1
+    assert stats["open"] == 1 and stats["borrowed"] == 1
+    held.close()
+    assert pool.stats()["idle"] == 1
+
+
+def test_release_rolls_back_an_open_transaction(store):
+    pool = _pool(size=1)
+    conn = pool.acquire()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE products SET quantity = 0")
+    cursor.close()
+    conn.close()
+
+    conn = pool.acquire()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM products WHERE quantity = 0")
+    assert cursor.fetchone()[0] == 0
+    cursor.close()
+    conn.close()
+
+
+def test_close_all_drops_idle_connections(store):
+    pool = _pool()
+    pool.acquire().close()
+
+    pool.close_all()
+
+    stats = pool.stats()
+    assert stats["open"] == 0 and stats["idle"] == 0
+    assert stats["discarded_total"] == 1
@@ -0,0 +1,57 @@
+import pytest
+
+import db
+from repositories import sales_repo
+from repositories.stock_repo import _RELEASE
+
+
+def _delta(before, name, key):
+    return db.statement_totals()[name][key] - before[name][key]
+
+
+def test_names_are_unique():
+    with pytest.raises(ValueError):
+        db.prepared_statement("stock.reserve", "SELECT 1")
+
+
+def test_hot_statements_are_prepared_once_per_connection(store):
+    before = db.statement_totals()
+    sale_id = sales_repo.create_sale(1)
+
+    for _ in range(3):
+        sales_repo.add_item_to_sale(sale_id, 1, 1)
+
+    assert _delta(before, "sale_items.add", "executions") == 3
+    assert _delta(before, "stock.reserve", "executions") == 3
+    assert _delta(before, "sale_items.add", "prepares") == 1
+    assert _delta(before, "sale_items.add", "seconds") > 0
+
+
+def test_a_new_connection_prepares_again(store):
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, 1, 1)
+    before = db.statement_totals()
+
+    db.reset_pool()
+    sales_repo.add_item_to_sale(sale_id, 2, 1)
+
+    assert _delta(before, "stock.reserve", "prepares") == 1
+
+
+def test_execute_prepared_returns_the_rowcount(store):
+    def work(cursor):
+        return (cursor.execute_prepared(_RELEASE, (1, 999)),
+                cursor.execute_prepared(_RELEASE, (1, 2)))
+
+    assert db.run_in_transaction(work) == (0, 1)
+
+
+def test_statement_metrics_are_exported(login):
+    client = login("cashier")
+    sale_id = sales_repo.create_sale(2)
+    sales_repo.add_item_to_sale(sale_id, 2, 1)
+
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert 'store_db_statement_executions_total{statement="stock.reserve"}' in body
+    assert 'store_db_statement_prepares_total{statement="sale_items.add"}' in body
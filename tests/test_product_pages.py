@@ -0,0 +1,61 @@
+from repositories.product_repo import add_product, get_products_page
+
+
+def _add(n, prefix="Item", qty=50, supplier_id=None):
+    for i in range(n):
+        add_product(f"{prefix} {i:02d}", f"{prefix.upper()}-{i:02d}", 1, qty, supplier_id, 10, 0)
+
+
+def _walk(**filters):
+    """Every page in order; returns the product_ids and the number of pages."""
+    ids, pages, after = [], 0, None
+    while True:
+        rows, after = get_products_page(after_id=after, limit=3, **filters)
+        ids.extend(r["product_id"] for r in rows)
+        pages += 1
+        if after is None:
+            return ids, pages
+
+
+def test_pages_cover_every_product_once_newest_first(store):
+    _add(5)
+
+    ids, pages = _walk()
+
+    assert len(ids) == 7                    # 5 + the two seeded products
+    assert ids == sorted(ids, reverse=True)
+    assert pages == 3
+
+
+def test_filters_are_applied_in_sql(store):
+    _add(4, prefix="Bread", supplier_id=1)
+    _add(2, prefix="Cheese", qty=3)
+
+    bread, _ = _walk(name_prefix="bre")
+    low, _ = _walk(low_stock=True)
+    by_supplier, _ = _walk(supplier_id=1)
+
+    assert len(bread) == 4
+    assert len(low) == 2
+    assert len(by_supplier) == 5            # 4 Bread + the seeded rice
+
+
+def test_name_prefix_is_literal(store):
+    _add(1, prefix="50% off")
+    _add(1, prefix="500 g")
+
+    rows, _ = get_products_page(name_prefix="50%")
+
+    assert [r["product_name"] for r in rows] == ["50% off 00"]
+
+
+def test_products_page_links_to_the_next_page(login, monkeypatch):
+    import app
+    monkeypatch.setattr(app, "PRODUCTS_PAGE_SIZE", 1)
+    client = login("manager")
+
+    page = client.get("/products?q=Milk").get_data(as_text=True)
+    first = client.get("/products").get_data(as_text=True)
+
+    assert "Milk 1L" in page and "Rice Bag" not in page
+    assert "after=2" in first
@@ -0,0 +1,45 @@
+from repositories.product_repo import add_product, search_products
+
+
+def _names(term, limit=10):
+    return [r["sku"] for r in search_products(term, limit)]
+
+
+def _catalog():
+    add_product("Milk Chocolate", "CHOC-MILK", 2.5, 10, None, 10, 0)
+    add_product("Milkshake", "MILK2L", 3, 10, None, 10, 0)
+    add_product("Oat Milk", "OAT1L", 2, 10, None, 10, 0)
+
+
+def test_exact_sku_then_sku_prefix_then_name_prefix(store):
+    _catalog()
+
+    assert _names("MILK1L") == ["MILK1L"]
+    # MILK1L / MILK2L match the SKU prefix, Milk Chocolate only the name;
+    # Oat Milk doesn't start with "milk"
+    assert _names("MILK") == ["MILK1L", "MILK2L", "CHOC-MILK"]
+
+
+def test_a_product_is_listed_once_at_its_best_rank(store):
+    _catalog()
+
+    rows = search_products("MILK1L", 10)
+
+    assert [r["match_rank"] for r in rows] == [0]
+
+
+def test_limit_caps_the_results(store):
+    _catalog()
+
+    assert len(search_products("milk", 2)) == 2
+
+
+def test_search_route(login, client):
+    assert client.get("/products/search?q=milk").status_code == 401
+
+    login("cashier")
+    found = client.get("/products/search?q=MILK1L").get_json()["results"]
+    empty = client.get("/products/search?q=").get_json()["results"]
+
+    assert [(r["sku"], r["exact"]) for r in found] == [("MILK1L", True)]
+    assert empty == []
@@ -0,0 +1,63 @@
+import db
+from repositories import sales_repo
+from repositories.rollup_repo import get_top_products, reconcile_product_totals
+from repositories.sales_repo import checkout_sale
+
+
+def _execute(sql, params=()):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def _top():
+    return [(r["product_name"], r["total_qty"], round(float(r["total_amount"]), 2))
+            for r in get_top_products(10)]
+
+
+def test_sale_item_changes_keep_the_totals(store):
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, 1, 1)
+    sales_repo.add_item_to_sale(sale_id, 2, 3)
+    sales_repo.increase_sale_item(sale_id, 2)
+    checkout_sale(2, [{"product_id": 1, "qty": 2}])
+
+    assert _top() == [("Milk 1L", 4, 4.8), ("Rice Bag 25kg", 3, 55.5)]
+
+    sales_repo.remove_sale_item(sale_id, 2)
+
+    assert _top() == [("Rice Bag 25kg", 3, 55.5)]      # zero rows are left out
+
+
+def test_top_products_honours_the_limit(store):
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, 1, 5)
+    sales_repo.add_item_to_sale(sale_id, 2, 1)
+
+    assert [r["product_name"] for r in get_top_products(1)] == ["Rice Bag 25kg"]
+
+
+def test_reconcile_reports_and_repairs_drift(store):
+    sale_id = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(sale_id, 1, 2)
+    sales_repo.add_item_to_sale(sale_id, 2, 5)
+    assert reconcile_product_totals() == []
+
+    _execute("UPDATE product_sales_totals SET units_sold = 99 WHERE product_id = 1")
+    _execute("DELETE FROM product_sales_totals WHERE product_id = 2")
+
+    found = reconcile_product_totals()
+    assert sorted((r["product_id"], r["expected_units"], r["actual_units"]) for r in found) == [
+        (1, 2, 99), (2, 5, None),
+    ]
+    assert len(reconcile_product_totals()) == 2         # report only, nothing changed
+
+    phases = []
+    reconcile_product_totals(repair=True, progress=lambda done, total: phases.append((done, total)))
+
+    assert phases == [(1, 2)]
+    assert reconcile_product_totals() == []
+    assert _top() == [("Milk 1L", 5, 6.0), ("Rice Bag 25kg", 2, 37.0)]
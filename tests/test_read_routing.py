@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+import config
+import db
+
+
+@pytest.fixture
+def replicas(store, monkeypatch, tmp_path):
+    """use(*names) points DB_REPLICAS at copies of the store that also
+    hold a marker row with their name; None is a replica that is down."""
+    def use(*names):
+        configs = []
+        for name in names:
+            if name is None:
+                configs.append({"path": str(tmp_path / "missing" / "down.db")})
+                continue
+            path = str(tmp_path / f"{name}.db")
+            conn = sqlite3.connect(path)
+            primary = sqlite3.connect(config.SQLITE_PATH)
+            primary.backup(conn)
+            primary.close()
+            conn.execute("CREATE TABLE marker (name TEXT)")
+            conn.execute("INSERT INTO marker VALUES (?)", (name,))
+            conn.commit()
+            conn.close()
+            configs.append({"path": path})
+
+        monkeypatch.setattr(db, "DB_REPLICAS", configs)
+        db.reset_pool()
+        db.start_request_routing()
+
+    return use
+
+
+def _read_from():
+    """The replica's marker, or 'primary' for the primary database."""
+    conn = db.get_read_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT name FROM marker")
+        found = cursor.fetchone()[0]
+    except sqlite3.OperationalError:
+        found = "primary"
+    cursor.close()
+    conn.close()
+    return found
+
+
+def test_reads_go_to_the_replica_unless_pinned(replicas):
+    replicas("r0")
+
+    assert _read_from() == "r0"
+
+    db.pin_reads_to_primary()
+    assert _read_from() == "primary"
+
+    db.start_request_routing(primary=True)
+    assert _read_from() == "primary"
+
+
+def test_a_request_sticks_to_one_replica(replicas):
+    replicas("r0", "r1")
+
+    assert len({_read_from() for _ in range(10)}) == 1
+
+
+def test_an_unavailable_replica_falls_back_to_the_primary(replicas):
+    replicas(None)
+
+    assert _read_from() == "primary"
+
+
+def test_only_primary_commits_count_as_writes(replicas):
+    replicas("r0")
+
+    conn = db.get_read_connection()
+    conn.commit()
+    conn.close()
+    assert not db.committed_this_request()
+
+    conn = db.get_db_connection()
+    conn.commit()
+    conn.close()
+    assert db.committed_this_request()
+
+
+def test_a_session_reads_its_own_writes(replicas, login):
+    replicas("r0")
+    client = login("cashier")
+
+    client.get("/sales")
+    with client.session_transaction() as session:
+        assert "primary_until" not in session
+
+    client.post("/sales/checkout", json={"items": [{"product_id": 2, "qty": 1}]})
+    with client.session_transaction() as session:
+        assert "primary_until" in session
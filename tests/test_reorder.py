@@ -0,0 +1,59 @@
+import db
+from repositories import sales_repo
+from repositories.reorder_repo import get_open_alerts, get_suggested_orders, suggest_purchase_orders
+from services.product_service import edit_product
+
+
+def _alerts():
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT product_id, quantity, po_id FROM stock_alerts ORDER BY product_id")
+    rows = [tuple(r) for r in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def _sell(product_id, qty):
+    sale_id = sales_repo.create_sale(2)
+    assert sales_repo.add_item_to_sale(sale_id, product_id, qty)
+
+
+def test_a_sale_crossing_the_reorder_point_raises_one_alert(store):
+    _sell(2, 80)                            # 100 -> 20, still above 10
+    assert _alerts() == []
+
+    _sell(2, 15)                            # 20 -> 5
+    _sell(2, 2)                             # already low: no second alert
+    assert _alerts() == [(2, 5, None)]
+    assert [r["quantity"] for r in get_open_alerts()] == [3]
+
+
+def test_suggested_orders_group_uncovered_alerts_by_supplier(store):
+    _sell(2, 95)                                        # milk: alert raised by the sale
+    edit_product(1, "Rice Bag 25kg", "RICE25KG", 18.5, 4, 1, 10, 25)    # rice: set low
+
+    cleared, raised, orders = suggest_purchase_orders()
+
+    assert (cleared, raised) == (0, 1)
+    assert sorted((o["supplier_id"], o["lines"], o["units"]) for o in orders) == [
+        (1, 1, 25),                         # reorder_qty
+        (2, 1, 5),                          # back up to the reorder point
+    ]
+    assert all(po_id is not None for _, _, po_id in _alerts())
+    assert len(get_suggested_orders()) == 2
+
+    # Covered alerts are not ordered twice
+    assert suggest_purchase_orders() == (0, 0, [])
+
+
+def test_restocked_products_drop_their_alerts(store):
+    _sell(1, 35)
+    _sell(2, 95)
+    edit_product(2, "Milk 1L", "MILK1L", 1.2, 60, 2, 10, 0)
+
+    cleared, raised, orders = suggest_purchase_orders()
+
+    assert (cleared, raised) == (1, 0)
+    assert [(a[0], a[1]) for a in _alerts()] == [(1, 5)]
+    assert [o["supplier_id"] for o in orders] == [1]
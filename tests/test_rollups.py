@@ -0,0 +1,71 @@
+import db
+from repositories import sales_repo
+from repositories.rollup_repo import get_dashboard_totals, get_sales_summary, rebuild_rollups
+
+
+def _rows(table):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM {table} ORDER BY 1, 2")
+    rows = [tuple(r) for r in cursor.fetchall()]
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def _ring_up():
+    """Two sales today: 3 rice + 2 milk by the manager, 1 milk by the cashier."""
+    first = sales_repo.create_sale(1)
+    sales_repo.add_item_to_sale(first, 1, 2)
+    sales_repo.add_item_to_sale(first, 2, 2)
+    sales_repo.increase_sale_item(first, 1)
+    second = sales_repo.create_sale(2)
+    sales_repo.add_item_to_sale(second, 2, 1)
+    return first, second
+
+
+def test_item_routes_maintain_the_daily_rollups(store):
+    _ring_up()
+
+    summary, today, month = get_sales_summary()
+    assert round(float(summary["total_revenue"]), 2) == 59.1
+    assert summary["total_items"] == 6
+    assert today["qty_today"] == month["qty_month"] == 6
+
+    today_sales, month_sales = get_dashboard_totals()
+    assert today_sales["total_sales"] == month_sales["monthly_sales"] == 2
+
+
+def test_removed_lines_are_taken_back_out(store):
+    first, _ = _ring_up()
+
+    sales_repo.remove_sale_item(first, 1)
+    sales_repo.decrease_sale_item(first, 2)
+
+    summary, _, _ = get_sales_summary()
+    assert summary["total_items"] == 2
+    assert round(float(summary["total_revenue"]), 2) == 2.4
+
+
+def test_rebuild_reproduces_the_incremental_rollups(store):
+    _ring_up()
+    incremental = [_rows(t) for t in ("sales_daily_product", "sales_daily_cashier")]
+
+    rebuild_rollups()
+
+    assert [_rows(t) for t in ("sales_daily_product", "sales_daily_cashier")] == incremental
+
+
+def test_rebuild_rolls_back_when_stopped(store):
+    _ring_up()
+    before = _rows("sales_daily_product")
+
+    def stop():
+        raise RuntimeError("stop")
+
+    try:
+        rebuild_rollups(stop)
+    except RuntimeError:
+        pass
+
+    assert _rows("sales_daily_product") == before
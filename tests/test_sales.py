@@ -0,0 +1,51 @@
+import db
+from repositories import sales_repo
+
+
+def _quantity(product_id):
+    conn = db.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT quantity FROM products WHERE product_id = %s", (product_id,))
+    quantity = cursor.fetchone()["quantity"]
+    cursor.close()
+    conn.close()
+    return quantity
+
+
+def _rollup_matches_lines(product_id):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(SUM(units_sold), 0) FROM sales_daily_product"
+                   " WHERE product_id = %s", (product_id,))
+    rolled_up = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(SUM(quantity_sold), 0) FROM sale_items"
+                   " WHERE product_id = %s", (product_id,))
+    lines = cursor.fetchone()[0]
+    cursor.close()
+    conn.close()
+    return rolled_up == lines
+
+
+def test_add_item_to_unknown_sale_changes_nothing(store):
+    before = _quantity(1)
+
+    assert sales_repo.add_item_to_sale(99999, 1, 2) is False
+    assert _quantity(1) == before
+
+
+def test_item_routes_keep_total_in_step(store):
+    sale_id = sales_repo.create_sale(1)
+    assert sales_repo.add_item_to_sale(sale_id, 1, 3) is True
+    assert sales_repo.increase_sale_item(sale_id, 1) is True
+    sales_repo.decrease_sale_item(sale_id, 1)
+
+    sale, items = sales_repo.get_sale_details(sale_id)
+    assert [i["quantity_sold"] for i in items] == [3]
+    assert sales_repo.get_sale_items(sale_id)[0]["quantity_sold"] == 3
+    assert sales_repo.get_total_drift(sale_id - 1, sale_id) == []
+    assert _rollup_matches_lines(1)
+
+    sales_repo.remove_sale_item(sale_id, 1)
+    assert sales_repo.get_sale_items(sale_id) == []
+    assert sales_repo.get_total_drift(sale_id - 1, sale_id) == []
+    assert _rollup_matches_lines(1)
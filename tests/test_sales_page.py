@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+
+import db
+from repositories import sales_repo
+from repositories.sales_repo import get_sales_page
+from services import sales_service
+from services.sales_service import check_sale_totals, parse_sales_filters
+from services.version_service import table_versions
+
+
+def _sale(user_id, product_id, qty, sale_date=None):
+    sale_id = sales_repo.create_sale(user_id)
+    sales_repo.add_item_to_sale(sale_id, product_id, qty)
+    if sale_date:
+        _execute("UPDATE sales SET sale_date = %s WHERE sale_id = %s", (sale_date, sale_id))
+    return sale_id
+
+
+def _execute(sql, params=()):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def _walk(**filters):
+    ids, after = [], None
+    while True:
+        rows, after = get_sales_page(after_id=after, limit=2, **filters)
+        ids.extend(r["sale_id"] for r in rows)
+        if after is None:
+            return ids
+
+
+def test_pages_walk_every_sale_newest_first(store):
+    sale_ids = [_sale(1 + i % 2, 2, 1) for i in range(5)]
+
+    rows, _ = get_sales_page(limit=1)
+
+    assert _walk() == sale_ids[::-1]
+    assert rows[0]["total_amount"] is not None and rows[0]["username"] == "manager"
+
+
+def test_date_and_cashier_filters(store):
+    _sale(1, 1, 1, datetime(2024, 1, 10))
+    jan = _sale(2, 1, 1, datetime(2024, 1, 20))
+    _sale(2, 1, 1, datetime(2024, 2, 1))
+    start, end = parse_sales_filters("2024-01-01", "2024-01-31")
+
+    assert _walk(start=start, end=end, cashier="cashier1") == [jan]
+    assert len(_walk(cashier="manager")) == 1
+
+
+def test_filter_dates_are_validated():
+    assert parse_sales_filters("", "") == (None, None)
+    with pytest.raises(ValueError):
+        parse_sales_filters("2024-02-01", "2024-01-01")
+    with pytest.raises(ValueError):
+        parse_sales_filters("1/2/2024", None)
+
+
+def test_drifted_totals_are_found_chunk_by_chunk_and_repaired(store, monkeypatch):
+    monkeypatch.setattr(sales_service, "SALES_CHECK_CHUNK", 2)
+    sale_ids = [_sale(1, 1, 1) for _ in range(5)]
+    _execute("UPDATE sales SET total_amount = 0 WHERE sale_id = %s", (sale_ids[3],))
+    version = table_versions("sales")["sales"]
+    progress = []
+
+    drift = check_sale_totals(progress=lambda done, total: progress.append((done, total)))
+
+    assert [d["sale_id"] for d in drift] == [sale_ids[3]]
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert table_versions("sales")["sales"] == version      # report only
+
+    check_sale_totals(repair=True)
+
+    assert check_sale_totals() == []
+    assert table_versions("sales")["sales"] > version
+
+
+def test_sales_page_keeps_filters_on_the_next_link(login, monkeypatch):
+    import app
+    monkeypatch.setattr(app, "SALES_PAGE_SIZE", 1)
+    client = login("manager")
+    _sale(2, 1, 1)
+    newest = _sale(2, 1, 1)
+
+    page = client.get("/sales?cashier=cashier1").get_data(as_text=True)
+    bad = client.get("/sales?start=soon").get_data(as_text=True)
+
+    assert f"after={newest}" in page and "cashier=cashier1" in page
+    assert "Dates must be in YYYY-MM-DD format." in bad
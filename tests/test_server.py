@@ -0,0 +1,68 @@
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+import config
+import db
+import jobs
+import migrations
+import server
+from repositories.job_repo import create_job, get_job
+
+
+@pytest.fixture
+def empty_store(store):
+    """No database yet, as on a first deploy."""
+    db.reset_pool()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(config.SQLITE_PATH + suffix):
+            os.remove(config.SQLITE_PATH + suffix)
+
+
+def test_load_app_migrates_and_warms_templates(empty_store):
+    pool = db.get_pool()
+    pool.acquire().close()
+
+    app = server.load_app()
+
+    assert all(applied_at for _, applied_at, _ in migrations.status())
+    cached = {name for _, name in app.jinja_env.cache.keys()}
+    assert set(app.jinja_env.list_templates()) <= cached
+    assert pool.stats()["open"] == 0        # nothing crosses the fork
+
+
+def test_post_fork_starts_clean_and_fails_orphaned_jobs(store):
+    runner = jobs.get_runner()
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    job_id = create_job("rebuild-rollups", "{}", f"{socket.gethostname()}:{proc.pid}", 1)
+
+    server.post_fork(None, None)
+
+    assert jobs.get_runner() is not runner
+    assert get_job(job_id)["status"] == "failed"
+
+
+def test_post_fork_survives_a_database_outage(store, monkeypatch):
+    def down():
+        raise db.PoolTimeout("no database")
+
+    monkeypatch.setattr(jobs, "fail_orphaned_jobs", down)
+
+    server.post_fork(None, None)
+
+
+def test_main_passes_the_options_to_gunicorn(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(server.StoreServer, "run", lambda self: seen.update(self.options))
+
+    result = CliRunner().invoke(server.main, ["--bind", "127.0.0.1:9000", "--workers", "3"])
+
+    assert result.exit_code == 0
+    assert (seen["bind"], seen["workers"], seen["threads"]) == ("127.0.0.1:9000", 3, config.SERVER_THREADS)
+    assert seen["preload_app"] and seen["post_fork"] is server.post_fork
+    assert seen["worker_class"] == "gthread"
@@ -0,0 +1,84 @@
+import hashlib
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+import db
+from backends import load_backend, sqlite_backend
+from repositories import sales_repo
+
+
+def _connection():
+    conn = db.get_db_connection()
+    return conn, conn.cursor(dictionary=True)
+
+
+def test_unknown_backend_is_refused():
+    with pytest.raises(ValueError):
+        load_backend("oracle")
+    assert load_backend("sqlite") is sqlite_backend
+
+
+def test_connections_run_in_wal_mode_with_foreign_keys(store):
+    conn, cursor = _connection()
+    cursor.execute("PRAGMA journal_mode")
+    mode = cursor.fetchone()["journal_mode"]
+    cursor.execute("PRAGMA foreign_keys")
+    foreign_keys = cursor.fetchone()["foreign_keys"]
+    cursor.close()
+    conn.close()
+
+    assert (mode, foreign_keys) == ("wal", 1)
+
+
+def test_mysql_style_queries_run_unchanged(store):
+    conn, cursor = _connection()
+    cursor.execute("SELECT SHA2(%s, 256) AS h, %s AS price", ("manager123", Decimal("1.50")))
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+
+    assert row == {"h": hashlib.sha256(b"manager123").hexdigest(), "price": 1.5}
+
+
+def test_seeded_users_can_log_in(client):
+    resp = client.post("/login", data={"username": "manager", "password": "manager123"})
+
+    assert resp.status_code == 302 and resp.headers["Location"].endswith("/dashboard")
+
+
+def test_upsert_helpers(store):
+    conn, cursor = _connection()
+    cursor.execute(
+        "INSERT INTO products (product_name, sku, price, quantity) VALUES (%s, %s, %s, %s) "
+        + sqlite_backend.upsert(("sku",)) + " quantity = " + sqlite_backend.excluded("quantity"),
+        ("Milk 1L", "MILK1L", 1.2, 7),
+    )
+    conn.commit()
+    cursor.execute("SELECT COUNT(*) AS n, MAX(quantity) AS q FROM products WHERE sku = 'MILK1L'")
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+
+    assert row == {"n": 1, "q": 7}
+
+
+def test_sales_report_view(store):
+    sale_id = sales_repo.create_sale(2)
+    sales_repo.add_item_to_sale(sale_id, 1, 2)
+
+    conn, cursor = _connection()
+    cursor.execute("SELECT * FROM sales_report")
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    assert len(rows) == 1
+    assert rows[0]["sold_by"] == "cashier1" and rows[0]["quantity_sold"] == 2
+
+
+def test_only_lock_contention_is_retried():
+    assert sqlite_backend.is_retryable(sqlite3.OperationalError("database is locked"))
+    assert not sqlite_backend.is_retryable(sqlite3.OperationalError("no such table: x"))
+    assert not sqlite_backend.is_retryable(sqlite3.IntegrityError("UNIQUE constraint failed"))
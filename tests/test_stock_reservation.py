@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+import db
+from repositories.stock_repo import OutOfStock, release_stock, reserve_stock, reserve_stock_many
+
+
+def _quantity(product_id):
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT quantity FROM products WHERE product_id = %s", (product_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return row[0]
+
+
+def _reserve(product_id, qty):
+    db.run_in_transaction(lambda cursor: reserve_stock(cursor, product_id, qty))
+
+
+def test_reserve_takes_the_last_units_and_no_more(store):
+    _reserve(1, 40)
+    assert _quantity(1) == 0
+
+    with pytest.raises(OutOfStock) as e:
+        _reserve(1, 1)
+    assert e.value.available == 0
+    assert _quantity(1) == 0
+
+
+def test_unknown_product(store):
+    with pytest.raises(OutOfStock) as e:
+        _reserve(999, 1)
+    assert e.value.available is None
+    assert str(e.value) == "Product not found."
+
+
+def test_reserve_many_is_all_or_nothing(store):
+    # A False result leaves partial decrements for the caller to roll back
+    def work(cursor):
+        if not reserve_stock_many(cursor, {1: 5, 2: 101}):
+            raise RuntimeError("rolled back")
+
+    with pytest.raises(RuntimeError):
+        db.run_in_transaction(work)
+    assert (_quantity(1), _quantity(2)) == (40, 100)
+
+    assert db.run_in_transaction(lambda cursor: reserve_stock_many(cursor, {1: 5, 2: 100}))
+    assert (_quantity(1), _quantity(2)) == (35, 0)
+
+
+def test_release_puts_stock_back(store):
+    _reserve(2, 10)
+    db.run_in_transaction(lambda cursor: release_stock(cursor, 2, 4))
+    assert _quantity(2) == 94
+
+
+def test_concurrent_sales_never_oversell(store):
+    _reserve(1, 35)                        # 5 left
+    sold, refused = [], []
+
+    def buy():
+        try:
+            _reserve(1, 1)
+            sold.append(1)
+        except OutOfStock:
+            refused.append(1)
+
+    threads = [threading.Thread(target=buy) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert (len(sold), len(refused)) == (5, 7)
+    assert _quantity(1) == 0